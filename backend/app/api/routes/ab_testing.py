@@ -1,17 +1,18 @@
 """A/B Testing routes — create experiments, run trials, compare variants."""
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
 from app.core.database import get_db
 from app.core.rbac import require_editor
 from app.models.core import User
-from app.services import ab_testing_service
+from app.services import ab_replay_service, ab_testing_service
 
 router = APIRouter()
 
@@ -25,6 +26,8 @@ class CreateExperimentRequest(BaseModel):
     variant_a: dict
     variant_b: dict
     sample_size: int = 100
+    sequential: bool = False  # complete as soon as the mSPRT boundary is crossed
+    alpha: Optional[float] = Field(None, gt=0, lt=1)
 
 
 class RunTrialRequest(BaseModel):
@@ -33,6 +36,12 @@ class RunTrialRequest(BaseModel):
     modality: str = "text"
 
 
+class ReplayRequest(BaseModel):
+    character_id: Optional[int] = None
+    since: Optional[datetime] = None
+    limit: Optional[int] = None  # most recent eval runs to replay
+
+
 # ─── Create Experiment ─────────────────────────────────────────
 
 @router.post("")
@@ -51,6 +60,8 @@ async def create_experiment(
             "variant_a": req.variant_a,
             "variant_b": req.variant_b,
             "sample_size": req.sample_size,
+            "sequential": req.sequential,
+            "alpha": req.alpha,
         },
         org_id=user.org_id,
     )
@@ -61,6 +72,8 @@ async def create_experiment(
         "status": experiment.status,
         "experiment_type": experiment.experiment_type,
         "sample_size": experiment.sample_size,
+        "sequential": bool(experiment.sequential),
+        "alpha": experiment.alpha,
         "created_at": experiment.created_at.isoformat() if experiment.created_at else None,
     }
 
@@ -84,6 +97,8 @@ async def list_experiments(
             "sample_size": exp.sample_size,
             "winner": exp.winner,
             "statistical_significance": exp.statistical_significance,
+            "sequential": bool(exp.sequential),
+            "stopped_early": bool(exp.stopped_early),
             "created_at": exp.created_at.isoformat() if exp.created_at else None,
             "completed_at": exp.completed_at.isoformat() if exp.completed_at else None,
         }
@@ -96,13 +111,14 @@ async def list_experiments(
 @router.get("/{experiment_id}")
 async def get_experiment(
     experiment_id: int,
+    trial_limit: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Get experiment details with computed results."""
+    """Get experiment details with computed results and the most recent trials."""
     try:
         results = await ab_testing_service.get_experiment_results(
-            db, experiment_id, user.org_id
+            db, experiment_id, user.org_id, trial_limit=trial_limit
         )
         return results
     except ValueError as e:
@@ -154,9 +170,49 @@ async def complete_experiment(
             "status": experiment.status,
             "winner": experiment.winner,
             "statistical_significance": experiment.statistical_significance,
+            "stopped_early": bool(experiment.stopped_early),
             "results_a": experiment.results_a,
             "results_b": experiment.results_b,
             "completed_at": experiment.completed_at.isoformat() if experiment.completed_at else None,
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+# ─── Offline Replay ────────────────────────────────────────────
+
+@router.post("/{experiment_id}/replay", status_code=202)
+async def replay_experiment(
+    experiment_id: int,
+    req: ReplayRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_editor),
+):
+    """Replay both variants over stored critic results in the background, without LLM calls."""
+    experiment = await ab_testing_service.get_experiment(db, experiment_id, user.org_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    try:
+        replay = await ab_replay_service.create_replay(
+            db, experiment, character_id=req.character_id, since=req.since, limit=req.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    background_tasks.add_task(ab_replay_service.replay_in_background, replay.id)
+    return ab_replay_service.replay_to_dict(replay)
+
+
+@router.get("/{experiment_id}/replays/{replay_id}")
+async def get_replay(
+    experiment_id: int,
+    replay_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Status and results of an offline replay."""
+    replay = await ab_replay_service.get_replay(db, replay_id, experiment_id, user.org_id)
+    if not replay:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    return ab_replay_service.replay_to_dict(replay)
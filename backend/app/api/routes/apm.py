@@ -9,7 +9,7 @@ from app.core.database import get_db
 from app.models.core import User
 from app.schemas.apm import APMEvalRequest, APMEvalResponse, APMEnforceRequest, APMEnforceResponse
 from app.schemas.evaluations import EvalRequest
-from app.services import evaluation_service
+from app.services import evaluation_service, franchise_service
 
 router = APIRouter()
 
@@ -72,7 +72,8 @@ async def apm_enforce(
         raise HTTPException(status_code=400, detail=f"Invalid action. Must be one of: {valid_actions}")
 
     # Update the run's decision
-    run.decision = data.action if data.action != "override" else "pass"
+    old_decision, run.decision = run.decision, data.action if data.action != "override" else "pass"
+    await franchise_service.record_decision_change(db, run, old_decision)
     await db.flush()
 
     return APMEnforceResponse(
@@ -1,19 +1,24 @@
 """CI/CD integration routes — programmatic eval triggers for GitHub Actions & pipelines."""
 from __future__ import annotations
 
+import asyncio
+import json
+import math
 import uuid
 from datetime import datetime
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.core import User, EvalRun, EvalResult, TestSuite, TestCase
-from app.services import evaluation_service
+from app.core.config import settings
+from app.core.database import get_db, async_session
+from app.models.core import User, EvalRun, EvalResult, TestSuite, TestCase, CIBatchRun
+from app.services import evaluation_service, incremental_ci_service
 from app.schemas.evaluations import EvalRequest
 
 router = APIRouter()
@@ -44,6 +49,12 @@ class CIBatchRequest(BaseModel):
     profile_id: Optional[int] = None
     agent_id: Optional[str] = None
     test_suite_id: Optional[int] = None  # optionally run from a test suite
+    # Cases evaluated at once (default CI_BATCH_CONCURRENCY)
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_EVAL_MAX_CONCURRENCY)
+    min_pass_rate: float = 1.0  # overall pass requires at least this share of passing cases
+    fail_fast: bool = False  # stop starting cases once min_pass_rate is unreachable
+    incremental: bool = True  # reuse results of unchanged cases from the last green run
+    stream: bool = False  # stream per-case NDJSON progress
 
 
 class CITriggerResponse(BaseModel):
@@ -66,6 +77,8 @@ class CIBatchCaseResult(BaseModel):
     threshold: float
     expected_decision: Optional[str] = None
     decision_match: Optional[bool] = None
+    reused: bool = False  # result taken from the last green run (unchanged fingerprint)
+    fingerprint: Optional[str] = None
 
 
 class CIBatchResponse(BaseModel):
@@ -74,15 +87,14 @@ class CIBatchResponse(BaseModel):
     total: int
     passed: int
     failed: int
+    skipped: int = 0
+    reused: int = 0
+    evaluated: int = 0
     pass_rate: float
     overall_passed: bool
     results: List[CIBatchCaseResult]
 
 
-# In-memory batch tracking (for lightweight status checks)
-_batch_results: dict = {}
-
-
 # ─── Single Eval Trigger ──────────────────────────────────────
 
 @router.post("/trigger", response_model=CITriggerResponse)
@@ -137,139 +149,236 @@ async def ci_trigger(
 
 # ─── Batch Eval ───────────────────────────────────────────────
 
-@router.post("/batch", response_model=CIBatchResponse)
-async def ci_batch(
-    req: CIBatchRequest,
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    """Run batch evaluations for CI/CD.
-
-    Accepts an array of test cases or references a test suite.
-    Returns aggregate pass/fail results.
-    """
-    batch_id = str(uuid.uuid4())[:12]
-    cases = []
-
+async def _load_cases(db: AsyncSession, req: CIBatchRequest, org_id: int) -> List[CIBatchCase]:
     # If test_suite_id is provided, load cases from the test suite
-    if req.test_suite_id:
-        suite_result = await db.execute(
-            select(TestSuite).where(
-                TestSuite.id == req.test_suite_id,
-                TestSuite.org_id == user.org_id,
-            )
+    if not req.test_suite_id:
+        return req.cases
+
+    suite_result = await db.execute(
+        select(TestSuite).where(
+            TestSuite.id == req.test_suite_id,
+            TestSuite.org_id == org_id,
         )
-        suite = suite_result.scalar_one_or_none()
-        if not suite:
-            raise HTTPException(status_code=404, detail="Test suite not found")
+    )
+    suite = suite_result.scalar_one_or_none()
+    if not suite:
+        raise HTTPException(status_code=404, detail="Test suite not found")
 
-        tc_result = await db.execute(
-            select(TestCase).where(TestCase.suite_id == suite.id)
+    tc_result = await db.execute(
+        select(TestCase).where(TestCase.suite_id == suite.id)
+    )
+    cases = []
+    for tc in tc_result.scalars().all():
+        input_data = tc.input_content or {}
+        expected = tc.expected_outcome or {}
+        cases.append(CIBatchCase(
+            character_id=suite.character_id,
+            content=input_data.get("content", ""),
+            modality=input_data.get("modality", "text"),
+            expected_decision=expected.get("decision"),
+            threshold=suite.passing_threshold,
+        ))
+    return cases
+
+
+def _case_result(
+    idx: int, case: CIBatchCase, outcome: Optional[dict], fingerprint: Optional[str] = None,
+) -> CIBatchCaseResult:
+    """Score one case's batch outcome against its threshold and expected decision."""
+    fingerprint = (outcome or {}).get("fingerprint", fingerprint)
+    if outcome is None or outcome["status"] != "completed":
+        return CIBatchCaseResult(
+            index=idx,
+            eval_run_id=(outcome or {}).get("eval_run_id") or 0,
+            character_id=case.character_id,
+            score=0.0,
+            decision="skipped" if outcome is None else "error",
+            passed=False,
+            threshold=case.threshold,
+            expected_decision=case.expected_decision,
+            decision_match=False,
+            fingerprint=fingerprint,
         )
-        test_cases = list(tc_result.scalars().all())
-
-        for tc in test_cases:
-            input_data = tc.input_content or {}
-            expected = tc.expected_outcome or {}
-            cases.append(CIBatchCase(
-                character_id=suite.character_id,
-                content=input_data.get("content", ""),
-                modality=input_data.get("modality", "text"),
-                expected_decision=expected.get("decision"),
-                threshold=suite.passing_threshold,
-            ))
-    else:
-        cases = req.cases
 
-    if not cases:
-        raise HTTPException(status_code=400, detail="No test cases provided")
+    score = outcome["overall_score"] or 0.0
+    decision = outcome["decision"] or "block"
+    passed = score >= case.threshold
+
+    decision_match = None
+    if case.expected_decision:
+        decision_match = decision == case.expected_decision
+        if not decision_match:
+            passed = False
+
+    return CIBatchCaseResult(
+        index=idx,
+        eval_run_id=outcome["eval_run_id"],
+        character_id=case.character_id,
+        score=round(score, 4),
+        decision=decision,
+        passed=passed,
+        threshold=case.threshold,
+        expected_decision=case.expected_decision,
+        decision_match=decision_match,
+        reused=outcome.get("reused", False),
+        fingerprint=fingerprint,
+    )
 
-    results = []
-    passed_count = 0
-    failed_count = 0
 
-    for idx, case in enumerate(cases):
-        eval_request = EvalRequest(
+async def _run_batch(
+    db: AsyncSession, batch: CIBatchRun, cases: List[CIBatchCase], req: CIBatchRequest, org_id: int, on_case=None,
+) -> CIBatchResponse:
+    """Evaluate cases with bounded concurrency, stopping early once the pass rate is out of reach."""
+    total = len(cases)
+    # Failures the batch can absorb and still reach min_pass_rate
+    allowed_failures = total - math.ceil(req.min_pass_rate * total - 1e-9)
+    counts = {"passed": 0, "failed": 0}
+    case_results: dict = {}
+
+    async def on_result(outcome: dict) -> None:
+        idx = outcome["index"]
+        result = _case_result(idx, cases[idx], outcome)
+        case_results[idx] = result
+        counts["passed" if result.passed else "failed"] += 1
+        # Flushed with the batch's periodic commits, so /status shows live progress
+        batch.passed, batch.failed = counts["passed"], counts["failed"]
+        if on_case:
+            await on_case(result)
+
+    def should_stop() -> bool:
+        return req.fail_fast and counts["failed"] > allowed_failures
+
+    eval_requests = [
+        EvalRequest(
             character_id=case.character_id,
             content=case.content,
             modality=case.modality,
             profile_id=req.profile_id,
             agent_id=req.agent_id,
         )
+        for case in cases
+    ]
+    _, fingerprints = await incremental_ci_service.run_incremental(
+        db, eval_requests, org_id,
+        test_suite_id=req.test_suite_id,
+        incremental=req.incremental,
+        concurrency=req.concurrency or settings.CI_BATCH_CONCURRENCY,
+        on_result=on_result,
+        should_stop=should_stop,
+    )
 
-        try:
-            eval_run = await evaluation_service.evaluate(db, eval_request, user.org_id)
-            await db.flush()
-
-            score = eval_run.overall_score or 0.0
-            decision = eval_run.decision or "block"
-            case_passed = score >= case.threshold
-
-            decision_match = None
-            if case.expected_decision:
-                decision_match = decision == case.expected_decision
-                if not decision_match:
-                    case_passed = False
-
-            if case_passed:
-                passed_count += 1
-            else:
-                failed_count += 1
-
-            results.append(CIBatchCaseResult(
-                index=idx,
-                eval_run_id=eval_run.id,
-                character_id=case.character_id,
-                score=round(score, 4),
-                decision=decision,
-                passed=case_passed,
-                threshold=case.threshold,
-                expected_decision=case.expected_decision,
-                decision_match=decision_match,
-            ))
-        except Exception as e:
-            failed_count += 1
-            results.append(CIBatchCaseResult(
-                index=idx,
-                eval_run_id=0,
-                character_id=case.character_id,
-                score=0.0,
-                decision="error",
-                passed=False,
-                threshold=case.threshold,
-                expected_decision=case.expected_decision,
-                decision_match=False,
-            ))
-
+    results = [
+        case_results.get(idx) or _case_result(idx, case, None, fingerprints[idx])
+        for idx, case in enumerate(cases)
+    ]
+    skipped = sum(1 for r in results if r.decision == "skipped")
+    reused = sum(1 for r in results if r.reused)
+    evaluated = total - skipped - reused
+    pass_rate = counts["passed"] / total if total > 0 else 0.0
+    overall_passed = counts["failed"] <= allowed_failures and skipped == 0
+    status = "failed_fast" if skipped else "completed"
+
+    batch.status = status
+    batch.passed = counts["passed"]
+    batch.failed = counts["failed"]
+    batch.skipped = skipped
+    batch.reused = reused
+    batch.evaluated = evaluated
+    batch.pass_rate = round(pass_rate, 4)
+    batch.overall_passed = overall_passed
+    batch.results = [r.model_dump() for r in results]
+    batch.completed_at = datetime.utcnow()
     await db.commit()
 
-    total = len(results)
-    pass_rate = passed_count / total if total > 0 else 0.0
-    overall_passed = failed_count == 0
-
-    batch_response = CIBatchResponse(
-        batch_id=batch_id,
-        status="completed",
+    return CIBatchResponse(
+        batch_id=batch.batch_id,
+        status=status,
         total=total,
-        passed=passed_count,
-        failed=failed_count,
+        passed=counts["passed"],
+        failed=counts["failed"],
+        skipped=skipped,
+        reused=reused,
+        evaluated=evaluated,
         pass_rate=round(pass_rate, 4),
         overall_passed=overall_passed,
         results=results,
     )
 
-    # Store for status checks
-    _batch_results[batch_id] = {
-        "status": "completed",
-        "total": total,
-        "passed": passed_count,
-        "failed": failed_count,
-        "pass_rate": round(pass_rate, 4),
-        "overall_passed": overall_passed,
-        "completed_at": datetime.utcnow().isoformat(),
-    }
 
-    return batch_response
+@router.post("/batch", response_model=CIBatchResponse)
+async def ci_batch(
+    req: CIBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Run batch evaluations for CI/CD.
+
+    Accepts an array of test cases or references a test suite. Cases run with bounded
+    concurrency; with ``fail_fast`` the batch stops starting new cases once
+    ``min_pass_rate`` can no longer be reached. With ``stream`` set, per-case results
+    are streamed as NDJSON lines, followed by the aggregate response as a final
+    ``{"batch": ...}`` line. Results are stored and can be polled at ``/status/{batch_id}``.
+    """
+    cases = await _load_cases(db, req, user.org_id)
+    if not cases:
+        raise HTTPException(status_code=400, detail="No test cases provided")
+
+    batch = CIBatchRun(
+        batch_id=str(uuid.uuid4())[:12],
+        test_suite_id=req.test_suite_id,
+        profile_id=req.profile_id,
+        agent_id=req.agent_id,
+        status="running",
+        total=len(cases),
+        min_pass_rate=req.min_pass_rate,
+        org_id=user.org_id,
+    )
+    db.add(batch)
+    await db.commit()
+
+    if not req.stream:
+        try:
+            return await _run_batch(db, batch, cases, req, user.org_id)
+        except Exception:
+            await db.rollback()
+            batch.status = "error"
+            batch.completed_at = datetime.utcnow()
+            await db.commit()
+            raise
+
+    org_id = user.org_id
+
+    async def stream():
+        # The request's session closes before a streamed body is sent, so use our own
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_case(result: CIBatchCaseResult) -> None:
+            await queue.put({"case": result.model_dump()})
+
+        async def run():
+            async with async_session() as session:
+                own_batch = await session.get(CIBatchRun, batch.id)
+                try:
+                    response = await _run_batch(session, own_batch, cases, req, org_id, on_case)
+                    await queue.put({"batch": response.model_dump()})
+                except Exception as e:
+                    await session.rollback()
+                    own_batch.status = "error"
+                    own_batch.completed_at = datetime.utcnow()
+                    await session.commit()
+                    await queue.put({"batch_error": str(e)})
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                message = await queue.get()
+                yield json.dumps(message) + "\n"
+                if "batch" in message or "batch_error" in message:
+                    break
+        finally:
+            await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 # ─── Batch Status ─────────────────────────────────────────────
@@ -277,12 +386,29 @@ async def ci_batch(
 @router.get("/status/{batch_id}")
 async def ci_batch_status(
     batch_id: str,
+    db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """Check the status of a batch evaluation run."""
-    if batch_id in _batch_results:
-        return {
-            "batch_id": batch_id,
-            **_batch_results[batch_id],
-        }
-    raise HTTPException(status_code=404, detail="Batch not found")
+    result = await db.execute(
+        select(CIBatchRun).where(CIBatchRun.batch_id == batch_id, CIBatchRun.org_id == user.org_id)
+    )
+    batch = result.scalar_one_or_none()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {
+        "batch_id": batch.batch_id,
+        "status": batch.status,
+        "total": batch.total,
+        "completed_cases": batch.passed + batch.failed,
+        "passed": batch.passed,
+        "failed": batch.failed,
+        "skipped": batch.skipped,
+        "reused": batch.reused,
+        "evaluated": batch.evaluated,
+        "pass_rate": batch.pass_rate,
+        "min_pass_rate": batch.min_pass_rate,
+        "overall_passed": batch.overall_passed,
+        "created_at": batch.created_at.isoformat() if batch.created_at else None,
+        "completed_at": batch.completed_at.isoformat() if batch.completed_at else None,
+    }
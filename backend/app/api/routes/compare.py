@@ -1,9 +1,12 @@
-"""Pairwise Comparison Mode — compare two eval runs, head-to-head characters, or card versions."""
+"""Pairwise Comparison Mode — compare two eval runs, head-to-head characters, or card versions.
+
+Head-to-head and version comparisons take two or more sides. All sides are
+evaluated at once with ``evaluate_batch``, inside a ``critic_service.shared_calls``
+scope, so a critic call that is identical on several sides runs only once. Provider
+requests stay within the process-wide ``LLM_MAX_CONCURRENCY`` limit.
+"""
 from __future__ import annotations
 
-import json
-import os
-from datetime import datetime
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -12,17 +15,15 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
+from app.core.config import settings
 from app.core.rbac import require_editor
 from app.core.database import get_db
 from app.models.core import User, EvalRun, EvalResult, CriticResult, Critic, CardVersion
 from app.schemas.evaluations import EvalRequest, EvalRunOut, EvalResultOut, EvalResponse
-from app.services import evaluation_service, character_service
+from app.services import evaluation_service, character_service, critic_service, compare_history_service
 
 router = APIRouter()
 
-# Lightweight JSON log for comparison history
-COMPARE_LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "compare_history.json")
-
 
 # ─── Request Schemas ─────────────────────────────────────────────
 
@@ -34,14 +35,16 @@ class CompareRunsRequest(BaseModel):
 class HeadToHeadRequest(BaseModel):
     content: str
     modality: str = "text"
-    character_id_a: int
-    character_id_b: int
+    character_id_a: Optional[int] = None
+    character_id_b: Optional[int] = None
+    character_ids: Optional[List[int]] = None  # two or more characters; replaces character_id_a/b
 
 
 class CompareVersionsRequest(BaseModel):
     character_id: int
-    version_a: int
-    version_b: int
+    version_a: Optional[int] = None
+    version_b: Optional[int] = None
+    versions: Optional[List[int]] = None  # two or more version numbers; replaces version_a/b
     content: str
     modality: str = "text"
 
@@ -130,21 +133,55 @@ def compute_comparison(run_a, result_a, run_b, result_b, critic_map):
     }
 
 
-def _append_history(entry: dict):
-    """Append a comparison entry to the lightweight JSON log."""
-    try:
-        if os.path.exists(COMPARE_LOG_PATH):
-            with open(COMPARE_LOG_PATH, "r") as f:
-                history = json.load(f)
-        else:
-            history = []
-        history.append(entry)
-        # Keep only most recent 200 entries
-        history = history[-200:]
-        with open(COMPARE_LOG_PATH, "w") as f:
-            json.dump(history, f, default=str)
-    except Exception:
-        pass  # Best-effort logging
+def _side_ids(many: Optional[List[int]], a: Optional[int], b: Optional[int], what: str) -> List[int]:
+    """The compared sides: ``many`` if given, else the pair ``a``/``b``."""
+    ids = list(many) if many else [i for i in (a, b) if i is not None]
+    if len(ids) < 2:
+        raise HTTPException(status_code=400, detail=f"At least two {what} are required")
+    if len(ids) > settings.COMPARE_MAX_SIDES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.COMPARE_MAX_SIDES} {what} can be compared")
+    return ids
+
+
+def _side_label(index: int) -> str:
+    return chr(ord("A") + index)
+
+
+async def _evaluate_sides(db: AsyncSession, requests: List[EvalRequest], org_id: int, what: str) -> list:
+    """Evaluate every side concurrently, sharing identical critic calls; ``(run, result, result_out)`` per side."""
+    with critic_service.shared_calls():
+        outcomes = await evaluation_service.evaluate_batch(db, requests, org_id, concurrency=len(requests))
+    for index, outcome in enumerate(outcomes):
+        if outcome["eval_run_id"] is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Evaluation failed for {what} {_side_label(index)}: {outcome['error']}",
+            )
+    return [await _load_run_and_result(db, outcome["eval_run_id"], org_id) for outcome in outcomes]
+
+
+def _sides_response(evaluated: list, side_info: List[dict], critic_map: dict) -> dict:
+    """Every side, each later side's comparison with the first, and the first pair as ``side_a``/``side_b``."""
+    sides = [
+        {
+            **info,
+            "eval_run": EvalRunOut.model_validate(run).model_dump(),
+            "result": result_out.model_dump() if result_out else None,
+        }
+        for (run, _, result_out), info in zip(evaluated, side_info)
+    ]
+    run_a, result_a, _ = evaluated[0]
+    comparisons = [
+        {"side": index, **compute_comparison(run_a, result_a, run, result, critic_map)}
+        for index, (run, result, _) in enumerate(evaluated) if index > 0
+    ]
+    return {
+        "side_a": {key: sides[0][key] for key in ("eval_run", "result")},
+        "side_b": {key: sides[1][key] for key in ("eval_run", "result")},
+        "comparison": {key: value for key, value in comparisons[0].items() if key != "side"},
+        "sides": sides,
+        "comparisons": comparisons,
+    }
 
 
 # ─── Routes ──────────────────────────────────────────────────────
@@ -175,13 +212,12 @@ async def compare_runs(
         "comparison": comparison,
     }
 
-    _append_history({
+    await compare_history_service.record(db, {
         "mode": "runs",
         "run_id_a": data.run_id_a,
         "run_id_b": data.run_id_b,
         "score_diff": comparison["score_diff"],
         "decisions_match": comparison["decisions_match"],
-        "created_at": datetime.utcnow().isoformat(),
         "user_id": user.id,
         "org_id": user.org_id,
     })
@@ -195,74 +231,50 @@ async def head_to_head(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_editor),
 ):
-    """Evaluate same content against two characters and compare results."""
-    # Validate both characters exist
-    char_a = await character_service.get_character(db, data.character_id_a, user.org_id)
-    if not char_a:
-        raise HTTPException(status_code=404, detail=f"Character {data.character_id_a} not found")
-    char_b = await character_service.get_character(db, data.character_id_b, user.org_id)
-    if not char_b:
-        raise HTTPException(status_code=404, detail=f"Character {data.character_id_b} not found")
-
-    # Run evaluation for character A
-    req_a = EvalRequest(
-        character_id=data.character_id_a,
-        content=data.content,
-        modality=data.modality,
-    )
-    try:
-        eval_run_a = await evaluation_service.evaluate(db, req_a, user.org_id)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Evaluation failed for character A: {str(e)}")
-
-    # Run evaluation for character B
-    req_b = EvalRequest(
-        character_id=data.character_id_b,
-        content=data.content,
-        modality=data.modality,
-    )
-    try:
-        eval_run_b = await evaluation_service.evaluate(db, req_b, user.org_id)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Evaluation failed for character B: {str(e)}")
-
-    await db.commit()
-
-    # Load full results
-    _, result_a, result_out_a = await _load_run_and_result(db, eval_run_a.id, user.org_id)
-    _, result_b, result_out_b = await _load_run_and_result(db, eval_run_b.id, user.org_id)
+    """Evaluate the same content against two or more characters and compare results."""
+    character_ids = _side_ids(data.character_ids, data.character_id_a, data.character_id_b, "characters")
+
+    # Validate all characters exist
+    characters = []
+    for character_id in character_ids:
+        character = await character_service.get_character(db, character_id, user.org_id)
+        if not character:
+            raise HTTPException(status_code=404, detail=f"Character {character_id} not found")
+        characters.append(character)
+
+    requests = [
+        EvalRequest(character_id=character_id, content=data.content, modality=data.modality)
+        for character_id in character_ids
+    ]
+    evaluated = await _evaluate_sides(db, requests, user.org_id, "character")
 
     critic_map = await _build_critic_map(db)
-    comparison = compute_comparison(eval_run_a, result_a, eval_run_b, result_b, critic_map)
+    sides = _sides_response(
+        evaluated, [{"character": {"id": c.id, "name": c.name}} for c in characters], critic_map,
+    )
+    comparison = sides["comparison"]
 
     response = {
         "mode": "head_to_head",
         "content": data.content,
         "modality": data.modality,
-        "character_a": {"id": char_a.id, "name": char_a.name},
-        "character_b": {"id": char_b.id, "name": char_b.name},
-        "side_a": {
-            "eval_run": EvalRunOut.model_validate(eval_run_a).model_dump(),
-            "result": result_out_a.model_dump() if result_out_a else None,
-        },
-        "side_b": {
-            "eval_run": EvalRunOut.model_validate(eval_run_b).model_dump(),
-            "result": result_out_b.model_dump() if result_out_b else None,
-        },
-        "comparison": comparison,
+        "character_a": sides["sides"][0]["character"],
+        "character_b": sides["sides"][1]["character"],
+        **sides,
     }
 
-    _append_history({
+    await compare_history_service.record(db, {
         "mode": "head_to_head",
-        "character_id_a": data.character_id_a,
-        "character_id_b": data.character_id_b,
-        "character_name_a": char_a.name,
-        "character_name_b": char_b.name,
-        "run_id_a": eval_run_a.id,
-        "run_id_b": eval_run_b.id,
+        "character_id_a": character_ids[0],
+        "character_id_b": character_ids[1],
+        "character_name_a": characters[0].name,
+        "character_name_b": characters[1].name,
+        "character_ids": character_ids,
+        "run_id_a": evaluated[0][0].id,
+        "run_id_b": evaluated[1][0].id,
+        "run_ids": [run.id for run, _, _ in evaluated],
         "score_diff": comparison["score_diff"],
         "decisions_match": comparison["decisions_match"],
-        "created_at": datetime.utcnow().isoformat(),
         "user_id": user.id,
         "org_id": user.org_id,
     })
@@ -276,107 +288,72 @@ async def compare_versions(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_editor),
 ):
-    """Compare eval results across two card versions for the same character."""
+    """Compare eval results across two or more card versions of the same character.
+
+    Each side is evaluated against its version directly; the character's active
+    version is left untouched.
+    """
+    version_numbers = _side_ids(data.versions, data.version_a, data.version_b, "versions")
+
     # Validate character exists
     character = await character_service.get_character(db, data.character_id, user.org_id)
     if not character:
         raise HTTPException(status_code=404, detail=f"Character {data.character_id} not found")
 
-    # Validate both versions exist
-    ver_a_result = await db.execute(
+    # Validate all versions exist
+    result = await db.execute(
         select(CardVersion).where(
             CardVersion.character_id == data.character_id,
-            CardVersion.version_number == data.version_a,
+            CardVersion.version_number.in_(version_numbers),
         )
     )
-    ver_a = ver_a_result.scalar_one_or_none()
-    if not ver_a:
-        raise HTTPException(status_code=404, detail=f"Version {data.version_a} not found for character {data.character_id}")
-
-    ver_b_result = await db.execute(
-        select(CardVersion).where(
-            CardVersion.character_id == data.character_id,
-            CardVersion.version_number == data.version_b,
+    by_number = {v.version_number: v for v in result.scalars().all()}
+    for number in version_numbers:
+        if number not in by_number:
+            raise HTTPException(status_code=404, detail=f"Version {number} not found for character {data.character_id}")
+    versions = [by_number[number] for number in version_numbers]
+
+    requests = [
+        EvalRequest(
+            character_id=data.character_id,
+            card_version_id=version.id,
+            content=data.content,
+            modality=data.modality,
         )
-    )
-    ver_b = ver_b_result.scalar_one_or_none()
-    if not ver_b:
-        raise HTTPException(status_code=404, detail=f"Version {data.version_b} not found for character {data.character_id}")
-
-    # Temporarily set active version to A, evaluate, then B, evaluate
-    original_active = character.active_version_id
-
-    # Evaluate with version A
-    character.active_version_id = ver_a.id
-    await db.flush()
-    req_a = EvalRequest(
-        character_id=data.character_id,
-        content=data.content,
-        modality=data.modality,
-    )
-    try:
-        eval_run_a = await evaluation_service.evaluate(db, req_a, user.org_id)
-    except ValueError as e:
-        character.active_version_id = original_active
-        await db.flush()
-        raise HTTPException(status_code=400, detail=f"Evaluation failed for version A: {str(e)}")
-
-    # Evaluate with version B
-    character.active_version_id = ver_b.id
-    await db.flush()
-    req_b = EvalRequest(
-        character_id=data.character_id,
-        content=data.content,
-        modality=data.modality,
-    )
-    try:
-        eval_run_b = await evaluation_service.evaluate(db, req_b, user.org_id)
-    except ValueError as e:
-        character.active_version_id = original_active
-        await db.flush()
-        raise HTTPException(status_code=400, detail=f"Evaluation failed for version B: {str(e)}")
-
-    # Restore original active version
-    character.active_version_id = original_active
-    await db.flush()
-    await db.commit()
-
-    # Load full results
-    _, result_a, result_out_a = await _load_run_and_result(db, eval_run_a.id, user.org_id)
-    _, result_b, result_out_b = await _load_run_and_result(db, eval_run_b.id, user.org_id)
+        for version in versions
+    ]
+    evaluated = await _evaluate_sides(db, requests, user.org_id, "version")
 
     critic_map = await _build_critic_map(db)
-    comparison = compute_comparison(eval_run_a, result_a, eval_run_b, result_b, critic_map)
+    sides = _sides_response(
+        evaluated,
+        [{"version": {"version_number": v.version_number, "id": v.id}} for v in versions],
+        critic_map,
+    )
+    comparison = sides["comparison"]
 
     response = {
         "mode": "versions",
         "character": {"id": character.id, "name": character.name},
-        "version_a": {"version_number": data.version_a, "id": ver_a.id},
-        "version_b": {"version_number": data.version_b, "id": ver_b.id},
+        "version_a": sides["sides"][0]["version"],
+        "version_b": sides["sides"][1]["version"],
         "content": data.content,
         "modality": data.modality,
-        "side_a": {
-            "eval_run": EvalRunOut.model_validate(eval_run_a).model_dump(),
-            "result": result_out_a.model_dump() if result_out_a else None,
-        },
-        "side_b": {
-            "eval_run": EvalRunOut.model_validate(eval_run_b).model_dump(),
-            "result": result_out_b.model_dump() if result_out_b else None,
-        },
-        "comparison": comparison,
+        **sides,
     }
 
-    _append_history({
+    await compare_history_service.record(db, {
         "mode": "versions",
         "character_id": data.character_id,
         "character_name": character.name,
-        "version_a": data.version_a,
-        "version_b": data.version_b,
-        "run_id_a": eval_run_a.id,
-        "run_id_b": eval_run_b.id,
+        "version_a": version_numbers[0],
+        "version_b": version_numbers[1],
+        "versions": version_numbers,
+        "run_id_a": evaluated[0][0].id,
+        "run_id_b": evaluated[1][0].id,
+        "run_ids": [run.id for run, _, _ in evaluated],
         "score_diff": comparison["score_diff"],
         "decisions_match": comparison["decisions_match"],
-        "created_at": datetime.utcnow().isoformat(),
         "user_id": user.id,
         "org_id": user.org_id,
     })
@@ -387,22 +364,10 @@ async def compare_versions(
 @router.get("/history")
 async def comparison_history(
     limit: int = 20,
+    before: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """List recent comparisons from the lightweight JSON log."""
-    try:
-        if os.path.exists(COMPARE_LOG_PATH):
-            with open(COMPARE_LOG_PATH, "r") as f:
-                history = json.load(f)
-        else:
-            history = []
-    except Exception:
-        history = []
-
-    # Filter to current org
-    org_history = [h for h in history if h.get("org_id") == user.org_id]
-
-    # Return most recent entries
-    org_history.reverse()
-    return org_history[:limit]
+    """List recent comparisons, newest first; pass the last entry's id as ``before`` for the next page."""
+    rows = await compare_history_service.list_history(db, user.org_id, limit=limit, before=before)
+    return [compare_history_service.record_to_dict(row) for row in rows]
@@ -1,26 +1,23 @@
 from __future__ import annotations
 
-import statistics
-from datetime import datetime
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
 from app.core.auth import get_current_user
 from app.core.database import get_db
+from app.core.rbac import require_editor
 from app.models.core import (
     User,
-    EvalRun,
-    EvalResult,
-    CriticResult,
     DriftBaseline,
     DriftEvent,
+    DriftSweep,
     CharacterCard,
     Critic,
-    CardVersion,
 )
+from app.services import drift_service
 
 router = APIRouter()
 
@@ -30,10 +27,16 @@ router = APIRouter()
 @router.post("/compute-baselines")
 async def compute_baselines(
     character_id: int,
+    detector: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Compute drift baselines from the last 50 eval runs for each critic."""
+    """Rebuild drift baselines from the most recent eval runs for each critic.
+
+    Baselines also update on every evaluation; rebuilding restarts them from recent
+    history, e.g. to accept a deliberate change in scores. ``detector`` switches the
+    character's change-point detector (ewma, cusum, page_hinkley).
+    """
     # Verify character
     char_result = await db.execute(
         select(CharacterCard).where(
@@ -45,111 +48,12 @@ async def compute_baselines(
     if not character:
         raise HTTPException(status_code=404, detail="Character not found")
 
-    card_version_id = character.active_version_id
-    if not card_version_id:
-        # Fallback: get latest version
-        ver_result = await db.execute(
-            select(CardVersion)
-            .where(CardVersion.character_id == character_id)
-            .order_by(CardVersion.version_number.desc())
-            .limit(1)
-        )
-        version = ver_result.scalar_one_or_none()
-        if not version:
-            raise HTTPException(status_code=400, detail="No card version found for character")
-        card_version_id = version.id
-
-    # Get last 50 eval runs for this character
-    runs_result = await db.execute(
-        select(EvalRun)
-        .where(
-            EvalRun.character_id == character_id,
-            EvalRun.org_id == user.org_id,
-            EvalRun.status == "completed",
-        )
-        .order_by(EvalRun.created_at.desc())
-        .limit(50)
-    )
-    runs = list(runs_result.scalars().all())
-
-    if not runs:
-        raise HTTPException(status_code=400, detail="No completed evaluations found for this character")
-
-    run_ids = [r.id for r in runs]
-
-    # Get eval results for these runs
-    results_result = await db.execute(
-        select(EvalResult).where(EvalResult.eval_run_id.in_(run_ids))
-    )
-    eval_results = list(results_result.scalars().all())
-    result_ids = [r.id for r in eval_results]
-
-    if not result_ids:
-        raise HTTPException(status_code=400, detail="No evaluation results found")
-
-    # Get all critic results
-    cr_result = await db.execute(
-        select(CriticResult).where(CriticResult.eval_result_id.in_(result_ids))
-    )
-    critic_results = list(cr_result.scalars().all())
-
-    # Group scores by critic_id
-    critic_scores = {}
-    for cr in critic_results:
-        if cr.critic_id not in critic_scores:
-            critic_scores[cr.critic_id] = []
-        critic_scores[cr.critic_id].append(cr.score)
-
-    # Compute and store baselines
-    baselines_created = []
-    for critic_id, scores in critic_scores.items():
-        if len(scores) < 2:
-            mean_score = scores[0] if scores else 0.0
-            std_dev = 0.0
-        else:
-            mean_score = statistics.mean(scores)
-            std_dev = statistics.stdev(scores)
-
-        # Check if baseline already exists, update it
-        existing_result = await db.execute(
-            select(DriftBaseline).where(
-                DriftBaseline.character_id == character_id,
-                DriftBaseline.critic_id == critic_id,
-                DriftBaseline.org_id == user.org_id,
-            )
-        )
-        existing = existing_result.scalar_one_or_none()
-
-        if existing:
-            existing.baseline_score = mean_score
-            existing.std_deviation = std_dev
-            existing.sample_count = len(scores)
-            existing.threshold = 2.0
-            existing.card_version_id = card_version_id
-            existing.updated_at = datetime.utcnow()
-            baselines_created.append(existing)
-        else:
-            baseline = DriftBaseline(
-                character_id=character_id,
-                card_version_id=card_version_id,
-                critic_id=critic_id,
-                baseline_score=mean_score,
-                std_deviation=std_dev,
-                sample_count=len(scores),
-                threshold=2.0,
-                org_id=user.org_id,
-            )
-            db.add(baseline)
-            baselines_created.append(baseline)
-
+    try:
+        result = await drift_service.recompute_baselines(db, character, detector)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     await db.commit()
-
-    return {
-        "message": f"Computed baselines for {len(baselines_created)} critics",
-        "character_id": character_id,
-        "baselines_count": len(baselines_created),
-        "eval_runs_sampled": len(runs),
-    }
+    return result
 
 
 # ─── Run Drift Check ─────────────────────────────────────────
@@ -160,121 +64,42 @@ async def check_drift(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Compare last 10 evals against baselines, create DriftEvent for deviations."""
-    # Get baselines for this character
-    baselines_result = await db.execute(
-        select(DriftBaseline).where(
-            DriftBaseline.character_id == character_id,
-            DriftBaseline.org_id == user.org_id,
-        )
-    )
-    baselines = list(baselines_result.scalars().all())
-
-    if not baselines:
-        raise HTTPException(
-            status_code=400,
-            detail="No baselines found. Compute baselines first.",
-        )
-
-    baseline_map = {b.critic_id: b for b in baselines}
-
-    # Get last 10 eval runs
-    runs_result = await db.execute(
-        select(EvalRun)
-        .where(
-            EvalRun.character_id == character_id,
-            EvalRun.org_id == user.org_id,
-            EvalRun.status == "completed",
-        )
-        .order_by(EvalRun.created_at.desc())
-        .limit(10)
-    )
-    runs = list(runs_result.scalars().all())
-
-    if not runs:
-        return {"message": "No recent evaluations to check", "events_created": 0}
-
-    run_ids = [r.id for r in runs]
-    run_map = {r.id: r for r in runs}
-
-    # Get eval results
-    results_result = await db.execute(
-        select(EvalResult).where(EvalResult.eval_run_id.in_(run_ids))
-    )
-    eval_results = list(results_result.scalars().all())
-    result_ids = [r.id for r in eval_results]
-    result_run_map = {r.id: r.eval_run_id for r in eval_results}
-
-    if not result_ids:
-        return {"message": "No evaluation results to check", "events_created": 0}
+    """Compare each critic's recent mean against its baseline, create DriftEvent for new deviations."""
+    try:
+        result = await drift_service.check_character(db, user.org_id, character_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return result
 
-    # Get critic results
-    cr_result = await db.execute(
-        select(CriticResult).where(CriticResult.eval_result_id.in_(result_ids))
-    )
-    critic_results = list(cr_result.scalars().all())
-
-    # Group by critic and compute mean
-    critic_scores = {}
-    critic_run_ids = {}
-    for cr in critic_results:
-        if cr.critic_id not in critic_scores:
-            critic_scores[cr.critic_id] = []
-            critic_run_ids[cr.critic_id] = []
-        critic_scores[cr.critic_id].append(cr.score)
-        eval_run_id = result_run_map.get(cr.eval_result_id)
-        if eval_run_id:
-            critic_run_ids[cr.critic_id].append(eval_run_id)
-
-    events_created = 0
-    for critic_id, scores in critic_scores.items():
-        baseline = baseline_map.get(critic_id)
-        if not baseline:
-            continue
 
-        mean_recent = statistics.mean(scores)
-        deviation = abs(mean_recent - baseline.baseline_score)
-
-        # Check if deviation exceeds threshold * std_deviation
-        threshold_value = baseline.threshold * baseline.std_deviation if baseline.std_deviation > 0 else baseline.threshold * 5.0
-        if deviation > threshold_value:
-            # Determine severity
-            if baseline.std_deviation > 0:
-                z_score = deviation / baseline.std_deviation
-            else:
-                z_score = deviation / 5.0  # fallback
-
-            if z_score >= 4.0:
-                severity = "critical"
-            elif z_score >= 3.0:
-                severity = "high"
-            elif z_score >= 2.0:
-                severity = "medium"
-            else:
-                severity = "low"
-
-            # Use most recent eval run id
-            recent_run_id = critic_run_ids[critic_id][0] if critic_run_ids[critic_id] else None
-
-            event = DriftEvent(
-                baseline_id=baseline.id,
-                detected_score=mean_recent,
-                deviation=deviation,
-                eval_run_id=recent_run_id,
-                severity=severity,
-                org_id=user.org_id,
-            )
-            db.add(event)
-            events_created += 1
+# ─── Org-wide Sweep ──────────────────────────────────────────
 
+@router.post("/sweep", status_code=202)
+async def start_sweep(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_editor),
+):
+    """Check every character's baselines against its recent scores in the background."""
+    sweep = DriftSweep(status="pending", org_id=user.org_id)
+    db.add(sweep)
     await db.commit()
+    background_tasks.add_task(drift_service.sweep_in_background, sweep.id)
+    return drift_service.sweep_to_dict(sweep)
 
-    return {
-        "message": f"Drift check complete. {events_created} drift events detected.",
-        "character_id": character_id,
-        "events_created": events_created,
-        "runs_checked": len(runs),
-    }
+
+@router.get("/sweeps/{sweep_id}")
+async def get_sweep(
+    sweep_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Status and counts of an org-wide drift sweep."""
+    sweep = await db.get(DriftSweep, sweep_id)
+    if not sweep or sweep.org_id != user.org_id:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return drift_service.sweep_to_dict(sweep)
 
 
 # ─── List Baselines ──────────────────────────────────────────
@@ -315,6 +140,9 @@ async def list_baselines(
             "std_deviation": b.std_deviation,
             "sample_count": b.sample_count,
             "threshold": b.threshold,
+            "recent_score": b.ewma_score,
+            "detector": b.detector,
+            "drifting": bool(b.drifting),
             "created_at": b.created_at.isoformat() if b.created_at else None,
             "updated_at": b.updated_at.isoformat() if b.updated_at else None,
         }
@@ -442,6 +270,9 @@ async def drift_summary(
             "std_deviation": b.std_deviation,
             "sample_count": b.sample_count,
             "threshold": b.threshold,
+            "recent_score": b.ewma_score,
+            "detector": b.detector,
+            "drifting": bool(b.drifting),
         })
 
     # Group events by character
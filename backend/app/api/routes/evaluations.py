@@ -1,18 +1,24 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import asyncio
+import json
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func
 
 from app.core.auth import get_current_user
 from app.core.rbac import require_editor
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, async_session
 from app.models.core import User, EvalRun, EvalResult, CriticResult
-from app.schemas.evaluations import EvalRequest, EvalRunOut, EvalResultOut, EvalResponse
+from app.schemas.evaluations import (
+    EvalRequest, EvalRunOut, EvalResultOut, EvalResponse, PredictorTrainRequest, DecisionPredictorOut,
+    BatchEvalRequest, BatchEvalResponse,
+)
 from app.services import evaluation_service
 
 router = APIRouter()
@@ -56,6 +62,73 @@ async def run_evaluation(
     return EvalResponse(eval_run=eval_run, result=result_out)
 
 
+@router.post("/batch", response_model=BatchEvalResponse)
+async def run_evaluation_batch(
+    data: BatchEvalRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_editor),
+):
+    """Evaluate many items at once.
+
+    Items sharing a character, modality, territory and profile load their context once
+    and critic calls run with bounded concurrency. With ``stream`` set, outcomes are
+    streamed as NDJSON lines as items complete, followed by a ``summary`` line.
+    """
+    if not data.items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(data.items) > settings.BATCH_EVAL_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_EVAL_MAX_ITEMS} items per batch")
+
+    items = [
+        item if item.profile_id or not data.profile_id else item.model_copy(update={"profile_id": data.profile_id})
+        for item in data.items
+    ]
+    org_id, user_id = user.org_id, user.id
+
+    async def log_batch(session: AsyncSession, summary: dict) -> None:
+        from app.services import audit_service
+        await audit_service.log_action(
+            session, org_id, user_id, "eval.batch", "eval_run", None,
+            detail={k: summary[k] for k in ("total", "completed", "failed", "skipped", "decisions")},
+        )
+
+    if not data.stream:
+        outcomes = await evaluation_service.evaluate_batch(db, items, org_id, data.concurrency)
+        summary = evaluation_service.summarize_batch(outcomes)
+        await log_batch(db, summary)
+        return BatchEvalResponse(**summary, results=outcomes)
+
+    async def stream():
+        # The request's session closes before a streamed body is sent, so use our own
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run():
+            async with async_session() as session:
+                try:
+                    outcomes = await evaluation_service.evaluate_batch(
+                        session, items, org_id, data.concurrency, on_result=queue.put,
+                    )
+                    summary = evaluation_service.summarize_batch(outcomes)
+                    await log_batch(session, summary)
+                    await session.commit()
+                    await queue.put({"summary": summary})
+                except Exception as e:
+                    await session.rollback()
+                    await queue.put({"batch_error": str(e)})
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                message = await queue.get()
+                yield json.dumps(message) + "\n"
+                if "summary" in message or "batch_error" in message:
+                    break
+        finally:
+            await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("", response_model=List[EvalRunOut])
 async def list_eval_runs(
     response: Response,
@@ -81,98 +154,64 @@ async def cost_summary(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Get cost summary for evaluations over the specified number of days."""
-    since = datetime.utcnow() - timedelta(days=days)
-
-    # Total evals in period
-    total_evals_q = select(func.count(EvalRun.id)).where(
-        EvalRun.org_id == user.org_id,
-        EvalRun.created_at >= since,
-    )
-    total_evals = (await db.execute(total_evals_q)).scalar() or 0
-
-    # Token and cost aggregates from critic_results
-    cost_q = select(
-        func.coalesce(func.sum(CriticResult.prompt_tokens), 0).label("total_prompt_tokens"),
-        func.coalesce(func.sum(CriticResult.completion_tokens), 0).label("total_completion_tokens"),
-        func.coalesce(func.sum(CriticResult.estimated_cost), 0.0).label("total_cost"),
-    ).join(
-        EvalResult, CriticResult.eval_result_id == EvalResult.id
-    ).join(
-        EvalRun, EvalResult.eval_run_id == EvalRun.id
-    ).where(
-        EvalRun.org_id == user.org_id,
-        EvalRun.created_at >= since,
-    )
-    cost_row = (await db.execute(cost_q)).one()
-
-    total_prompt_tokens = int(cost_row.total_prompt_tokens)
-    total_completion_tokens = int(cost_row.total_completion_tokens)
-    total_tokens = total_prompt_tokens + total_completion_tokens
-    total_cost = float(cost_row.total_cost)
-    cost_per_eval = round(total_cost / total_evals, 8) if total_evals > 0 else 0.0
-
-    # Breakdown by model
-    model_q = select(
-        CriticResult.model_used,
-        func.count(CriticResult.id).label("count"),
-        func.coalesce(func.sum(CriticResult.prompt_tokens), 0).label("prompt_tokens"),
-        func.coalesce(func.sum(CriticResult.completion_tokens), 0).label("completion_tokens"),
-        func.coalesce(func.sum(CriticResult.estimated_cost), 0.0).label("cost"),
-    ).join(
-        EvalResult, CriticResult.eval_result_id == EvalResult.id
-    ).join(
-        EvalRun, EvalResult.eval_run_id == EvalRun.id
-    ).where(
-        EvalRun.org_id == user.org_id,
-        EvalRun.created_at >= since,
-    ).group_by(CriticResult.model_used)
-    model_rows = (await db.execute(model_q)).all()
-    by_model = [
-        {
-            "model": row.model_used or "unknown",
-            "invocations": row.count,
-            "prompt_tokens": int(row.prompt_tokens),
-            "completion_tokens": int(row.completion_tokens),
-            "cost": float(row.cost),
-        }
-        for row in model_rows
-    ]
+    """Get cost summary for evaluations over the specified number of days.
+
+    Tokens and cost come from the daily cost rollups, so the window is whole days.
+    """
+    from app.services import usage_service
+    return await usage_service.get_cost_summary(db, user.org_id, days)
 
-    # Breakdown by critic
-    critic_q = select(
-        CriticResult.critic_id,
-        func.count(CriticResult.id).label("count"),
-        func.coalesce(func.sum(CriticResult.estimated_cost), 0.0).label("cost"),
-    ).join(
-        EvalResult, CriticResult.eval_result_id == EvalResult.id
-    ).join(
-        EvalRun, EvalResult.eval_run_id == EvalRun.id
-    ).where(
-        EvalRun.org_id == user.org_id,
-        EvalRun.created_at >= since,
-    ).group_by(CriticResult.critic_id)
-    critic_rows = (await db.execute(critic_q)).all()
-    by_critic = [
-        {
-            "critic_id": row.critic_id,
-            "invocations": row.count,
-            "cost": float(row.cost),
-        }
-        for row in critic_rows
-    ]
 
-    return {
-        "days": days,
-        "total_evals": total_evals,
-        "total_tokens": total_tokens,
-        "total_prompt_tokens": total_prompt_tokens,
-        "total_completion_tokens": total_completion_tokens,
-        "total_estimated_cost": round(total_cost, 6),
-        "cost_per_eval": cost_per_eval,
-        "by_model": by_model,
-        "by_critic": by_critic,
-    }
+@router.get("/prescreen-precision")
+async def prescreen_precision(
+    days: int = 30,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """How often local pre-screen verdicts agreed with the LLM critics' decision."""
+    from app.services import prescreen_service
+    return await prescreen_service.get_precision(db, user.org_id, days)
+
+
+@router.post("/predictors", response_model=DecisionPredictorOut, status_code=202)
+async def train_predictor(
+    data: PredictorTrainRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_editor),
+):
+    """Start training a new decision predictor version in the background."""
+    from app.services import decision_predictor_service
+    try:
+        predictor = await decision_predictor_service.create_predictor(
+            db, user.org_id, character_id=data.character_id, franchise_id=data.franchise_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    background_tasks.add_task(decision_predictor_service.train_in_background, predictor.id)
+    return predictor
+
+
+@router.get("/predictors", response_model=List[DecisionPredictorOut])
+async def list_predictors(
+    character_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    from app.services import decision_predictor_service
+    return await decision_predictor_service.list_predictors(db, user.org_id, character_id)
+
+
+@router.get("/predictors/accuracy")
+async def predictor_accuracy(
+    days: int = 30,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Accuracy of predicted decisions on runs that critics still judged (shadow and audit runs)."""
+    from app.services import decision_predictor_service
+    return await decision_predictor_service.get_accuracy(db, user.org_id, days)
 
 
 @router.get("/{run_id}", response_model=EvalResponse)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import csv
 import io
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -21,8 +21,8 @@ from app.models.core import (
     AgentCertification,
     CharacterCard,
     Franchise,
-    FranchiseEvaluationAggregate,
 )
+from app.services import franchise_service
 
 router = APIRouter()
 
@@ -180,7 +180,7 @@ async def export_franchise_health(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    """Export franchise health aggregates as CSV or JSON."""
+    """Export daily franchise health over the last ``days`` as CSV or JSON."""
     # Verify franchise belongs to org
     franchise_result = await db.execute(
         select(Franchise).where(
@@ -192,32 +192,19 @@ async def export_franchise_health(
     if not franchise:
         raise HTTPException(status_code=404, detail="Franchise not found")
 
-    cutoff = datetime.utcnow() - timedelta(days=days)
-    agg_result = await db.execute(
-        select(FranchiseEvaluationAggregate)
-        .where(
-            FranchiseEvaluationAggregate.franchise_id == franchise_id,
-            FranchiseEvaluationAggregate.org_id == user.org_id,
-            FranchiseEvaluationAggregate.period_start >= cutoff,
-        )
-        .order_by(FranchiseEvaluationAggregate.period_start.desc())
-    )
-    aggregates = list(agg_result.scalars().all())
-
     rows = []
-    for agg in aggregates:
+    for day in await franchise_service.daily_health(db, franchise_id, user.org_id, days):
         rows.append({
-            "id": agg.id,
-            "franchise_id": agg.franchise_id,
+            "franchise_id": franchise_id,
             "franchise_name": franchise.name,
-            "period_start": agg.period_start.isoformat() if agg.period_start else "",
-            "period_end": agg.period_end.isoformat() if agg.period_end else "",
-            "total_evals": agg.total_evals,
-            "avg_score": agg.avg_score,
-            "pass_rate": agg.pass_rate,
-            "cross_character_consistency": agg.cross_character_consistency,
-            "world_building_consistency": agg.world_building_consistency,
-            "health_score": agg.health_score,
+            "period_start": day["period_start"].isoformat(),
+            "period_end": day["period_end"].isoformat(),
+            "total_evals": day["total_evals"],
+            "avg_score": day["avg_score"],
+            "pass_rate": day["pass_rate"],
+            "cross_character_consistency": day["cross_character_consistency"],
+            "world_building_consistency": day["world_building_consistency"],
+            "health_score": day["health_score"],
         })
 
     if format == "json":
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
@@ -68,3 +68,18 @@ async def get_franchise_health(
     if not health:
         raise HTTPException(status_code=404, detail="Franchise not found")
     return health
+
+
+@router.post("/{franchise_id}/rollups/backfill", status_code=202)
+async def backfill_rollups(
+    franchise_id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_editor),
+):
+    """Rebuild the franchise's health rollups from all its completed runs in the background."""
+    franchise = await franchise_service.get_franchise(db, franchise_id, user.org_id)
+    if not franchise:
+        raise HTTPException(status_code=404, detail="Franchise not found")
+    background_tasks.add_task(franchise_service.backfill_in_background, user.org_id, franchise_id)
+    return {"franchise_id": franchise_id, "status": "scheduled"}
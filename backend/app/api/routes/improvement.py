@@ -17,10 +17,11 @@ router = APIRouter()
 @router.post("/detect-patterns", response_model=List[FailurePatternOut])
 async def detect_patterns(
     character_id: Optional[int] = None,
+    incremental: bool = False,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    return await improvement_service.detect_failure_patterns(db, user.org_id, character_id)
+    return await improvement_service.detect_failure_patterns(db, user.org_id, character_id, incremental)
 
 
 @router.get("/patterns", response_model=List[FailurePatternOut])
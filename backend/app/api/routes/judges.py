@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import time
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,7 +12,7 @@ from app.core.rbac import require_admin
 from app.core.database import get_db
 from app.models.core import User
 from app.schemas.judges import JudgeCreate, JudgeUpdate, JudgeOut, JudgeTestRequest, JudgeTestResponse
-from app.services import judge_registry_service
+from app.services import judge_registry_service, model_routing_service, critic_service
 
 router = APIRouter()
 
@@ -36,6 +36,31 @@ async def list_judges(
     return await judge_registry_service.list_judges(db, user.org_id)
 
 
+@router.get("/routing/stats")
+async def routing_stats(
+    profile_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Rolling per-model routing stats: p50/p95 latency, error rate, cost per call, agreement.
+
+    Agreement is measured against the profile's reference judge (or the platform default).
+    """
+    profile = None
+    if profile_id:
+        profile = await critic_service.get_profile(db, profile_id)
+        if not profile or profile.org_id != user.org_id:
+            raise HTTPException(status_code=404, detail="Profile not found")
+    await model_routing_service.warm_start(db, user.org_id)
+    judges = await judge_registry_service.list_judges(db, user.org_id)
+    reference = model_routing_service.reference_route(profile, judges)
+    return {
+        "reference": reference,
+        "policy": profile.routing_policy if profile else None,
+        "routes": model_routing_service.list_route_stats(user.org_id, reference, judges),
+    }
+
+
 @router.get("/{judge_id}", response_model=JudgeOut)
 async def get_judge(
     judge_id: int,
@@ -1,17 +1,21 @@
 """Red-teaming / adversarial probing routes."""
 from __future__ import annotations
 
+import asyncio
+import json
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, async_session
 from app.core.rbac import require_editor
 from app.models.core import User, RedTeamSession, CharacterCard
-from app.services import red_team_service
+from app.services import red_team_service, probe_corpus_service, character_service
 
 router = APIRouter()
 
@@ -26,7 +30,10 @@ class RedTeamSessionCreate(BaseModel):
         "boundary_test",
         "context_manipulation",
     ]
-    probes_per_category: int = 5
+    probes_per_category: int = 5  # adaptive: the per-category average the whole budget allows
+    allocation: str = "fixed"  # fixed, adaptive
+    target_half_width: Optional[float] = None
+    replay_session_id: Optional[int] = None  # re-run this earlier session's exact probes
 
 
 # ─── Create Session ──────────────────────────────────────────
@@ -55,12 +62,21 @@ async def create_session(
     for cat in body.attack_categories:
         if cat not in valid_categories:
             raise HTTPException(status_code=400, detail=f"Invalid attack category: {cat}")
+    if body.allocation not in red_team_service.ALLOCATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid allocation: {body.allocation}")
+    if body.replay_session_id:
+        replayed = await red_team_service.get_session(db, body.replay_session_id, user.org_id)
+        if not replayed or replayed.character_id != body.character_id:
+            raise HTTPException(status_code=404, detail="Replayed session not found for this character")
 
     session = RedTeamSession(
         name=body.name,
         character_id=body.character_id,
         attack_categories=body.attack_categories,
         probes_per_category=body.probes_per_category,
+        allocation=body.allocation,
+        target_half_width=body.target_half_width,
+        replay_of=body.replay_session_id,
         org_id=user.org_id,
     )
     db.add(session)
@@ -92,6 +108,26 @@ async def list_sessions(
     ]
 
 
+# ─── Probe Corpus ────────────────────────────────────────────
+
+@router.get("/corpus")
+async def list_corpus(
+    character_id: int,
+    card_version_id: Optional[int] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Stored adversarial probes of a character (default: its active card version) with their outcomes."""
+    if card_version_id is None:
+        card_version = await character_service.get_active_version(db, character_id, user.org_id)
+        if not card_version:
+            raise HTTPException(status_code=404, detail="No active card version for this character")
+        card_version_id = card_version.id
+    probes = await probe_corpus_service.load_corpus(db, user.org_id, character_id, card_version_id, category)
+    return [probe_corpus_service.probe_to_dict(p) for p in probes]
+
+
 # ─── Get Session ─────────────────────────────────────────────
 
 @router.get("/{session_id}")
@@ -113,7 +149,61 @@ async def get_session(
     character = char_result.scalar_one_or_none()
     char_name = character.name if character else f"Character #{session.character_id}"
 
-    return _session_to_dict(session, char_name)
+    probes = await red_team_service.list_probes(db, session.id)
+    return _session_to_dict(session, char_name, probes)
+
+
+# ─── Progress ────────────────────────────────────────────────
+
+@router.get("/{session_id}/progress")
+async def get_progress(
+    session_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Probes completed so far and the partial resilience score of a session."""
+    session = await red_team_service.get_session(db, session_id, user.org_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Red team session not found")
+    return await red_team_service.get_progress(db, session)
+
+
+@router.get("/{session_id}/events")
+async def stream_events(
+    session_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Server-sent events for a session: a ``probe`` event per newly stored probe and a
+    ``progress`` event per poll, ending with ``done`` once the session is no longer running.
+    """
+    session = await red_team_service.get_session(db, session_id, user.org_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Red team session not found")
+    org_id = user.org_id
+
+    def event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def stream():
+        # The request's session closes before a streamed body is sent, so use our own
+        last_id = 0
+        while True:
+            async with async_session() as db:
+                current = await red_team_service.get_session(db, session_id, org_id)
+                if not current:
+                    return
+                for probe in await red_team_service.list_probes(db, session_id, after_id=last_id):
+                    last_id = probe.id
+                    yield event("probe", red_team_service.probe_to_dict(probe))
+                progress = await red_team_service.get_progress(db, current)
+            yield event("progress", progress)
+            if progress["status"] != "running":
+                yield event("done", progress)
+                return
+            await asyncio.sleep(settings.RED_TEAM_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
 
 
 # ─── Run Session ─────────────────────────────────────────────
@@ -121,10 +211,17 @@ async def get_session(
 @router.post("/{session_id}/run")
 async def run_session(
     session_id: int,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    concurrency: Optional[int] = Query(None, ge=1, le=settings.BATCH_EVAL_MAX_CONCURRENCY),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_editor),
 ):
-    """Execute a red team session — generates adversarial prompts and evaluates them."""
+    """Execute a red team session — generates adversarial prompts and evaluates them.
+
+    With ``background`` set the run continues after the response; follow it through
+    ``/progress`` or the ``/events`` stream.
+    """
     session = await red_team_service.get_session(db, session_id, user.org_id)
     if not session:
         raise HTTPException(status_code=404, detail="Red team session not found")
@@ -133,7 +230,11 @@ async def run_session(
         raise HTTPException(status_code=400, detail="Session is already running")
 
     try:
-        session = await red_team_service.run_red_team_session(db, session_id, user.org_id)
+        if background:
+            session = await red_team_service.start_session(db, session_id, user.org_id)
+            background_tasks.add_task(red_team_service.run_in_background, session_id, user.org_id, concurrency)
+        else:
+            session = await red_team_service.run_red_team_session(db, session_id, user.org_id, concurrency=concurrency)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -148,10 +249,11 @@ async def run_session(
     character = char_result.scalar_one_or_none()
     char_name = character.name if character else f"Character #{session.character_id}"
 
-    return _session_to_dict(session, char_name)
+    probes = await red_team_service.list_probes(db, session.id)
+    return _session_to_dict(session, char_name, probes)
 
 
-def _session_to_dict(session: RedTeamSession, character_name: str) -> dict:
+def _session_to_dict(session: RedTeamSession, character_name: str, probes: Optional[list] = None) -> dict:
     """Convert a RedTeamSession to a dict for API response."""
     return {
         "id": session.id,
@@ -164,7 +266,12 @@ def _session_to_dict(session: RedTeamSession, character_name: str) -> dict:
         "successful_attacks": session.successful_attacks,
         "resilience_score": session.resilience_score,
         "probes_per_category": session.probes_per_category,
-        "results": session.results or [],
+        "planned_probes": session.planned_probes or 0,
+        "allocation": session.allocation or "fixed",
+        "allocation_summary": session.allocation_summary,
+        "replay_of": session.replay_of,
+        # Probe rows; sessions run before they existed (or that failed) keep a JSON blob
+        "results": [red_team_service.probe_to_dict(p) for p in probes] if probes else session.results or [],
         "created_at": session.created_at.isoformat() if session.created_at else None,
         "completed_at": session.completed_at.isoformat() if session.completed_at else None,
     }
@@ -1058,6 +1058,11 @@ async def seed_database(secret: str, db: AsyncSession = Depends(get_db)):
 
     await db.flush()
 
+    # ── Rollups of the seeded history ────────────────────────────────
+    from app.services import franchise_service, usage_service
+    await franchise_service.backfill_rollups(db, org_id, franchise_id)
+    await usage_service.rebuild_cost_rollups(db, org_id)
+
     # ── Summary ──────────────────────────────────────────────────────
     summary["status"] = "success"
     summary["seeded_at"] = now.isoformat()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import uuid
+from datetime import datetime
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -8,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_user
 from app.core.rbac import require_editor
 from app.core.database import get_db
-from app.models.core import User
+from app.models.core import User, CIBatchRun
 from app.schemas.test_suites import TestSuiteCreate, TestSuiteUpdate, TestSuiteOut, TestCaseCreate, TestCaseUpdate, TestCaseOut
 from app.services import test_suite_service
 
@@ -110,12 +112,17 @@ async def delete_test_case(
 @router.post("/{suite_id}/run")
 async def run_test_suite(
     suite_id: int,
+    incremental: bool = True,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_editor),
 ):
-    """Execute all test cases in a suite through the evaluation pipeline."""
+    """Execute all test cases in a suite through the evaluation pipeline.
+
+    With ``incremental`` (default), cases whose fingerprint is unchanged since the
+    suite's last green run reuse that result; only changed cases are evaluated.
+    """
     from app.schemas.evaluations import EvalRequest
-    from app.services import evaluation_service
+    from app.services import incremental_ci_service
 
     suite = await test_suite_service.get_suite(db, suite_id, user.org_id)
     if not suite:
@@ -125,52 +132,82 @@ async def run_test_suite(
     if not test_cases:
         raise HTTPException(status_code=400, detail="Test suite has no test cases")
 
-    results = []
-    scores = []
-    for tc in test_cases:
-        content = tc.input_content.get("content", tc.input_content.get("prompt", ""))
-        modality = tc.input_content.get("modality", "text")
-        eval_req = EvalRequest(
+    eval_requests = [
+        EvalRequest(
             character_id=suite.character_id,
-            content=content,
-            modality=modality,
+            content=tc.input_content.get("content", tc.input_content.get("prompt", "")),
+            modality=tc.input_content.get("modality", "text"),
         )
-        try:
-            run = await evaluation_service.evaluate(db, eval_req, user.org_id)
-            score = run.overall_score or 0.0
+        for tc in test_cases
+    ]
+    outcomes, _ = await incremental_ci_service.run_incremental(
+        db, eval_requests, user.org_id, test_suite_id=suite.id, incremental=incremental,
+    )
+
+    results = []
+    scores = []
+    for tc, outcome in zip(test_cases, outcomes):
+        if outcome["status"] == "completed":
+            score = outcome["overall_score"] or 0.0
             scores.append(score)
             results.append({
                 "test_case_id": tc.id,
                 "test_case_name": tc.name,
                 "score": score,
-                "decision": run.decision,
+                "decision": outcome["decision"],
                 "passed": score >= suite.passing_threshold,
-                "eval_run_id": run.id,
+                "eval_run_id": outcome["eval_run_id"],
+                "reused": outcome["reused"],
+                "fingerprint": outcome["fingerprint"],
             })
-        except Exception as e:
+        else:
             scores.append(0.0)
             results.append({
                 "test_case_id": tc.id,
                 "test_case_name": tc.name,
                 "score": 0.0,
                 "decision": "error",
-                "error": str(e),
+                "error": outcome["error"] or "Evaluation failed",
                 "passed": False,
             })
 
     avg_score = sum(scores) / len(scores) if scores else 0.0
     passed_count = sum(1 for r in results if r.get("passed"))
+    reused_count = sum(1 for r in results if r.get("reused"))
+    overall_passed = avg_score >= suite.passing_threshold
+
+    # Recorded like CI batches so the next incremental run can reuse green results
+    run = CIBatchRun(
+        batch_id=str(uuid.uuid4())[:12],
+        test_suite_id=suite.id,
+        status="completed",
+        total=len(test_cases),
+        passed=passed_count,
+        failed=len(test_cases) - passed_count,
+        reused=reused_count,
+        evaluated=len(test_cases) - reused_count,
+        pass_rate=round(passed_count / len(test_cases), 4),
+        overall_passed=overall_passed,
+        results=results,
+        org_id=user.org_id,
+        completed_at=datetime.utcnow(),
+    )
+    db.add(run)
+    await db.flush()
 
     return {
         "suite_id": suite.id,
         "suite_name": suite.name,
         "character_id": suite.character_id,
+        "batch_id": run.batch_id,
         "total_cases": len(test_cases),
         "passed_cases": passed_count,
         "failed_cases": len(test_cases) - passed_count,
+        "reused_cases": reused_count,
+        "evaluated_cases": len(test_cases) - reused_count,
         "avg_score": round(avg_score, 4),
         "pass_rate": round(passed_count / len(test_cases), 4) if test_cases else 0,
         "threshold": suite.passing_threshold,
-        "overall_passed": avg_score >= suite.passing_threshold,
+        "overall_passed": overall_passed,
         "case_results": results,
     }
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     PRIMARY_LLM: str = "openai"  # openai or anthropic
+    LLM_MAX_CONCURRENCY: int = 32  # provider requests in flight at once, per process
 
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
 
@@ -31,6 +32,87 @@ class Settings(BaseSettings):
     RAPID_SCREEN_THRESHOLD: float = 0.7
     DEEP_EVAL_THRESHOLD: float = 0.9
 
+    # Adaptive multi-judge: escalate to a second judge when the first is unsure
+    ADAPTIVE_JUDGE_CONFIDENCE_THRESHOLD: float = 0.7
+    ADAPTIVE_JUDGE_BOUNDARY_MARGIN: float = 0.05
+
+    # Per-critic model routing (see model_routing_service)
+    ROUTING_REFERENCE_MODEL: str = "gpt-4o-mini"
+    ROUTING_WINDOW_SIZE: int = 200  # rolling calls kept per route
+    ROUTING_MIN_SAMPLES: int = 20  # calls/agreements before a route's stats are trusted
+    ROUTING_MAX_ERROR_RATE: float = 0.1
+    ROUTING_MIN_AGREEMENT: float = 0.85
+    ROUTING_EXPLORATION_RATE: float = 0.05  # share of calls sent to routes still being measured
+
+    # Local decision predictor (see decision_predictor_service)
+    PREDICTOR_N_FEATURES: int = 2 ** 14  # hashed n-gram buckets
+    PREDICTOR_MIN_SAMPLES: int = 200
+    PREDICTOR_MAX_SAMPLES: int = 20000
+    PREDICTOR_TARGET_PRECISION: float = 0.98  # holdout precision required to skip critics
+    PREDICTOR_AUDIT_RATE: float = 0.05  # share of skippable evals still fully evaluated
+
+    # Near-duplicate reuse (see near_duplicate_service)
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9  # estimated Jaccard similarity of character 5-grams
+    NEAR_DUPLICATE_MAX_EVALS: int = 5000  # most recent judged runs indexed per character
+
+    # Batch evaluation (POST /api/evaluations/batch)
+    BATCH_EVAL_MAX_ITEMS: int = 5000
+    BATCH_EVAL_CONCURRENCY: int = 16  # eval runs whose critics are in flight at once
+    BATCH_EVAL_MAX_CONCURRENCY: int = 64  # upper bound on a request's own concurrency
+    BATCH_EVAL_COMMIT_EVERY: int = 100
+
+    # CI batch runs (POST /api/ci/batch)
+    CI_BATCH_CONCURRENCY: int = 8
+
+    # Comparisons (POST /api/compare/head-to-head, /api/compare/versions)
+    COMPARE_MAX_SIDES: int = 10  # characters or versions compared in one request
+    COMPARE_HISTORY_RETENTION_DAYS: int = 90  # org setting "compare_history_retention_days" overrides
+    COMPARE_HISTORY_MAX_ENTRIES: int = 1000  # per org; org setting "compare_history_max_entries" overrides
+
+    # Drift detection (see drift_service)
+    DRIFT_THRESHOLD: float = 2.0  # standard deviations the recent mean may move from the baseline
+    DRIFT_EWMA_ALPHA: float = 0.18  # weight of the newest score in the recent mean (~10-run window)
+    DRIFT_MIN_SAMPLES: int = 10  # scores in a baseline before it can raise drift
+    DRIFT_MIN_STD: float = 0.05  # floor on the baseline standard deviation
+    DRIFT_BASELINE_RUNS: int = 50  # most recent runs a recomputed baseline is built from
+    DRIFT_SWEEP_RECENT_RUNS: int = 10  # most recent runs per character an org-wide sweep averages
+    DRIFT_DETECTOR: str = "ewma"  # change-point detector of new baselines: ewma, cusum, page_hinkley
+    DRIFT_CUSUM_K: float = 0.5  # CUSUM allowance, in baseline standard deviations
+    DRIFT_CUSUM_H: float = 5.0  # CUSUM decision interval
+    DRIFT_PH_DELTA: float = 0.25  # Page-Hinkley tolerance, in baseline standard deviations
+    DRIFT_PH_LAMBDA: float = 5.0  # Page-Hinkley alarm threshold
+
+    # Failure patterns (see improvement_service)
+    FAILURE_PATTERN_WINDOW_RUNS: int = 100  # most recent runs a full detection counts
+    FAILURE_PATTERN_MIN_COUNT: int = 3  # occurrences before a pattern is recorded
+    FAILURE_PATTERN_LOW_SCORE: float = 0.5  # critic scores below this count as low
+    TRAJECTORY_POINT_BUDGET: int = 200  # points kept per trajectory (LTTB downsampling)
+    TRAJECTORY_TREND_MARGIN: float = 0.05  # fitted change in score over the range that counts as a trend
+
+    # Red team sessions (see red_team_service)
+    RED_TEAM_CONCURRENCY: int = 8  # probes evaluated at once
+    RED_TEAM_EVENTS_POLL_SECONDS: float = 1.0  # progress poll interval of the SSE stream
+    RED_TEAM_ADAPTIVE_INITIAL: int = 2  # adaptive: probes per category before reallocating
+    RED_TEAM_ADAPTIVE_ROUND: int = 8  # adaptive: probes allocated per round
+    RED_TEAM_TARGET_HALF_WIDTH: float = 0.1  # adaptive: 95% CI half-width of resilience to stop at
+    PROBE_CORPUS_NEAR_DUP_THRESHOLD: float = 0.8  # estimated Jaccard above which a new probe is a duplicate
+
+    # Test case generation (see test_gen_service)
+    TEST_GEN_NEAR_DUP_THRESHOLD: float = 0.8  # estimated Jaccard above which a generated case is a duplicate
+
+    # A/B experiments (see ab_testing_service, ab_replay_service)
+    AB_REPLAY_MAX_RUNS: int = 50000  # most recent eval runs re-aggregated by an offline replay
+    AB_SEQUENTIAL_ALPHA: float = 0.05  # default error rate of sequential experiments
+    AB_SEQUENTIAL_MIN_TRIALS: int = 10  # per variant before the mSPRT may stop an experiment
+    AB_MSPRT_TAU: float = 0.1  # std of the mSPRT's normal mixture over the mean score difference
+    AB_RESULTS_TRIAL_LIMIT: int = 50  # most recent trials listed with experiment results
+
+    # Agent certification (see certification_service)
+    CERTIFICATION_CONCURRENCY: int = 8
+    CERTIFICATION_ALPHA: float = 0.05  # error rate allowed to sequential early stopping
+    CERTIFICATION_MIN_CASES: int = 10  # evaluated before a statistical rule may stop
+    CERTIFICATION_SPRT_INDIFFERENCE: float = 0.05  # SPRT tests threshold ± this
+
     # V3: SaaS settings
     ALLOW_PUBLIC_REGISTRATION: bool = True  # Set to false in prod
     FRONTEND_URL: str = "http://localhost:5173"
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import os
 
+from sqlalchemy import Integer, cast, extract, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
@@ -40,6 +42,20 @@ class Base(DeclarativeBase):
     pass
 
 
+def epoch_seconds(db: AsyncSession, column):
+    """SQL expression for a DateTime column as integer Unix seconds, on SQLite or PostgreSQL."""
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(extract("epoch", column), Integer)
+
+
+def upsert(db: AsyncSession, table):
+    """``INSERT`` supporting ``on_conflict_do_update`` for the session's dialect."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
 async def get_db() -> AsyncSession:
     async with async_session() as session:
         try:
@@ -481,6 +497,88 @@ async def init_db():
                 except Exception:
                     pass
 
+    # ─── V5: Adaptive multi-judge, model routing, pre-screen, predictor & near-duplicate columns
+    async with engine.begin() as conn:
+        adaptive_cols = [
+            ("evaluation_profiles", "judge_mode", "VARCHAR(50) DEFAULT 'single'"),
+            ("evaluation_profiles", "judge_confidence_threshold", "FLOAT"),
+            ("evaluation_profiles", "judge_boundary_margin", "FLOAT"),
+            ("evaluation_profiles", "escalation_judge_id", "INTEGER"),
+            ("evaluation_profiles", "routing_policy", "VARCHAR(50)"),
+            ("evaluation_profiles", "routing_pinned_model", "VARCHAR(255)"),
+            ("evaluation_profiles", "routing_reference_model", "VARCHAR(255)"),
+            ("evaluation_profiles", "routing_min_agreement", "FLOAT"),
+            ("evaluation_profiles", "prescreen_mode", "VARCHAR(50)"),
+            ("evaluation_profiles", "predictor_mode", "VARCHAR(50)"),
+            ("evaluation_profiles", "predictor_audit_rate", "FLOAT"),
+            ("evaluation_profiles", "near_duplicate_mode", "VARCHAR(50)"),
+            ("evaluation_profiles", "near_duplicate_threshold", "FLOAT"),
+            ("eval_runs", "prescreen_action", "VARCHAR(50)"),
+            ("eval_runs", "prescreen_matches", "JSON" if is_postgres else "TEXT"),
+            ("eval_runs", "predicted_decision", "VARCHAR(50)"),
+            ("eval_runs", "predicted_confidence", "FLOAT"),
+            ("eval_runs", "duplicate_of", "VARCHAR(100)"),
+            ("eval_runs", "duplicate_similarity", "FLOAT"),
+            ("ci_batch_runs", "reused", "INTEGER DEFAULT 0"),
+            ("ci_batch_runs", "evaluated", "INTEGER DEFAULT 0"),
+            ("red_team_sessions", "planned_probes", "INTEGER DEFAULT 0"),
+            ("red_team_sessions", "allocation", "VARCHAR(50) DEFAULT 'fixed'"),
+            ("red_team_sessions", "target_half_width", "FLOAT"),
+            ("red_team_sessions", "allocation_summary", "JSON" if is_postgres else "TEXT"),
+            ("red_team_sessions", "replay_of", "INTEGER"),
+            ("red_team_probes", "corpus_probe_id", "INTEGER"),
+            ("drift_baselines", "m2", "FLOAT"),
+            ("drift_baselines", "ewma_score", "FLOAT"),
+            ("drift_baselines", "ewma_variance", "FLOAT"),
+            ("drift_baselines", "drifting", "BOOLEAN DEFAULT FALSE" if is_postgres else "BOOLEAN DEFAULT 0"),
+            ("drift_baselines", "last_eval_run_id", "INTEGER"),
+            ("drift_baselines", "detector", "VARCHAR(50)"),
+            ("drift_baselines", "detector_state", "JSON" if is_postgres else "TEXT"),
+            ("failure_patterns", "pattern_key", "VARCHAR(255)"),
+            ("ab_experiments", "sequential", "BOOLEAN DEFAULT FALSE" if is_postgres else "BOOLEAN DEFAULT 0"),
+            ("ab_experiments", "alpha", "FLOAT"),
+            ("ab_experiments", "sequential_p_value", "FLOAT"),
+            ("ab_experiments", "stopped_early", "BOOLEAN DEFAULT FALSE" if is_postgres else "BOOLEAN DEFAULT 0"),
+            ("usage_records", "adaptive_eval_count", "INTEGER DEFAULT 0"),
+            ("usage_records", "escalated_eval_count", "INTEGER DEFAULT 0"),
+            ("usage_records", "judge_cost_saved", "FLOAT DEFAULT 0"),
+        ]
+        for table_name, col_name, col_type in adaptive_cols:
+            if is_postgres:
+                try:
+                    await conn.execute(text(
+                        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {col_name} {col_type}"
+                    ))
+                except Exception:
+                    pass
+            else:
+                try:
+                    await conn.execute(text(
+                        f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}"
+                    ))
+                except Exception:
+                    pass
+
+    # ─── V5: Failure patterns are upserted on (org, character, pattern_key) ───
+    async with engine.begin() as conn:
+        try:
+            # Keep the newest of any duplicates so the unique indexes can be built
+            await conn.execute(text(
+                "DELETE FROM failure_patterns WHERE pattern_key IS NOT NULL AND id NOT IN ("
+                "SELECT MAX(id) FROM failure_patterns WHERE pattern_key IS NOT NULL "
+                "GROUP BY org_id, character_id, pattern_key)"
+            ))
+            await conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_failure_pattern_key "
+                "ON failure_patterns (org_id, character_id, pattern_key)"
+            ))
+            await conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_failure_pattern_org_key "
+                "ON failure_patterns (org_id, pattern_key) WHERE character_id IS NULL"
+            ))
+        except Exception:
+            pass
+
     # ─── V3: Bootstrap super-admin flag ────────────────────────────
     async with engine.begin() as conn:
         try:
@@ -9,6 +9,16 @@ import httpx
 
 from app.core.config import settings
 
+# Bounds provider requests in flight across the whole process (created on first use)
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _llm_slot() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
 
 async def call_llm(
     system_prompt: str,
@@ -57,7 +67,7 @@ async def _call_openai(
     if response_format == "json":
         body["response_format"] = {"type": "json_object"}
 
-    async with httpx.AsyncClient(timeout=60) as client:
+    async with _llm_slot(), httpx.AsyncClient(timeout=60) as client:
         resp = await client.post("https://api.openai.com/v1/chat/completions", headers=headers, json=body)
         resp.raise_for_status()
         data = resp.json()
@@ -93,7 +103,7 @@ async def _call_anthropic(
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
-    async with httpx.AsyncClient(timeout=60) as client:
+    async with _llm_slot(), httpx.AsyncClient(timeout=60) as client:
         resp = await client.post("https://api.anthropic.com/v1/messages", headers=headers, json=body)
         resp.raise_for_status()
         data = resp.json()
@@ -123,6 +133,28 @@ async def call_llm_json(system_prompt: str, user_prompt: str, **kwargs) -> dict:
     return json.loads(raw)
 
 
+async def call_provider_json(
+    provider: str,
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0.0,
+    max_tokens: int = 2048,
+) -> Tuple[dict, dict]:
+    """Call one specific provider (no fallback) and return (parsed_json, token_usage).
+
+    Used when the caller has already decided which judge to ask, e.g. the second
+    opinion in adaptive multi-judge mode.
+    """
+    if provider == "anthropic":
+        raw, token_usage = await _call_anthropic(system_prompt, user_prompt, temperature, max_tokens, _return_usage=True)
+    elif provider == "openai":
+        raw, token_usage = await _call_openai(system_prompt, user_prompt, model, temperature, max_tokens, "json", _return_usage=True)
+    else:
+        raise ValueError(f"Unsupported provider: {provider}")
+    return json.loads(raw), token_usage
+
+
 async def call_both_llms_json(
     system_prompt: str,
     user_prompt: str,
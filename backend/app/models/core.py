@@ -11,11 +11,14 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 
@@ -149,12 +152,33 @@ class UsageRecord(Base):
     api_call_count = Column(Integer, default=0)
     llm_tokens_used = Column(Integer, default=0)
     estimated_cost = Column(Float, default=0.0)
+    adaptive_eval_count = Column(Integer, default=0)  # evals judged in adaptive multi-judge mode
+    escalated_eval_count = Column(Integer, default=0)  # ...of which at least one critic escalated to a second judge
+    judge_cost_saved = Column(Float, default=0.0)  # estimated USD not spent on skipped second-judge calls
     created_at = Column(DateTime, default=utcnow)
     updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
     __table_args__ = (UniqueConstraint("org_id", "period", name="uq_usage_org_period"),)
 
 
+class CostRollup(Base):
+    """Critic invocations, tokens and cost of one org per day, model and critic."""
+    __tablename__ = "cost_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    day = Column(DateTime, nullable=False)  # midnight UTC of the eval run's creation
+    model = Column(String(255), nullable=False)  # "unknown" when the critic result has none
+    critic_id = Column(Integer, ForeignKey("critics.id"), nullable=False)
+    invocations = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+    __table_args__ = (UniqueConstraint("org_id", "day", "model", "critic_id", name="uq_cost_rollups_bucket"),)
+
+
 # ─── Franchise ──────────────────────────────────────────────────
 
 class Franchise(Base):
@@ -282,6 +306,19 @@ class EvaluationProfile(Base):
     tiered_evaluation = Column(Boolean, default=False)
     rapid_screen_critics = Column(JSON, default=list)
     deep_eval_critics = Column(JSON, default=list)
+    judge_mode = Column(String(50), default="single")  # single, multi, adaptive
+    judge_confidence_threshold = Column(Float, nullable=True)  # adaptive: escalate below this confidence
+    judge_boundary_margin = Column(Float, nullable=True)  # adaptive: escalate within this distance of a decision boundary
+    escalation_judge_id = Column(Integer, ForeignKey("custom_judges.id"), nullable=True)  # adaptive: second judge (default: other provider)
+    routing_policy = Column(String(50), nullable=True)  # cheapest_within_quality, fastest, pinned; null = default provider chain
+    routing_pinned_model = Column(String(255), nullable=True)  # route key, e.g. "gpt-4o-mini" or "judge:3"
+    routing_reference_model = Column(String(255), nullable=True)  # route key agreement is measured against
+    routing_min_agreement = Column(Float, nullable=True)
+    prescreen_mode = Column(String(50), nullable=True)  # shadow, tag, enforce; null = off
+    predictor_mode = Column(String(50), nullable=True)  # shadow, skip; null = off
+    predictor_audit_rate = Column(Float, nullable=True)  # share of skippable evals still sent to critics
+    near_duplicate_mode = Column(String(50), nullable=True)  # reuse, seed; null = off
+    near_duplicate_threshold = Column(Float, nullable=True)  # minimum Jaccard similarity to a judged item
     created_at = Column(DateTime, default=utcnow)
 
     __table_args__ = (UniqueConstraint("slug", "org_id", name="uq_profile_slug_org"),)
@@ -338,6 +375,31 @@ class AgentCertification(Base):
     character = relationship("CharacterCard", back_populates="certifications")
 
 
+class CIBatchRun(Base):
+    """A CI/CD batch evaluation run and its per-case results."""
+    __tablename__ = "ci_batch_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(50), nullable=False, unique=True, index=True)
+    test_suite_id = Column(Integer, ForeignKey("test_suites.id"), nullable=True)
+    profile_id = Column(Integer, ForeignKey("evaluation_profiles.id"), nullable=True)
+    agent_id = Column(String(255), nullable=True)
+    status = Column(String(50), default="running")  # running, completed, failed_fast, error
+    total = Column(Integer, default=0)
+    passed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)  # not run after fail-fast
+    reused = Column(Integer, default=0)  # taken from the last green run (unchanged fingerprint)
+    evaluated = Column(Integer, default=0)
+    min_pass_rate = Column(Float, default=1.0)
+    pass_rate = Column(Float, nullable=True)
+    overall_passed = Column(Boolean, nullable=True)
+    results = Column(JSON, default=list)  # CIBatchCaseResult dicts
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
 # ─── Evaluation Runs & Results ──────────────────────────────────
 
 class EvalRun(Base):
@@ -358,6 +420,12 @@ class EvalRun(Base):
     overall_score = Column(Float, nullable=True)
     decision = Column(String(50), nullable=True)  # pass, regenerate, quarantine, escalate, block
     consent_verified = Column(Boolean, default=True)
+    prescreen_action = Column(String(50), nullable=True)  # local pre-screen verdict: block, escalate, tag
+    prescreen_matches = Column(JSON, nullable=True)  # [{term, source, topic, action}]
+    predicted_decision = Column(String(50), nullable=True)  # local decision predictor's verdict
+    predicted_confidence = Column(Float, nullable=True)
+    duplicate_of = Column(String(100), nullable=True)  # near-duplicate source: "eval:<id>" or "exemplar:<id>"
+    duplicate_similarity = Column(Float, nullable=True)
     c2pa_metadata = Column(JSON, default=dict)
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_at = Column(DateTime, default=utcnow)
@@ -406,6 +474,28 @@ class CriticResult(Base):
     eval_result = relationship("EvalResult", back_populates="critic_results")
 
 
+class DecisionPredictor(Base):
+    """Versioned local classifier predicting eval decisions for a character or franchise."""
+    __tablename__ = "decision_predictors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=True)
+    franchise_id = Column(Integer, ForeignKey("franchises.id"), nullable=True)  # set for franchise-wide predictors
+    version = Column(Integer, nullable=False, default=1)
+    status = Column(String(50), default="training")  # training, ready, failed, retired
+    classes = Column(JSON, default=list)  # decision labels, in weight-column order
+    class_scores = Column(JSON, default=dict)  # {decision: mean overall_score} used for skipped evals
+    n_features = Column(Integer, nullable=False)
+    confidence_threshold = Column(Float, nullable=True)  # calibrated on holdout; null = never skip
+    training_samples = Column(Integer, default=0)
+    metrics = Column(JSON, default=dict)  # holdout accuracy, precision at threshold, coverage
+    artifact = Column(LargeBinary, nullable=True)  # np.savez weights, loaded lazily
+    error = Column(Text, nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+    trained_at = Column(DateTime, nullable=True)
+
+
 # ─── Consent Verification ──────────────────────────────────────
 
 class ConsentVerification(Base):
@@ -451,6 +541,15 @@ class ExemplarContent(Base):
 
 class FailurePattern(Base):
     __tablename__ = "failure_patterns"
+    # Unique indexes rather than constraints so init_db can add them to existing tables.
+    # NULLs never conflict, so org-wide patterns (no character) get their own partial index.
+    __table_args__ = (
+        Index("uq_failure_pattern_key", "org_id", "character_id", "pattern_key", unique=True),
+        Index(
+            "uq_failure_pattern_org_key", "org_id", "pattern_key", unique=True,
+            sqlite_where=text("character_id IS NULL"), postgresql_where=text("character_id IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=True)
@@ -462,6 +561,23 @@ class FailurePattern(Base):
     severity = Column(String(50), default="medium")  # low, medium, high, critical
     suggested_fix = Column(Text)
     status = Column(String(50), default="open")  # open, acknowledged, resolved
+    pattern_key = Column(String(255), nullable=True)  # "<pattern_type>:<decision or critic id>", upsert key
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+class FailurePatternScan(Base):
+    """Watermark and running counts of pattern detection for an org or one character."""
+    __tablename__ = "failure_pattern_scans"
+    __table_args__ = (Index("ix_failure_pattern_scans_scope", "org_id", "character_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=True)  # None: whole org
+    counts = Column(JSON, default=dict)  # {pattern_key: occurrences}
+    runs_scanned = Column(Integer, default=0)
+    last_completed_at = Column(DateTime, nullable=True)  # watermark: newest run counted
+    last_eval_run_id = Column(Integer, nullable=True)
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_at = Column(DateTime, default=utcnow)
     updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
@@ -503,6 +619,28 @@ class FranchiseEvaluationAggregate(Base):
     franchise = relationship("Franchise", back_populates="evaluation_aggregates")
 
 
+class FranchiseRollup(Base):
+    """Running evaluation totals of one franchise character over an hour or a day."""
+    __tablename__ = "franchise_rollups"
+    __table_args__ = (
+        UniqueConstraint("franchise_id", "character_id", "granularity", "period_start", name="uq_franchise_rollups_bucket"),
+        Index("ix_franchise_rollups_window", "org_id", "franchise_id", "granularity", "period_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    franchise_id = Column(Integer, ForeignKey("franchises.id"), nullable=False)
+    character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=False)
+    granularity = Column(String(10), nullable=False)  # hour, day
+    period_start = Column(DateTime, nullable=False)
+    eval_count = Column(Integer, default=0)
+    scored_count = Column(Integer, default=0)  # runs with an overall score
+    score_sum = Column(Float, default=0.0)
+    score_sum_sq = Column(Float, default=0.0)
+    pass_count = Column(Integer, default=0)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
 # ─── Webhook / Event Notifications ────────────────────────────
 
 class WebhookSubscription(Base):
@@ -607,15 +745,23 @@ class ReviewItem(Base):
 
 class DriftBaseline(Base):
     __tablename__ = "drift_baselines"
+    __table_args__ = (Index("ix_drift_baselines_org_character", "org_id", "character_id", "critic_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=False)
     card_version_id = Column(Integer, ForeignKey("card_versions.id"), nullable=False)
     critic_id = Column(Integer, ForeignKey("critics.id"), nullable=False)
-    baseline_score = Column(Float, nullable=False)
+    baseline_score = Column(Float, nullable=False)  # Welford running mean
     std_deviation = Column(Float, default=0.0)
     sample_count = Column(Integer, default=0)
     threshold = Column(Float, default=0.1)  # drift alert if score deviates by this
+    m2 = Column(Float, nullable=True)  # Welford sum of squared deviations
+    ewma_score = Column(Float, nullable=True)  # exponentially weighted recent mean
+    ewma_variance = Column(Float, nullable=True)
+    drifting = Column(Boolean, default=False)  # detector currently alarming
+    detector = Column(String(50), nullable=True)  # change_point_service.DETECTORS
+    detector_state = Column(JSON, nullable=True)
+    last_eval_run_id = Column(Integer, ForeignKey("eval_runs.id"), nullable=True)
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_at = Column(DateTime, default=utcnow)
     updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
@@ -635,6 +781,22 @@ class DriftEvent(Base):
     created_at = Column(DateTime, default=utcnow)
 
 
+class DriftSweep(Base):
+    """An org-wide drift check run in the background."""
+    __tablename__ = "drift_sweeps"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(50), default="pending")  # pending, running, completed, failed
+    characters_checked = Column(Integer, default=0)
+    baselines_checked = Column(Integer, default=0)
+    drifting = Column(Integer, default=0)
+    events_created = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
 # ─── A/B Testing ──────────────────────────────────────────────
 
 class ABExperiment(Base):
@@ -652,6 +814,10 @@ class ABExperiment(Base):
     results_b = Column(JSON, default=dict)  # aggregated results for B
     winner = Column(String(10), nullable=True)  # "a", "b", "inconclusive"
     statistical_significance = Column(Float, nullable=True)  # p-value
+    sequential = Column(Boolean, default=False)  # mSPRT: complete as soon as the boundary is crossed
+    alpha = Column(Float, nullable=True)  # sequential: error rate of the boundary
+    sequential_p_value = Column(Float, nullable=True)  # sequential: always-valid p-value so far
+    stopped_early = Column(Boolean, default=False)
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_at = Column(DateTime, default=utcnow)
     completed_at = Column(DateTime, nullable=True)
@@ -675,6 +841,60 @@ class ABTrialRun(Base):
     experiment = relationship("ABExperiment", back_populates="trial_runs")
 
 
+class ABVariantStats(Base):
+    """Running sufficient statistics of one experiment variant, updated per trial."""
+    __tablename__ = "ab_variant_stats"
+    __table_args__ = (UniqueConstraint("experiment_id", "variant", name="uq_ab_variant_stats"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    experiment_id = Column(Integer, ForeignKey("ab_experiments.id"), nullable=False, index=True)
+    variant = Column(String(10), nullable=False)  # "a" or "b"
+    trials = Column(Integer, default=0)
+    score_n = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    score_sum_sq = Column(Float, default=0.0)
+    decisions = Column(Integer, default=0)
+    passes = Column(Integer, default=0)
+    latency_n = Column(Integer, default=0)
+    latency_sum = Column(Float, default=0.0)
+    cost_n = Column(Integer, default=0)
+    cost_sum = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=utcnow)
+
+
+class ABReplay(Base):
+    """Offline counterfactual replay of an experiment's variants over stored critic results."""
+    __tablename__ = "ab_replays"
+
+    id = Column(Integer, primary_key=True, index=True)
+    experiment_id = Column(Integer, ForeignKey("ab_experiments.id"), nullable=False, index=True)
+    status = Column(String(50), default="pending")  # pending, running, completed, failed
+    params = Column(JSON, default=dict)  # {character_id, since, limit}
+    runs_replayed = Column(Integer, default=0)
+    results = Column(JSON, nullable=True)  # summary in the shape of get_experiment_results
+    error = Column(Text, nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
+# ─── Comparison History ───────────────────────────────────────
+
+class ComparisonRecord(Base):
+    """One comparison made through /api/compare, kept for the org's comparison history."""
+    __tablename__ = "comparison_records"
+    __table_args__ = (Index("ix_comparison_records_org_created", "org_id", "created_at", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    mode = Column(String(50), nullable=False)  # runs, head_to_head, versions
+    score_diff = Column(Float, nullable=True)
+    decisions_match = Column(Boolean, nullable=True)
+    details = Column(JSON, default=dict)  # mode-specific: characters, versions, run ids
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+
+
 # ─── Red Team ─────────────────────────────────────────────────
 
 class RedTeamSession(Base):
@@ -690,11 +910,58 @@ class RedTeamSession(Base):
     resilience_score = Column(Float, nullable=True)  # 1.0 = fully resilient
     results = Column(JSON, default=list)  # list of probe results
     probes_per_category = Column(Integer, default=5)
+    planned_probes = Column(Integer, default=0)  # probes generated for the current run
+    allocation = Column(String(50), default="fixed")  # fixed, adaptive
+    target_half_width = Column(Float, nullable=True)  # adaptive: stop once the resilience CI is this tight
+    allocation_summary = Column(JSON, nullable=True)  # adaptive: per-category counts, CI and stop reason
+    replay_of = Column(Integer, ForeignKey("red_team_sessions.id"), nullable=True)  # re-run this session's exact probes
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     created_at = Column(DateTime, default=utcnow)
     completed_at = Column(DateTime, nullable=True)
 
 
+class RedTeamProbe(Base):
+    """One adversarial probe of a red team session, stored as soon as it is evaluated."""
+    __tablename__ = "red_team_probes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("red_team_sessions.id"), nullable=False, index=True)
+    category = Column(String(100), nullable=False)
+    prompt = Column(Text, nullable=False)
+    score = Column(Float, default=0.0)
+    decision = Column(String(50), nullable=True)
+    is_successful_attack = Column(Boolean, default=False)
+    flags = Column(JSON, default=list)
+    eval_run_id = Column(Integer, ForeignKey("eval_runs.id"), nullable=True)
+    mutation_of = Column(Integer, ForeignKey("red_team_probes.id"), nullable=True)  # successful probe this one varies
+    corpus_probe_id = Column(Integer, ForeignKey("adversarial_probes.id"), nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+
+
+class AdversarialProbe(Base):
+    """Persistent corpus of adversarial prompts per character, card version and attack category."""
+    __tablename__ = "adversarial_probes"
+    __table_args__ = (
+        UniqueConstraint("org_id", "character_id", "card_version_id", "category", "prompt_hash", name="uq_adversarial_probe"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    character_id = Column(Integer, ForeignKey("character_cards.id"), nullable=False, index=True)
+    card_version_id = Column(Integer, ForeignKey("card_versions.id"), nullable=False)
+    category = Column(String(100), nullable=False)
+    prompt = Column(Text, nullable=False)
+    prompt_hash = Column(String(64), nullable=False)  # sha256 of the normalized prompt
+    source = Column(String(50), default="generated")  # generated, mutation
+    times_used = Column(Integer, default=0)
+    times_landed = Column(Integer, default=0)  # runs where the probe was a successful attack
+    last_score = Column(Float, nullable=True)
+    last_outcome = Column(String(50), nullable=True)  # landed, resisted, error
+    last_used_at = Column(DateTime, nullable=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    created_at = Column(DateTime, default=utcnow)
+
+
 # ─── Custom Judge Registry ────────────────────────────────────
 
 class CustomJudge(Base):
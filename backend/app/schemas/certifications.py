@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from app.core.config import settings
+
 
 class CertificationRequest(BaseModel):
     agent_id: str
@@ -11,6 +13,9 @@ class CertificationRequest(BaseModel):
     card_version_id: int
     tier: str = "base"
     test_suite_id: int
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_EVAL_MAX_CONCURRENCY)
+    sequential: Optional[str] = None  # "sprt" | "confidence_bound" — stop once pass/fail is settled
+    alpha: Optional[float] = Field(None, gt=0, lt=0.5)  # at 0.5 or more the SPRT boundaries cross
 
 
 class CertificationUpdate(BaseModel):
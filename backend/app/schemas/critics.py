@@ -79,6 +79,19 @@ class EvaluationProfileCreate(BaseModel):
     tiered_evaluation: bool = False
     rapid_screen_critics: List[int] = []
     deep_eval_critics: List[int] = []
+    judge_mode: str = "single"  # single, multi, adaptive
+    judge_confidence_threshold: Optional[float] = None
+    judge_boundary_margin: Optional[float] = None
+    escalation_judge_id: Optional[int] = None
+    routing_policy: Optional[str] = None  # cheapest_within_quality, fastest, pinned
+    routing_pinned_model: Optional[str] = None
+    routing_reference_model: Optional[str] = None
+    routing_min_agreement: Optional[float] = None
+    prescreen_mode: Optional[str] = None  # shadow, tag, enforce
+    predictor_mode: Optional[str] = None  # shadow, skip
+    predictor_audit_rate: Optional[float] = None
+    near_duplicate_mode: Optional[str] = None  # reuse, seed
+    near_duplicate_threshold: Optional[float] = None
 
 
 class EvaluationProfileOut(BaseModel):
@@ -92,6 +105,19 @@ class EvaluationProfileOut(BaseModel):
     tiered_evaluation: bool
     rapid_screen_critics: list
     deep_eval_critics: list
+    judge_mode: Optional[str] = "single"
+    judge_confidence_threshold: Optional[float] = None
+    judge_boundary_margin: Optional[float] = None
+    escalation_judge_id: Optional[int] = None
+    routing_policy: Optional[str] = None
+    routing_pinned_model: Optional[str] = None
+    routing_reference_model: Optional[str] = None
+    routing_min_agreement: Optional[float] = None
+    prescreen_mode: Optional[str] = None
+    predictor_mode: Optional[str] = None
+    predictor_audit_rate: Optional[float] = None
+    near_duplicate_mode: Optional[str] = None
+    near_duplicate_threshold: Optional[float] = None
     created_at: datetime
 
     class Config:
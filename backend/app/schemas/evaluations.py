@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Union, List
 from datetime import datetime
 
+from app.core.config import settings
+
 
 class EvalRequest(BaseModel):
     character_id: int
@@ -13,6 +15,7 @@ class EvalRequest(BaseModel):
     franchise_id: Optional[int] = None
     agent_id: Optional[str] = None
     territory: Optional[str] = None  # for consent verification
+    card_version_id: Optional[int] = None  # evaluate against this card version instead of the active one
 
 
 class EvalRunOut(BaseModel):
@@ -30,6 +33,12 @@ class EvalRunOut(BaseModel):
     overall_score: Optional[float]
     decision: Optional[str]
     consent_verified: bool
+    prescreen_action: Optional[str] = None
+    prescreen_matches: Optional[list] = None
+    predicted_decision: Optional[str] = None
+    predicted_confidence: Optional[float] = None
+    duplicate_of: Optional[str] = None
+    duplicate_similarity: Optional[float] = None
     c2pa_metadata: dict
     org_id: int
     created_at: datetime
@@ -74,3 +83,55 @@ class EvalResultOut(BaseModel):
 class EvalResponse(BaseModel):
     eval_run: EvalRunOut
     result: Optional[EvalResultOut] = None
+
+
+class PredictorTrainRequest(BaseModel):
+    character_id: Optional[int] = None
+    franchise_id: Optional[int] = None  # franchise-wide predictor when character_id is omitted
+
+
+class DecisionPredictorOut(BaseModel):
+    id: int
+    character_id: Optional[int]
+    franchise_id: Optional[int]
+    version: int
+    status: str
+    classes: list
+    class_scores: dict
+    n_features: int
+    confidence_threshold: Optional[float]
+    training_samples: int
+    metrics: dict
+    error: Optional[str]
+    org_id: int
+    created_at: datetime
+    trained_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class BatchEvalRequest(BaseModel):
+    items: List[EvalRequest]
+    profile_id: Optional[int] = None  # default for items that don't set one
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_EVAL_MAX_CONCURRENCY)
+    stream: bool = False  # stream NDJSON outcomes as items complete
+
+
+class BatchEvalItemResult(BaseModel):
+    index: int
+    eval_run_id: Optional[int] = None
+    status: str  # completed, failed, error
+    tier: Optional[str] = None
+    overall_score: Optional[float] = None
+    decision: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchEvalResponse(BaseModel):
+    total: int
+    completed: int
+    failed: int
+    skipped: int = 0
+    decisions: dict
+    results: List[BatchEvalItemResult]
@@ -15,6 +15,9 @@ class UsageRecordOut(BaseModel):
     api_call_count: int = 0
     llm_tokens_used: int = 0
     estimated_cost: float = 0.0
+    adaptive_eval_count: int = 0
+    escalated_eval_count: int = 0
+    judge_cost_saved: float = 0.0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
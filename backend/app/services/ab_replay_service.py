@@ -0,0 +1,228 @@
+"""A/B replay — counterfactual re-aggregation of stored critic results.
+
+Experiments that only change critic weights (``weight_overrides``) or decision
+thresholds (``decision_thresholds``) need no new LLM calls: every completed eval
+run already stores each critic's score. A replay loads those scores with one query
+and re-aggregates them under variant A and variant B with NumPy, giving the
+statistics of ``get_experiment_results`` over the org's history at no provider
+cost. Both variants see the same runs, so the replay also reports how many
+decisions the change would flip. Variants that change anything else (prompt
+templates, models, profiles) can't be replayed.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import ABExperiment, ABReplay, ABTrialRun, CriticResult, EvalResult, EvalRun
+from app.services import ab_testing_service
+
+# Variant settings a replay can apply to stored critic scores
+REPLAYABLE_KEYS = ("weight_overrides", "decision_thresholds")
+
+
+def check_replayable(experiment: ABExperiment) -> None:
+    for label, config in (("a", experiment.variant_a), ("b", experiment.variant_b)):
+        other = sorted(set(config or {}) - set(REPLAYABLE_KEYS))
+        if other:
+            raise ValueError(
+                f"Variant {label} sets {', '.join(other)}; only weight_overrides and "
+                "decision_thresholds can be replayed"
+            )
+
+
+async def create_replay(
+    db: AsyncSession,
+    experiment: ABExperiment,
+    character_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> ABReplay:
+    check_replayable(experiment)
+    replay = ABReplay(
+        experiment_id=experiment.id,
+        status="pending",
+        params={
+            "character_id": character_id,
+            "since": since.isoformat() if since else None,
+            "limit": min(limit or settings.AB_REPLAY_MAX_RUNS, settings.AB_REPLAY_MAX_RUNS),
+        },
+        org_id=experiment.org_id,
+    )
+    db.add(replay)
+    await db.flush()
+    return replay
+
+
+async def get_replay(db: AsyncSession, replay_id: int, experiment_id: int, org_id: int) -> Optional[ABReplay]:
+    result = await db.execute(
+        select(ABReplay).where(
+            ABReplay.id == replay_id,
+            ABReplay.experiment_id == experiment_id,
+            ABReplay.org_id == org_id,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def load_critic_scores(db: AsyncSession, org_id: int, params: dict) -> Dict[str, np.ndarray]:
+    """Critic scores of the most recent completed eval runs, as parallel arrays.
+
+    Runs made by A/B trials are excluded: their weights are already a variant's.
+    """
+    runs = select(EvalRun.id).where(
+        EvalRun.org_id == org_id,
+        EvalRun.status == "completed",
+        EvalRun.id.not_in(select(ABTrialRun.eval_run_id)),
+    )
+    if params.get("character_id"):
+        runs = runs.where(EvalRun.character_id == params["character_id"])
+    if params.get("since"):
+        runs = runs.where(EvalRun.created_at >= datetime.fromisoformat(params["since"]))
+    runs = runs.order_by(EvalRun.id.desc()).limit(params.get("limit") or settings.AB_REPLAY_MAX_RUNS)
+
+    result = await db.execute(
+        select(EvalResult.eval_run_id, CriticResult.critic_id, CriticResult.score, CriticResult.weight)
+        .join(CriticResult, CriticResult.eval_result_id == EvalResult.id)
+        .where(EvalResult.eval_run_id.in_(runs))
+    )
+    rows = result.all()
+    run_ids, critic_ids, scores, weights = (
+        np.array(column) for column in (zip(*rows) if rows else ([], [], [], []))
+    )
+    return {
+        "run_ids": run_ids.astype(np.int64),
+        "critic_ids": critic_ids.astype(np.int64),
+        "scores": scores.astype(np.float64),
+        # Rows stored before weights were recorded count as weight 1.0, like the critic default
+        "weights": np.array([1.0 if w is None else w for w in weights], dtype=np.float64),
+    }
+
+
+def replay_variant(data: Dict[str, np.ndarray], run_index: np.ndarray, n_runs: int, variant_config: dict) -> Dict[str, Any]:
+    """Overall scores and decision codes of every run under one variant.
+
+    Decision codes index ``labels``; code 0 is always "pass".
+    """
+    weights = data["weights"].copy()
+    for critic_id, weight in (variant_config.get("weight_overrides") or {}).items():
+        weights[data["critic_ids"] == int(critic_id)] = float(weight)
+
+    total = np.bincount(run_index, weights=weights, minlength=n_runs)
+    weighted = np.bincount(run_index, weights=data["scores"] * weights, minlength=n_runs)
+    # A run whose weights sum to zero scores 0.0, as in evaluation_service
+    overall = np.divide(weighted, total, out=np.zeros(n_runs), where=total != 0)
+
+    thresholds = ab_testing_service.decision_thresholds(variant_config)
+    codes = np.select(
+        [overall >= threshold for threshold, _ in thresholds],
+        np.arange(len(thresholds)),
+        default=len(thresholds),
+    )
+    return {
+        "overall": overall,
+        "codes": codes,
+        "labels": [decision for _, decision in thresholds] + ["block"],
+    }
+
+
+def _sufficient_stats(variant: Dict[str, Any]) -> Dict[str, float]:
+    overall = variant["overall"]
+    return {
+        "n": int(overall.size),
+        "sum": float(overall.sum()),
+        "sum_sq": float(np.square(overall).sum()),
+        "decisions": int(overall.size),
+        "passes": int((variant["codes"] == 0).sum()),
+    }
+
+
+def _decision_counts(variant: Dict[str, Any]) -> Dict[str, int]:
+    counts = np.bincount(variant["codes"], minlength=len(variant["labels"]))
+    return {label: int(count) for label, count in zip(variant["labels"], counts) if count}
+
+
+def replay(data: Dict[str, np.ndarray], variant_a: dict, variant_b: dict) -> Dict[str, Any]:
+    """Summary of both variants over the loaded runs, in the shape of ``get_experiment_results``.
+
+    Latency and cost are omitted: nothing is called.
+    """
+    _, run_index = np.unique(data["run_ids"], return_inverse=True)
+    n_runs = int(run_index.max()) + 1 if run_index.size else 0
+    a = replay_variant(data, run_index, n_runs, variant_a or {})
+    b = replay_variant(data, run_index, n_runs, variant_b or {})
+
+    stats = ab_testing_service.compare_variants(_sufficient_stats(a), _sufficient_stats(b))
+    p_value = stats["p_value"]
+    decisions_a = np.array(a["labels"])[a["codes"]]
+    decisions_b = np.array(b["labels"])[b["codes"]]
+    return {
+        "trials_a": n_runs,
+        "trials_b": n_runs,
+        "mean_score_a": round(stats["mean_score_a"], 4),
+        "mean_score_b": round(stats["mean_score_b"], 4),
+        "std_a": round(stats["std_a"], 4),
+        "std_b": round(stats["std_b"], 4),
+        "pass_rate_a": round(stats["pass_rate_a"], 4),
+        "pass_rate_b": round(stats["pass_rate_b"], 4),
+        "p_value": round(p_value, 6) if p_value is not None else None,
+        "significant": p_value < 0.05 if p_value is not None else False,
+        "winner": stats["winner"],
+        "decisions_a": _decision_counts(a),
+        "decisions_b": _decision_counts(b),
+        "changed_decisions": int((decisions_a != decisions_b).sum()),
+    }
+
+
+async def run_replay(db: AsyncSession, replay_id: int) -> ABReplay:
+    replay_row = await db.get(ABReplay, replay_id)
+    if not replay_row:
+        raise ValueError("Replay not found")
+    experiment = await db.get(ABExperiment, replay_row.experiment_id)
+    replay_row.status = "running"
+    await db.flush()
+
+    data = await load_critic_scores(db, replay_row.org_id, replay_row.params or {})
+    results = replay(data, experiment.variant_a, experiment.variant_b)
+    replay_row.runs_replayed = results["trials_a"]
+    replay_row.results = results
+    replay_row.status = "completed"
+    replay_row.completed_at = datetime.utcnow()
+    await db.flush()
+    return replay_row
+
+
+async def replay_in_background(replay_id: int) -> None:
+    """Background task entry point: replays in its own session and commits."""
+    from app.core.database import async_session
+
+    async with async_session() as db:
+        try:
+            await run_replay(db, replay_id)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            replay_row = await db.get(ABReplay, replay_id)
+            if replay_row:
+                replay_row.status = "failed"
+                replay_row.error = str(e)[:2000]
+                await db.commit()
+
+
+def replay_to_dict(replay_row: ABReplay) -> dict:
+    return {
+        "id": replay_row.id,
+        "experiment_id": replay_row.experiment_id,
+        "status": replay_row.status,
+        "params": replay_row.params or {},
+        "runs_replayed": replay_row.runs_replayed or 0,
+        "results": replay_row.results,
+        "error": replay_row.error,
+        "created_at": replay_row.created_at.isoformat() if replay_row.created_at else None,
+        "completed_at": replay_row.completed_at.isoformat() if replay_row.completed_at else None,
+    }
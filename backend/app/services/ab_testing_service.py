@@ -1,17 +1,26 @@
-"""A/B Testing service — create and manage experiments comparing evaluation configs."""
+"""A/B Testing service — create and manage experiments comparing evaluation configs.
+
+Each variant keeps running sufficient statistics (``ABVariantStats``: counts, sums
+and sums of squares) updated as its trials complete, so results are read without
+reloading trials. Sequential experiments run a mixture SPRT on the mean score
+difference after every trial and complete themselves once its always-valid
+p-value crosses ``alpha`` (or both variants reach ``sample_size``).
+"""
 from __future__ import annotations
 
+import asyncio
 import math
 import time
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
-from sqlalchemy import select, func
+from sqlalchemy import case, select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.core import (
     ABExperiment,
     ABTrialRun,
+    ABVariantStats,
     EvalRun,
     EvalResult,
     CriticResult,
@@ -21,7 +30,21 @@ from app.models.core import (
     CriticConfiguration,
     EvaluationProfile,
 )
-from app.services import critic_service, consent_service, character_service
+from app.core.config import settings
+from app.services import critic_service, consent_service, character_service, evaluation_service, franchise_service, model_routing_service, usage_service
+
+
+VARIANTS = ("a", "b")
+
+# Running totals kept per variant in ABVariantStats
+_STAT_FIELDS = (
+    "trials", "score_n", "score_sum", "score_sum_sq", "decisions", "passes",
+    "latency_n", "latency_sum", "cost_n", "cost_sum",
+)
+
+# Per-trial score variance assumed at least this (std 0.05) by the mSPRT, so a
+# few identical scores can't make any difference look certain
+_MSPRT_VARIANCE_FLOOR = 0.0025
 
 
 async def create_experiment(
@@ -38,10 +61,15 @@ async def create_experiment(
         variant_b=data["variant_b"],
         sample_size=data.get("sample_size", 100),
         status="draft",
+        sequential=bool(data.get("sequential")),
+        alpha=data.get("alpha") or (settings.AB_SEQUENTIAL_ALPHA if data.get("sequential") else None),
         org_id=org_id,
     )
     db.add(experiment)
     await db.flush()
+    for variant in VARIANTS:
+        db.add(ABVariantStats(experiment_id=experiment.id, variant=variant, **dict.fromkeys(_STAT_FIELDS, 0)))
+    await db.flush()
     return experiment
 
 
@@ -73,6 +101,38 @@ async def get_experiment(
     return result.scalar_one_or_none()
 
 
+def _variant_critics(critics_with_config: list, variant_config: dict) -> List[tuple]:
+    """``(critic, config, weight)`` for a variant, applying its weight overrides.
+
+    Overrides are applied to the weight only; the shared ``CriticConfiguration`` rows
+    are never modified.
+    """
+    weight_overrides = variant_config.get("weight_overrides", {}) or {}
+    resolved = []
+    for critic, config in critics_with_config:
+        weight = config.weight_override if config and config.weight_override else critic.default_weight
+        if str(critic.id) in weight_overrides:
+            weight = weight_overrides[str(critic.id)]
+        resolved.append((critic, config, weight))
+    return resolved
+
+
+def decision_thresholds(variant_config: dict) -> List[tuple]:
+    """``(threshold, decision)`` bands of a variant, with its ``decision_thresholds`` overrides applied."""
+    overrides = variant_config.get("decision_thresholds", {}) or {}
+    return [
+        (float(overrides.get(decision, threshold)), decision)
+        for threshold, decision in evaluation_service.DECISION_THRESHOLDS
+    ]
+
+
+def _decision_for(overall_score: float, thresholds: List[tuple]) -> str:
+    for threshold, decision in thresholds:
+        if overall_score >= threshold:
+            return decision
+    return "block"
+
+
 async def run_trial(
     db: AsyncSession,
     experiment_id: int,
@@ -81,7 +141,15 @@ async def run_trial(
     org_id: int,
     modality: str = "text",
 ) -> Dict[str, Any]:
-    """Run a trial: evaluate content through both variant A and variant B configs."""
+    """Run a trial: evaluate content through both variant A and variant B configs.
+
+    Both variants' critic calls run concurrently, and a call that is identical for
+    both (same prompts, model and temperature — e.g. weight-override experiments)
+    runs once with its result shared; only the aggregation differs per variant.
+    Shared calls are costed once: the second variant's ``CriticResult`` rows record
+    zero cost and ``shared_with``, while each trial's ``cost`` is what that variant
+    would have spent on its own.
+    """
     experiment = await get_experiment(db, experiment_id, org_id)
     if not experiment:
         raise ValueError("Experiment not found")
@@ -107,11 +175,51 @@ async def run_trial(
         db, character_id, modality, org_id
     )
 
-    results = {}
+    variants = [("a", experiment.variant_a or {}), ("b", experiment.variant_b or {})]
+    content_str = content if isinstance(content, str) else str(content)
+    start_time = time.time()
 
-    for variant_label, variant_config in [("a", experiment.variant_a), ("b", experiment.variant_b)]:
-        start_time = time.time()
+    # Critics are the same for both variants; only their weights may differ
+    critics_with_config = []
+    if consent_ok:
+        configs = await critic_service.get_configs_for_character(
+            db, org_id, character_id, character.franchise_id
+        )
+        for config in configs:
+            if not config.enabled:
+                continue
+            critic = await critic_service.get_critic(db, config.critic_id)
+            if critic and (critic.modality == modality or critic.modality == "multi"):
+                critics_with_config.append((critic, config))
+
+        if not critics_with_config:
+            all_critics = await critic_service.list_critics(db, org_id)
+            critics_with_config = [
+                (c, None) for c in all_critics
+                if c.modality == modality or c.modality == "multi"
+            ]
+
+    # Each distinct critic call runs once, concurrently across both variants
+    plans = {label: _variant_critics(critics_with_config, config) for label, config in variants}
+    calls: Dict[str, tuple] = {}
+    call_keys: Dict[str, List[str]] = {}
+    for label, resolved in plans.items():
+        call_keys[label] = []
+        for critic, config, _ in resolved:
+            extra = config.extra_instructions if config and config.extra_instructions else ""
+            key = critic_service.call_key(critic, card_version, content_str, extra)
+            calls.setdefault(key, (critic, extra, label))
+            call_keys[label].append(key)
+    with model_routing_service.org_scope(org_id):
+        outputs = await asyncio.gather(*(
+            critic_service.run_critic(critic, card_version, content_str, extra)
+            for critic, extra, _ in calls.values()
+        ))
+    call_results = dict(zip(calls, outputs))
+    elapsed_ms = int((time.time() - start_time) * 1000)
 
+    results = {}
+    for variant_label, variant_config in variants:
         # Create eval run for this variant
         eval_run = EvalRun(
             character_id=character_id,
@@ -127,6 +235,7 @@ async def run_trial(
         db.add(eval_run)
         await db.flush()
 
+        total_cost = 0.0
         if not consent_ok:
             eval_run.status = "completed"
             eval_run.decision = "block"
@@ -142,37 +251,19 @@ async def run_trial(
             db.add(result)
             await db.flush()
         else:
-            # Get critics — may vary based on experiment type
-            configs = await critic_service.get_configs_for_character(
-                db, org_id, character_id, character.franchise_id
-            )
-            enabled_configs = [c for c in configs if c.enabled]
-
-            critics_with_config = []
-            for config in enabled_configs:
-                critic = await critic_service.get_critic(db, config.critic_id)
-                if critic and (critic.modality == modality or critic.modality == "multi"):
-                    # Apply variant-specific weight overrides
-                    weight_overrides = variant_config.get("weight_overrides", {})
-                    if str(critic.id) in weight_overrides:
-                        config.weight_override = weight_overrides[str(critic.id)]
-                    critics_with_config.append((critic, config))
-
-            if not critics_with_config:
-                all_critics = await critic_service.list_critics(db, org_id)
-                critics_with_config = [
-                    (c, None) for c in all_critics
-                    if c.modality == modality or c.modality == "multi"
-                ]
-
-            # Run critics
-            content_str = content if isinstance(content, str) else str(content)
-            if critics_with_config:
-                critic_results = await critic_service.run_critics_parallel(
-                    critics_with_config, card_version, content_str
-                )
-            else:
-                critic_results = []
+            critic_results = []
+            for (critic, _, weight), key in zip(plans[variant_label], call_keys[variant_label]):
+                owner = calls[key][2]
+                r = {
+                    "critic_id": critic.id,
+                    "critic_name": critic.name,
+                    "weight": weight,
+                    **call_results[key],
+                }
+                total_cost += r.get("estimated_cost") or 0.0
+                if owner != variant_label:
+                    r.update(estimated_cost=0.0, shared_with=owner)
+                critic_results.append(r)
 
             # Calculate overall score
             total_weight = sum(r["weight"] for r in critic_results) if critic_results else 0
@@ -181,20 +272,8 @@ async def run_trial(
                 if total_weight > 0 else 0.0
             )
 
-            # Determine decision
-            if overall_score >= 0.9:
-                decision = "pass"
-            elif overall_score >= 0.7:
-                decision = "regenerate"
-            elif overall_score >= 0.5:
-                decision = "quarantine"
-            elif overall_score >= 0.3:
-                decision = "escalate"
-            else:
-                decision = "block"
-
             eval_run.overall_score = overall_score
-            eval_run.decision = decision
+            eval_run.decision = _decision_for(overall_score, decision_thresholds(variant_config))
             eval_run.status = "completed"
             eval_run.completed_at = datetime.utcnow()
 
@@ -230,23 +309,7 @@ async def run_trial(
                     estimated_cost=r.get("estimated_cost"),
                 )
                 db.add(cr)
-
-        elapsed_ms = int((time.time() - start_time) * 1000)
-
-        # Calculate cost from critic results if available
-        total_cost = 0.0
-        if eval_run.status == "completed" and consent_ok:
-            cr_result = await db.execute(
-                select(EvalResult).where(EvalResult.eval_run_id == eval_run.id)
-            )
-            ev_result = cr_result.scalar_one_or_none()
-            if ev_result:
-                crs = await db.execute(
-                    select(CriticResult).where(CriticResult.eval_result_id == ev_result.id)
-                )
-                for cr_row in crs.scalars().all():
-                    if cr_row.estimated_cost:
-                        total_cost += cr_row.estimated_cost
+            await usage_service.record_critic_costs(db, eval_run, critic_results)
 
         # Record trial run
         trial = ABTrialRun(
@@ -260,6 +323,8 @@ async def run_trial(
         )
         db.add(trial)
         await db.flush()
+        await _record_trial_stats(db, experiment, trial)
+        await franchise_service.record_eval(db, eval_run)
 
         results[variant_label] = {
             "eval_run_id": eval_run.id,
@@ -269,74 +334,286 @@ async def run_trial(
             "cost": total_cost,
         }
 
+    sequential = None
+    if experiment.sequential:
+        sequential = await _apply_sequential_test(db, experiment)
+
     return {
         "experiment_id": experiment_id,
         "character_id": character_id,
         "variant_a": results.get("a"),
         "variant_b": results.get("b"),
+        "critic_calls": len(calls),
+        "shared_critic_calls": sum(len(keys) for keys in call_keys.values()) - len(calls),
+        "experiment_status": experiment.status,
+        "sequential": sequential,
+    }
+
+
+async def load_variant_stats(db: AsyncSession, experiment: ABExperiment, refresh: bool = False) -> Dict[str, ABVariantStats]:
+    """Both variants' running statistics; rebuilt once from trial runs for experiments that predate them."""
+    q = select(ABVariantStats).where(ABVariantStats.experiment_id == experiment.id)
+    if refresh:
+        q = q.execution_options(populate_existing=True)
+    rows = {row.variant: row for row in (await db.execute(q)).scalars().all()}
+    missing = [v for v in VARIANTS if v not in rows]
+    if not missing:
+        return rows
+
+    result = await db.execute(
+        select(
+            ABTrialRun.variant,
+            func.count(ABTrialRun.id),
+            func.count(ABTrialRun.score),
+            func.coalesce(func.sum(ABTrialRun.score), 0.0),
+            func.coalesce(func.sum(ABTrialRun.score * ABTrialRun.score), 0.0),
+            func.count(ABTrialRun.decision),
+            func.coalesce(func.sum(case((ABTrialRun.decision == "pass", 1), else_=0)), 0),
+            func.count(ABTrialRun.latency_ms),
+            func.coalesce(func.sum(ABTrialRun.latency_ms), 0.0),
+            func.count(ABTrialRun.cost),
+            func.coalesce(func.sum(ABTrialRun.cost), 0.0),
+        )
+        .where(ABTrialRun.experiment_id == experiment.id, ABTrialRun.variant.in_(missing))
+        .group_by(ABTrialRun.variant)
+    )
+    totals = {row[0]: row[1:] for row in result.all()}
+    for variant in missing:
+        values = totals.get(variant, (0,) * len(_STAT_FIELDS))
+        rows[variant] = ABVariantStats(experiment_id=experiment.id, variant=variant, **dict(zip(_STAT_FIELDS, values)))
+        db.add(rows[variant])
+    await db.flush()
+    return rows
+
+
+async def _record_trial_stats(db: AsyncSession, experiment: ABExperiment, trial: ABTrialRun) -> None:
+    """Add a trial to its variant's running statistics with one atomic UPDATE."""
+    await load_variant_stats(db, experiment)
+    score, decision = trial.score, trial.decision
+    await db.execute(
+        update(ABVariantStats)
+        .where(ABVariantStats.experiment_id == trial.experiment_id, ABVariantStats.variant == trial.variant)
+        .values(
+            trials=ABVariantStats.trials + 1,
+            score_n=ABVariantStats.score_n + int(score is not None),
+            score_sum=ABVariantStats.score_sum + (score or 0.0),
+            score_sum_sq=ABVariantStats.score_sum_sq + (score or 0.0) ** 2,
+            decisions=ABVariantStats.decisions + int(decision is not None),
+            passes=ABVariantStats.passes + int(decision == "pass"),
+            latency_n=ABVariantStats.latency_n + int(trial.latency_ms is not None),
+            latency_sum=ABVariantStats.latency_sum + (trial.latency_ms or 0),
+            cost_n=ABVariantStats.cost_n + int(trial.cost is not None),
+            cost_sum=ABVariantStats.cost_sum + (trial.cost or 0.0),
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _sufficient_stats(row: ABVariantStats) -> Dict[str, float]:
+    return {
+        "n": row.score_n or 0,
+        "sum": row.score_sum or 0.0,
+        "sum_sq": row.score_sum_sq or 0.0,
+        "decisions": row.decisions or 0,
+        "passes": row.passes or 0,
+    }
+
+
+def msprt(a: Dict[str, float], b: Dict[str, float], tau: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """Mixture SPRT of the mean score difference B − A, from sufficient statistics.
+
+    Mixes the likelihood ratio over a N(0, tau²) prior on the difference, with the
+    per-variant variances plugged in. ``1 / ratio`` is a p-value that stays valid
+    however often it is checked. None until both variants have two scores.
+    """
+    if a["n"] < 2 or b["n"] < 2:
+        return None
+    tau_sq = (settings.AB_MSPRT_TAU if tau is None else tau) ** 2
+    stats = compare_variants(a, b)
+    var = (
+        max(stats["std_a"] ** 2, _MSPRT_VARIANCE_FLOOR) / a["n"]
+        + max(stats["std_b"] ** 2, _MSPRT_VARIANCE_FLOOR) / b["n"]
+    )
+    difference = stats["mean_score_b"] - stats["mean_score_a"]
+    log_ratio = 0.5 * math.log(var / (var + tau_sq)) + difference ** 2 * tau_sq / (2 * var * (var + tau_sq))
+    return {
+        "difference": difference,
+        "log_likelihood_ratio": log_ratio,
+        "p_value": min(1.0, math.exp(-log_ratio)),
     }
 
 
+def _sequential_summary(experiment: ABExperiment, rows: Dict[str, ABVariantStats]) -> Dict[str, Any]:
+    a, b = _sufficient_stats(rows["a"]), _sufficient_stats(rows["b"])
+    alpha = experiment.alpha or settings.AB_SEQUENTIAL_ALPHA
+    test = msprt(a, b)
+    p_value = experiment.sequential_p_value
+    crossed = p_value is not None and p_value <= alpha
+    winner = None
+    if crossed:
+        winner = "b" if test and test["difference"] > 0 else "a"
+    elif min(rows["a"].trials or 0, rows["b"].trials or 0) >= experiment.sample_size:
+        winner = "inconclusive"
+    return {
+        "alpha": alpha,
+        "p_value": p_value,
+        "log_likelihood_ratio": test["log_likelihood_ratio"] if test else None,
+        "min_trials": settings.AB_SEQUENTIAL_MIN_TRIALS,
+        "boundary_crossed": crossed,
+        "stopped_early": bool(experiment.stopped_early),
+        "winner": winner,
+    }
+
+
+async def _apply_sequential_test(db: AsyncSession, experiment: ABExperiment) -> Dict[str, Any]:
+    """Update the always-valid p-value after a trial; complete the experiment at a boundary."""
+    rows = await load_variant_stats(db, experiment, refresh=True)
+    a, b = _sufficient_stats(rows["a"]), _sufficient_stats(rows["b"])
+    test = msprt(a, b)
+    if test and min(a["n"], b["n"]) >= settings.AB_SEQUENTIAL_MIN_TRIALS:
+        previous = experiment.sequential_p_value
+        experiment.sequential_p_value = test["p_value"] if previous is None else min(previous, test["p_value"])
+
+    sequential = _sequential_summary(experiment, rows)
+    if sequential["winner"] is not None and experiment.status != "completed":
+        experiment.stopped_early = sequential["boundary_crossed"] and (
+            min(rows["a"].trials or 0, rows["b"].trials or 0) < experiment.sample_size
+        )
+        _finalize(experiment, _summary(experiment, rows))
+        sequential["stopped_early"] = bool(experiment.stopped_early)
+    await db.flush()
+    return sequential
+
+
 async def get_experiment_results(
     db: AsyncSession,
     experiment_id: int,
     org_id: int,
+    trial_limit: Optional[int] = None,
 ) -> Dict[str, Any]:
-    """Compute experiment results with statistical significance."""
+    """Compute experiment results with statistical significance.
+
+    Statistics come from the variants' running totals; only the ``trial_limit``
+    most recent trials are loaded for the trial history.
+    """
     experiment = await get_experiment(db, experiment_id, org_id)
     if not experiment:
         raise ValueError("Experiment not found")
 
-    # Get all trial runs
+    rows = await load_variant_stats(db, experiment)
+    summary = _summary(experiment, rows)
+
     result = await db.execute(
         select(ABTrialRun)
         .where(ABTrialRun.experiment_id == experiment_id)
-        .order_by(ABTrialRun.created_at.asc())
+        .order_by(ABTrialRun.created_at.desc(), ABTrialRun.id.desc())
+        .limit(trial_limit or settings.AB_RESULTS_TRIAL_LIMIT)
     )
-    trials = list(result.scalars().all())
+    trials = list(reversed(result.scalars().all()))
+
+    # Build trial history
+    trial_history = [
+        {
+            "id": t.id,
+            "variant": t.variant,
+            "score": t.score,
+            "decision": t.decision,
+            "latency_ms": t.latency_ms,
+            "cost": t.cost,
+            "created_at": t.created_at.isoformat() if t.created_at else None,
+        }
+        for t in trials
+    ]
 
-    trials_a = [t for t in trials if t.variant == "a"]
-    trials_b = [t for t in trials if t.variant == "b"]
+    return {
+        "experiment": {
+            "id": experiment.id,
+            "name": experiment.name,
+            "description": experiment.description,
+            "status": experiment.status,
+            "experiment_type": experiment.experiment_type,
+            "variant_a": experiment.variant_a,
+            "variant_b": experiment.variant_b,
+            "sample_size": experiment.sample_size,
+            "sequential": bool(experiment.sequential),
+            "winner": experiment.winner or summary["winner"],
+            "statistical_significance": experiment.statistical_significance or summary["p_value"],
+            "created_at": experiment.created_at.isoformat() if experiment.created_at else None,
+            "completed_at": experiment.completed_at.isoformat() if experiment.completed_at else None,
+        },
+        "summary": summary,
+        "trials": trial_history,
+    }
 
-    scores_a = [t.score for t in trials_a if t.score is not None]
-    scores_b = [t.score for t in trials_b if t.score is not None]
 
-    decisions_a = [t.decision for t in trials_a if t.decision is not None]
-    decisions_b = [t.decision for t in trials_b if t.decision is not None]
+def _summary(experiment: ABExperiment, rows: Dict[str, ABVariantStats]) -> Dict[str, Any]:
+    """Result summary of both variants from their running statistics.
+
+    Sequential experiments report the mSPRT's always-valid p-value and winner; a
+    fixed-horizon p-value checked after every trial would overstate significance.
+    """
+    a, b = rows["a"], rows["b"]
+
+    def safe_mean(total, n):
+        return total / n if n else 0.0
+
+    stats = compare_variants(_sufficient_stats(a), _sufficient_stats(b))
+    p_value, winner = stats["p_value"], stats["winner"]
+    alpha = 0.05
+    sequential = None
+    if experiment.sequential:
+        sequential = _sequential_summary(experiment, rows)
+        p_value, winner, alpha = sequential["p_value"], sequential["winner"], sequential["alpha"]
+
+    summary = {
+        "trials_a": a.trials or 0,
+        "trials_b": b.trials or 0,
+        "mean_score_a": round(stats["mean_score_a"], 4),
+        "mean_score_b": round(stats["mean_score_b"], 4),
+        "std_a": round(stats["std_a"], 4),
+        "std_b": round(stats["std_b"], 4),
+        "pass_rate_a": round(stats["pass_rate_a"], 4),
+        "pass_rate_b": round(stats["pass_rate_b"], 4),
+        "avg_latency_a": round(safe_mean(a.latency_sum or 0, a.latency_n), 1),
+        "avg_latency_b": round(safe_mean(b.latency_sum or 0, b.latency_n), 1),
+        "avg_cost_a": round(safe_mean(a.cost_sum or 0.0, a.cost_n), 6),
+        "avg_cost_b": round(safe_mean(b.cost_sum or 0.0, b.cost_n), 6),
+        "total_cost_a": round(a.cost_sum or 0.0, 6),
+        "total_cost_b": round(b.cost_sum or 0.0, 6),
+        "p_value": round(p_value, 6) if p_value is not None else None,
+        "significant": p_value < alpha if p_value is not None else False,
+        "winner": winner,
+    }
+    if sequential is not None:
+        summary["sequential"] = sequential
+    return summary
 
-    latencies_a = [t.latency_ms for t in trials_a if t.latency_ms is not None]
-    latencies_b = [t.latency_ms for t in trials_b if t.latency_ms is not None]
 
-    costs_a = [t.cost for t in trials_a if t.cost is not None]
-    costs_b = [t.cost for t in trials_b if t.cost is not None]
+def compare_variants(a: Dict[str, float], b: Dict[str, float]) -> Dict[str, Any]:
+    """Means, spreads, pass rates and significance of A vs B from their sufficient statistics."""
 
-    def safe_mean(lst):
-        return sum(lst) / len(lst) if lst else 0.0
+    def mean(v):
+        return v["sum"] / v["n"] if v["n"] else 0.0
 
-    def safe_std(lst):
-        if len(lst) < 2:
+    def std(v):
+        if v["n"] < 2:
             return 0.0
-        mean = sum(lst) / len(lst)
-        variance = sum((x - mean) ** 2 for x in lst) / (len(lst) - 1)
-        return math.sqrt(variance)
-
-    mean_a = safe_mean(scores_a)
-    mean_b = safe_mean(scores_b)
-    std_a = safe_std(scores_a)
-    std_b = safe_std(scores_b)
+        variance = (v["sum_sq"] - v["sum"] ** 2 / v["n"]) / (v["n"] - 1)
+        return math.sqrt(max(variance, 0.0))
 
-    pass_count_a = sum(1 for d in decisions_a if d == "pass")
-    pass_count_b = sum(1 for d in decisions_b if d == "pass")
-    pass_rate_a = pass_count_a / len(decisions_a) if decisions_a else 0.0
-    pass_rate_b = pass_count_b / len(decisions_b) if decisions_b else 0.0
+    mean_a, mean_b = mean(a), mean(b)
+    std_a, std_b = std(a), std(b)
+    pass_rate_a = a["passes"] / a["decisions"] if a["decisions"] else 0.0
+    pass_rate_b = b["passes"] / b["decisions"] if b["decisions"] else 0.0
 
     # Compute statistical significance
     # Use two-sample z-test for proportions (pass rates)
     p_value_proportions = None
-    if len(decisions_a) >= 2 and len(decisions_b) >= 2:
-        n_a = len(decisions_a)
-        n_b = len(decisions_b)
-        p_pool = (pass_count_a + pass_count_b) / (n_a + n_b) if (n_a + n_b) > 0 else 0
+    if a["decisions"] >= 2 and b["decisions"] >= 2:
+        n_a = a["decisions"]
+        n_b = b["decisions"]
+        p_pool = (a["passes"] + b["passes"]) / (n_a + n_b) if (n_a + n_b) > 0 else 0
         if p_pool > 0 and p_pool < 1:
             se = math.sqrt(p_pool * (1 - p_pool) * (1 / n_a + 1 / n_b))
             if se > 0:
@@ -346,19 +623,12 @@ async def get_experiment_results(
 
     # Use two-sample t-test for scores
     p_value_scores = None
-    if len(scores_a) >= 2 and len(scores_b) >= 2:
-        n_a = len(scores_a)
-        n_b = len(scores_b)
+    if a["n"] >= 2 and b["n"] >= 2:
+        n_a = a["n"]
+        n_b = b["n"]
         se = math.sqrt(std_a ** 2 / n_a + std_b ** 2 / n_b)
         if se > 0:
             t_stat = abs(mean_a - mean_b) / se
-            # Approximate degrees of freedom (Welch's)
-            num = (std_a ** 2 / n_a + std_b ** 2 / n_b) ** 2
-            den = (
-                (std_a ** 2 / n_a) ** 2 / (n_a - 1)
-                + (std_b ** 2 / n_b) ** 2 / (n_b - 1)
-            )
-            df = num / den if den > 0 else 1
             # Approximate p-value using normal for large df
             p_value_scores = 2 * (1 - _normal_cdf(t_stat))
 
@@ -377,55 +647,15 @@ async def get_experiment_results(
     elif p_value is not None:
         winner = "inconclusive"
 
-    # Build trial history
-    trial_history = [
-        {
-            "id": t.id,
-            "variant": t.variant,
-            "score": t.score,
-            "decision": t.decision,
-            "latency_ms": t.latency_ms,
-            "cost": t.cost,
-            "created_at": t.created_at.isoformat() if t.created_at else None,
-        }
-        for t in trials
-    ]
-
     return {
-        "experiment": {
-            "id": experiment.id,
-            "name": experiment.name,
-            "description": experiment.description,
-            "status": experiment.status,
-            "experiment_type": experiment.experiment_type,
-            "variant_a": experiment.variant_a,
-            "variant_b": experiment.variant_b,
-            "sample_size": experiment.sample_size,
-            "winner": experiment.winner or winner,
-            "statistical_significance": experiment.statistical_significance or p_value,
-            "created_at": experiment.created_at.isoformat() if experiment.created_at else None,
-            "completed_at": experiment.completed_at.isoformat() if experiment.completed_at else None,
-        },
-        "summary": {
-            "trials_a": len(trials_a),
-            "trials_b": len(trials_b),
-            "mean_score_a": round(mean_a, 4),
-            "mean_score_b": round(mean_b, 4),
-            "std_a": round(std_a, 4),
-            "std_b": round(std_b, 4),
-            "pass_rate_a": round(pass_rate_a, 4),
-            "pass_rate_b": round(pass_rate_b, 4),
-            "avg_latency_a": round(safe_mean(latencies_a), 1),
-            "avg_latency_b": round(safe_mean(latencies_b), 1),
-            "avg_cost_a": round(safe_mean(costs_a), 6),
-            "avg_cost_b": round(safe_mean(costs_b), 6),
-            "total_cost_a": round(sum(costs_a), 6),
-            "total_cost_b": round(sum(costs_b), 6),
-            "p_value": round(p_value, 6) if p_value is not None else None,
-            "significant": p_value < 0.05 if p_value is not None else False,
-            "winner": winner,
-        },
-        "trials": trial_history,
+        "mean_score_a": mean_a,
+        "mean_score_b": mean_b,
+        "std_a": std_a,
+        "std_b": std_b,
+        "pass_rate_a": pass_rate_a,
+        "pass_rate_b": pass_rate_b,
+        "p_value": p_value,
+        "winner": winner,
     }
 
 
@@ -443,32 +673,32 @@ async def complete_experiment(
         raise ValueError("Experiment is already completed")
 
     # Compute final results
-    results = await get_experiment_results(db, experiment_id, org_id)
-    summary = results["summary"]
+    rows = await load_variant_stats(db, experiment)
+    summary = _summary(experiment, rows)
+    if experiment.sequential and summary["winner"] is None:
+        # Stopped by hand before either boundary
+        summary["winner"] = "inconclusive"
+    _finalize(experiment, summary)
 
+    await db.flush()
+    return experiment
+
+
+def _finalize(experiment: ABExperiment, summary: Dict[str, Any]) -> None:
+    """Mark an experiment completed with the winner and per-variant results of ``summary``."""
     experiment.status = "completed"
     experiment.completed_at = datetime.utcnow()
     experiment.winner = summary["winner"]
     experiment.statistical_significance = summary["p_value"]
-    experiment.results_a = {
-        "trials": summary["trials_a"],
-        "mean_score": summary["mean_score_a"],
-        "pass_rate": summary["pass_rate_a"],
-        "avg_latency": summary["avg_latency_a"],
-        "avg_cost": summary["avg_cost_a"],
-        "total_cost": summary["total_cost_a"],
-    }
-    experiment.results_b = {
-        "trials": summary["trials_b"],
-        "mean_score": summary["mean_score_b"],
-        "pass_rate": summary["pass_rate_b"],
-        "avg_latency": summary["avg_latency_b"],
-        "avg_cost": summary["avg_cost_b"],
-        "total_cost": summary["total_cost_b"],
-    }
-
-    await db.flush()
-    return experiment
+    for label in VARIANTS:
+        setattr(experiment, f"results_{label}", {
+            "trials": summary[f"trials_{label}"],
+            "mean_score": summary[f"mean_score_{label}"],
+            "pass_rate": summary[f"pass_rate_{label}"],
+            "avg_latency": summary[f"avg_latency_{label}"],
+            "avg_cost": summary[f"avg_cost_{label}"],
+            "total_cost": summary[f"total_cost_{label}"],
+        })
 
 
 def _normal_cdf(x: float) -> float:
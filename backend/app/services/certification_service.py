@@ -1,20 +1,105 @@
-"""Agent certification — run test suites and issue certifications."""
+"""Agent certification — run test suites and issue certifications.
+
+Test cases are evaluated concurrently through ``evaluation_service.evaluate_batch``.
+With ``sequential`` set, cases run in random order and evaluation stops as soon as
+the suite's pass/fail against ``passing_threshold`` is settled. Concurrent cases can
+finish out of order; the rules only ever see the completed prefix of the sampled order.
+
+- Always: stop when the outcome is certain whatever the remaining cases score.
+- ``confidence_bound`` — stop when an anytime-valid Hoeffding–Serfling bound on the
+  suite's mean score (sampling cases without replacement) clears the threshold.
+- ``sprt`` — Wald's sequential probability ratio test of mean score
+  ``threshold + δ`` against ``threshold - δ`` with a running variance estimate.
+
+The rule that applied and where it stopped are recorded in ``results_summary``.
+"""
 from __future__ import annotations
 
+import math
+import random
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.core import AgentCertification, TestCase
 from app.schemas.certifications import CertificationRequest, CertificationUpdate
 from app.schemas.evaluations import EvalRequest
 from app.services import test_suite_service, evaluation_service
 
+SEQUENTIAL_RULES = ("sprt", "confidence_bound")
+
+_SPRT_MIN_VARIANCE = 0.01
+
+
+# ─── Stopping Rules ────────────────────────────────────────────
+
+def exact_verdict(scores: List[float], total: int, threshold: float) -> Optional[str]:
+    """Verdict already implied by the scores so far, whatever the rest score in [0, 1]."""
+    remaining = total - len(scores)
+    if sum(scores) / total >= threshold:
+        return "passed"
+    if (sum(scores) + remaining) / total < threshold:
+        return "failed"
+    return None
+
+
+def confidence_bound_verdict(scores: List[float], total: int, threshold: float, alpha: float) -> dict:
+    n = len(scores)
+    mean = float(np.mean(scores))
+    # Union bound over every n the rule may stop at keeps the bound valid under peeking
+    finite_population = max(1.0 - (n - 1) / total, 0.0)
+    half_width = math.sqrt(finite_population * math.log(2 * n * (n + 1) / alpha) / (2 * n))
+    verdict = None
+    if mean - half_width >= threshold:
+        verdict = "passed"
+    elif mean + half_width < threshold:
+        verdict = "failed"
+    return {"verdict": verdict, "mean": round(mean, 4), "half_width": round(half_width, 4)}
+
+
+def sprt_verdict(scores: List[float], threshold: float, alpha: float, indifference: float) -> dict:
+    x = np.asarray(scores, dtype=float)
+    variance = max(float(x.var(ddof=1)) if len(x) > 1 else 0.0, _SPRT_MIN_VARIANCE)
+    llr = 2 * indifference / variance * float((x - threshold).sum())
+    upper = math.log((1 - alpha) / alpha)
+    verdict = None
+    if llr >= upper:
+        verdict = "passed"
+    elif llr <= -upper:
+        verdict = "failed"
+    return {"verdict": verdict, "llr": round(llr, 4), "boundary": round(upper, 4)}
+
+
+# ─── Certification ─────────────────────────────────────────────
+
+def _case_result(tc: TestCase, outcome: dict, threshold: float) -> dict:
+    if outcome["status"] != "completed":
+        return {
+            "test_case_id": tc.id,
+            "test_case_name": tc.name,
+            "score": 0.0,
+            "decision": "error",
+            "error": outcome["error"] or outcome["status"],
+            "passed": False,
+        }
+    score = outcome["overall_score"] or 0.0
+    return {
+        "test_case_id": tc.id,
+        "test_case_name": tc.name,
+        "score": score,
+        "decision": outcome["decision"],
+        "passed": score >= threshold,
+    }
+
 
 async def certify_agent(db: AsyncSession, request: CertificationRequest, org_id: int) -> AgentCertification:
     """Run a test suite against an agent and produce certification."""
+    if request.sequential and request.sequential not in SEQUENTIAL_RULES:
+        raise ValueError(f"sequential must be one of {', '.join(SEQUENTIAL_RULES)}")
     suite = await test_suite_service.get_suite(db, request.test_suite_id, org_id)
     if not suite:
         raise ValueError("Test suite not found")
@@ -23,42 +108,68 @@ async def certify_agent(db: AsyncSession, request: CertificationRequest, org_id:
     if not test_cases:
         raise ValueError("Test suite has no test cases")
 
-    # Run each test case through evaluation
-    scores = []
-    case_results = []
-    for tc in test_cases:
-        content = tc.input_content.get("content", "")
-        modality = tc.input_content.get("modality", "text")
-        eval_req = EvalRequest(
+    threshold = suite.passing_threshold
+    alpha = request.alpha or settings.CERTIFICATION_ALPHA
+    total = len(test_cases)
+    order = list(range(total))
+    if request.sequential:
+        # The partial mean is only a sample of the suite's mean when cases run in random order
+        random.shuffle(order)
+
+    eval_reqs = [
+        EvalRequest(
             character_id=request.character_id,
-            content=content,
-            modality=modality,
+            content=test_cases[i].input_content.get("content", ""),
+            modality=test_cases[i].input_content.get("modality", "text"),
             agent_id=request.agent_id,
         )
-        try:
-            run = await evaluation_service.evaluate(db, eval_req, org_id)
-            score = run.overall_score or 0.0
-            scores.append(score)
-            case_results.append({
-                "test_case_id": tc.id,
-                "test_case_name": tc.name,
-                "score": score,
-                "decision": run.decision,
-                "passed": score >= suite.passing_threshold,
-            })
-        except Exception as e:
-            scores.append(0.0)
-            case_results.append({
-                "test_case_id": tc.id,
-                "test_case_name": tc.name,
-                "score": 0.0,
-                "decision": "error",
-                "error": str(e),
-                "passed": False,
-            })
-
-    avg_score = sum(scores) / len(scores) if scores else 0.0
-    passed = avg_score >= suite.passing_threshold
+        for i in order
+    ]
+    # The stopping rules see scores in sampled order: a case that finishes early waits
+    # in ``pending`` until every case sampled before it has finished
+    scores: List[float] = []
+    pending: dict = {}
+    stop: dict = {}
+
+    def settle() -> None:
+        verdict = exact_verdict(scores, total, threshold)
+        detail: dict = {}
+        if verdict is None and len(scores) >= settings.CERTIFICATION_MIN_CASES:
+            if request.sequential == "sprt":
+                detail = sprt_verdict(scores, threshold, alpha, settings.CERTIFICATION_SPRT_INDIFFERENCE)
+            else:
+                detail = confidence_bound_verdict(scores, total, threshold, alpha)
+            verdict = detail.pop("verdict")
+        if verdict is not None:
+            stop.update(detail, verdict=verdict, stopped_at=len(scores))
+
+    async def on_result(outcome: dict) -> None:
+        pending[outcome["index"]] = (outcome["overall_score"] or 0.0) if outcome["status"] == "completed" else 0.0
+        while len(scores) in pending:
+            scores.append(pending.pop(len(scores)))
+            if request.sequential and not stop:
+                settle()
+
+    outcomes = await evaluation_service.evaluate_batch(
+        db, eval_reqs, org_id,
+        concurrency=request.concurrency or settings.CERTIFICATION_CONCURRENCY,
+        on_result=on_result,
+        should_stop=lambda: bool(stop),
+    )
+
+    # Suite order; cases never started after an early stop are left out
+    by_case = {order[i]: outcome for i, outcome in enumerate(outcomes) if outcome is not None}
+    case_results = [_case_result(test_cases[i], by_case[i], threshold) for i in sorted(by_case)]
+    evaluated = len(case_results)
+    avg_score = sum(r["score"] for r in case_results) / evaluated if evaluated else 0.0
+    passed = stop["verdict"] == "passed" if stop else avg_score >= threshold
+
+    stopping_rule = {"rule": request.sequential or "full_suite", "stopped_early": bool(stop) and evaluated < total}
+    if request.sequential:
+        stopping_rule.update(alpha=alpha, min_cases=settings.CERTIFICATION_MIN_CASES)
+        if request.sequential == "sprt":
+            stopping_rule["indifference"] = settings.CERTIFICATION_SPRT_INDIFFERENCE
+        stopping_rule.update(stop)
     now = datetime.utcnow()
 
     cert = AgentCertification(
@@ -69,10 +180,13 @@ async def certify_agent(db: AsyncSession, request: CertificationRequest, org_id:
         status="passed" if passed else "failed",
         score=round(avg_score, 4),
         results_summary={
-            "total_cases": len(test_cases),
+            "total_cases": total,
+            "evaluated_cases": evaluated,
+            "skipped_cases": total - evaluated,
             "passed_cases": sum(1 for r in case_results if r.get("passed")),
             "avg_score": round(avg_score, 4),
-            "threshold": suite.passing_threshold,
+            "threshold": threshold,
+            "stopping_rule": stopping_rule,
             "case_results": case_results,
         },
         certified_at=now if passed else None,
@@ -0,0 +1,73 @@
+"""Change-point detectors for drift — constant-size state updated one score at a time.
+
+``drift_service`` standardizes each new score against its baseline
+(``u = (x - mean) / std``) and feeds it to the baseline's detector:
+
+- ``ewma`` — an EWMA control chart: alarms when the exponentially weighted mean of
+  ``u`` leaves ±``threshold`` times its (time-varying) standard error.
+- ``cusum`` — a two-sided tabular CUSUM with allowance ``DRIFT_CUSUM_K`` and
+  decision interval ``DRIFT_CUSUM_H``; accumulates small persistent shifts that a
+  windowed mean needs many runs to see.
+- ``page_hinkley`` — the Page-Hinkley test: cumulative deviation from the running
+  mean of ``u`` with tolerance ``DRIFT_PH_DELTA``, alarming past ``DRIFT_PH_LAMBDA``.
+
+A detector's state is a small dict of floats stored on the baseline
+(``DriftBaseline.detector_state``). Every update returns a new dict with the
+detector's own fields plus ``statistic``, ``limit`` and ``alarm``.
+"""
+from __future__ import annotations
+
+import math
+
+from app.core.config import settings
+
+DETECTORS = ("ewma", "cusum", "page_hinkley")
+
+
+def initial_state(detector: str) -> dict:
+    if detector == "cusum":
+        state = {"high": 0.0, "low": 0.0}
+    elif detector == "page_hinkley":
+        state = {"t": 0, "mean": 0.0, "up": 0.0, "up_min": 0.0, "down": 0.0, "down_max": 0.0}
+    else:
+        state = {"t": 0, "z": 0.0}
+    return {**state, "statistic": 0.0, "limit": 0.0, "alarm": False}
+
+
+def _ewma(state: dict, u: float, threshold: float) -> dict:
+    lam = settings.DRIFT_EWMA_ALPHA
+    t = state["t"] + 1
+    z = lam * u + (1 - lam) * state["z"]
+    limit = threshold * math.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * t)))
+    return {"t": t, "z": z, "statistic": abs(z), "limit": limit}
+
+
+def _cusum(state: dict, u: float, threshold: float) -> dict:
+    k = settings.DRIFT_CUSUM_K
+    high = max(0.0, state["high"] + u - k)
+    low = max(0.0, state["low"] - u - k)
+    return {"high": high, "low": low, "statistic": max(high, low), "limit": settings.DRIFT_CUSUM_H}
+
+
+def _page_hinkley(state: dict, u: float, threshold: float) -> dict:
+    delta = settings.DRIFT_PH_DELTA
+    t = state["t"] + 1
+    mean = state["mean"] + (u - state["mean"]) / t
+    up = state["up"] + u - mean - delta
+    down = state["down"] + u - mean + delta
+    up_min = min(state["up_min"], up)
+    down_max = max(state["down_max"], down)
+    return {
+        "t": t, "mean": mean, "up": up, "up_min": up_min, "down": down, "down_max": down_max,
+        "statistic": max(up - up_min, down_max - down), "limit": settings.DRIFT_PH_LAMBDA,
+    }
+
+
+_UPDATES = {"ewma": _ewma, "cusum": _cusum, "page_hinkley": _page_hinkley}
+
+
+def update(detector: str, state: dict, u: float, threshold: float) -> dict:
+    """Feed one standardized score; returns the detector's next state."""
+    state = _UPDATES[detector](state, u, threshold)
+    state["alarm"] = state["statistic"] > state["limit"]
+    return state
@@ -0,0 +1,112 @@
+"""Comparison history — one row per comparison, read newest first by org.
+
+Rows are indexed by (org, created_at, id) and read with keyset pagination: a page
+starts after the ``before`` entry instead of at an offset. Each new comparison
+prunes the org's history to its retention window and entry cap; orgs can override
+both through their ``compare_history_retention_days`` and
+``compare_history_max_entries`` settings.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import ComparisonRecord, Organization
+
+MAX_PAGE_SIZE = 200
+
+# Entry keys stored in their own columns rather than in ``details``
+_COLUMNS = ("mode", "score_diff", "decisions_match", "user_id", "org_id", "created_at")
+
+
+async def record(db: AsyncSession, entry: dict) -> ComparisonRecord:
+    """Store a comparison entry (``mode``, ``org_id``, ``user_id``, … as built by the compare routes)."""
+    row = ComparisonRecord(
+        mode=entry["mode"],
+        score_diff=entry.get("score_diff"),
+        decisions_match=entry.get("decisions_match"),
+        details={k: v for k, v in entry.items() if k not in _COLUMNS},
+        user_id=entry.get("user_id"),
+        org_id=entry["org_id"],
+    )
+    db.add(row)
+    await db.flush()
+    await enforce_retention(db, entry["org_id"])
+    return row
+
+
+async def _retention(db: AsyncSession, org_id: int) -> tuple:
+    org = await db.get(Organization, org_id)
+    org_settings = (org.settings if org else None) or {}
+    days = org_settings.get("compare_history_retention_days") or settings.COMPARE_HISTORY_RETENTION_DAYS
+    max_entries = org_settings.get("compare_history_max_entries") or settings.COMPARE_HISTORY_MAX_ENTRIES
+    return int(days), int(max_entries)
+
+
+async def enforce_retention(db: AsyncSession, org_id: int) -> None:
+    """Delete the org's entries older than its retention window or beyond its entry cap."""
+    days, max_entries = await _retention(db, org_id)
+    conditions = [ComparisonRecord.created_at < datetime.utcnow() - timedelta(days=days)]
+
+    # The newest entry past the cap; it and everything older goes
+    oldest_kept = (await db.execute(
+        select(ComparisonRecord.created_at, ComparisonRecord.id)
+        .where(ComparisonRecord.org_id == org_id)
+        .order_by(ComparisonRecord.created_at.desc(), ComparisonRecord.id.desc())
+        .offset(max_entries).limit(1)
+    )).first()
+    if oldest_kept:
+        conditions.append(_at_or_before(*oldest_kept))
+
+    await db.execute(
+        delete(ComparisonRecord).where(ComparisonRecord.org_id == org_id, or_(*conditions))
+    )
+
+
+def _before(created_at: datetime, record_id: int):
+    return or_(
+        ComparisonRecord.created_at < created_at,
+        and_(ComparisonRecord.created_at == created_at, ComparisonRecord.id < record_id),
+    )
+
+
+def _at_or_before(created_at: datetime, record_id: int):
+    return or_(_before(created_at, record_id), ComparisonRecord.id == record_id)
+
+
+async def list_history(
+    db: AsyncSession, org_id: int, limit: int = 20, before: Optional[int] = None,
+) -> List[ComparisonRecord]:
+    """The org's comparisons, newest first; ``before`` is the id of the last entry of the previous page."""
+    q = select(ComparisonRecord).where(ComparisonRecord.org_id == org_id)
+    if before is not None:
+        cursor = (await db.execute(
+            select(ComparisonRecord.created_at, ComparisonRecord.id).where(
+                ComparisonRecord.id == before, ComparisonRecord.org_id == org_id,
+            )
+        )).first()
+        if cursor is None:
+            return []
+        q = q.where(_before(*cursor))
+    result = await db.execute(
+        q.order_by(ComparisonRecord.created_at.desc(), ComparisonRecord.id.desc())
+        .limit(max(1, min(limit, MAX_PAGE_SIZE)))
+    )
+    return list(result.scalars().all())
+
+
+def record_to_dict(row: ComparisonRecord) -> dict:
+    return {
+        "id": row.id,
+        "mode": row.mode,
+        **(row.details or {}),
+        "score_diff": row.score_diff,
+        "decisions_match": row.decisions_match,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "user_id": row.user_id,
+        "org_id": row.org_id,
+    }
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import hashlib
 import json
 import time
+from contextvars import ContextVar
 from typing import Optional, List, Tuple
 
 from sqlalchemy import select
@@ -14,9 +17,12 @@ from app.models.core import (
     CriticConfiguration,
     EvaluationProfile,
     CardVersion,
+    CustomJudge,
 )
 from app.schemas.critics import CriticCreate, CriticUpdate, CriticConfigCreate, EvaluationProfileCreate
-from app.core.llm import call_llm_json, call_both_llms_json
+from app.core.config import settings
+from app.core.llm import call_llm_json, call_both_llms_json, call_provider_json
+from app.services import judge_registry_service, model_routing_service
 
 
 # ─── Critic CRUD ────────────────────────────────────────────────
@@ -123,6 +129,19 @@ async def create_profile(db: AsyncSession, data: EvaluationProfileCreate, org_id
         tiered_evaluation=data.tiered_evaluation,
         rapid_screen_critics=data.rapid_screen_critics,
         deep_eval_critics=data.deep_eval_critics,
+        judge_mode=data.judge_mode,
+        judge_confidence_threshold=data.judge_confidence_threshold,
+        judge_boundary_margin=data.judge_boundary_margin,
+        escalation_judge_id=data.escalation_judge_id,
+        routing_policy=data.routing_policy,
+        routing_pinned_model=data.routing_pinned_model,
+        routing_reference_model=data.routing_reference_model,
+        routing_min_agreement=data.routing_min_agreement,
+        prescreen_mode=data.prescreen_mode,
+        predictor_mode=data.predictor_mode,
+        predictor_audit_rate=data.predictor_audit_rate,
+        near_duplicate_mode=data.near_duplicate_mode,
+        near_duplicate_threshold=data.near_duplicate_threshold,
     )
     db.add(profile)
     await db.flush()
@@ -192,19 +211,30 @@ def _estimate_cost(token_usage: dict) -> float:
     completion_tokens = token_usage.get("completion_tokens", 0)
 
     input_price, output_price = _MODEL_PRICING.get(model, (0.15, 0.60))
+    return _price_tokens((input_price, output_price), prompt_tokens, completion_tokens)
+
+
+def _price_tokens(pricing: Tuple[float, float], prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = pricing
     cost = (prompt_tokens * input_price / 1_000_000) + (completion_tokens * output_price / 1_000_000)
     return round(cost, 8)
 
 
+def _judge_pricing(judge: CustomJudge) -> Tuple[float, float]:
+    """(input, output) price per 1M tokens from a CustomJudge's pricing dict."""
+    pricing = judge.pricing or {}
+    return (float(pricing.get("input_per_1m", 0.15)), float(pricing.get("output_per_1m", 0.60)))
+
+
 # ─── Parallel Critic Dispatch ──────────────────────────────────
 
-async def run_critic(
+def _critic_prompts(
     critic: Critic,
     card_version: CardVersion,
     content: str,
     extra_instructions: str = "",
-) -> dict:
-    """Run a single critic against content. Returns score, confidence, reasoning, flags, and token usage."""
+) -> Tuple[str, str]:
+    """Build the (system, user) prompt pair every judge receives for a critic."""
     system_prompt = assemble_prompt(
         critic.prompt_template, card_version, content, extra_instructions
     )
@@ -215,11 +245,68 @@ Content to evaluate:
 
 Respond with JSON:
 {{"score": <float 0-1>, "confidence": <float 0.0-1.0>, "reasoning": "<explanation>", "flags": [<list of issues>]}}"""
+    return system_prompt, user_prompt
+
+
+def call_key(
+    critic: Critic,
+    card_version: CardVersion,
+    content: str,
+    extra_instructions: str = "",
+    model: Optional[str] = None,
+    temperature: float = 0.0,
+) -> str:
+    """Identity of a ``run_critic`` call — same prompts, model and temperature."""
+    system_prompt, user_prompt = _critic_prompts(critic, card_version, content, extra_instructions)
+    payload = json.dumps([system_prompt, user_prompt, model or settings.PRIMARY_LLM, temperature])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Calls in flight or done within a ``shared_calls()`` scope, by ``call_key``
+_shared_calls: ContextVar[Optional[dict]] = ContextVar("critic_shared_calls", default=None)
+
+
+@contextlib.contextmanager
+def shared_calls():
+    """Within the block, identical single-judge critic calls run once and share their result.
+
+    Tasks started inside the block share it too. Every copy of a shared result but
+    the first records ``shared`` and zero cost, so the call is only costed once.
+    """
+    token = _shared_calls.set({})
+    try:
+        yield
+    finally:
+        _shared_calls.reset(token)
+
+
+async def _run_critic_shared(critic: Critic, card_version: CardVersion, content: str, extra_instructions: str = "") -> dict:
+    calls = _shared_calls.get()
+    if calls is None:
+        return await run_critic(critic, card_version, content, extra_instructions)
+    key = call_key(critic, card_version, content, extra_instructions)
+    owner = key not in calls
+    if owner:
+        calls[key] = asyncio.ensure_future(run_critic(critic, card_version, content, extra_instructions))
+    result = await calls[key]
+    return result if owner else {**result, "estimated_cost": 0.0, "shared": True}
+
+
+async def run_critic(
+    critic: Critic,
+    card_version: CardVersion,
+    content: str,
+    extra_instructions: str = "",
+) -> dict:
+    """Run a single critic against content. Returns score, confidence, reasoning, flags, and token usage."""
+    system_prompt, user_prompt = _critic_prompts(critic, card_version, content, extra_instructions)
 
     start = time.monotonic()
     try:
         result, token_usage = await call_llm_json(system_prompt, user_prompt, _return_usage=True)
         latency = int((time.monotonic() - start) * 1000)
+        cost = _estimate_cost(token_usage)
+        model_routing_service.record_call(token_usage.get("model", "unknown"), latency, False, cost)
         return {
             "score": float(result.get("score", 0)),
             "confidence": float(result.get("confidence", 1.0)),
@@ -229,7 +316,7 @@ Respond with JSON:
             "prompt_tokens": token_usage.get("prompt_tokens", 0),
             "completion_tokens": token_usage.get("completion_tokens", 0),
             "model_used": token_usage.get("model", "unknown"),
-            "estimated_cost": _estimate_cost(token_usage),
+            "estimated_cost": cost,
         }
     except Exception as e:
         latency = int((time.monotonic() - start) * 1000)
@@ -258,16 +345,7 @@ async def run_critic_multi_judge(
     both judges. Flags are combined (union). If the two judges disagree by more
     than 0.3 on score, a 'judge_disagreement' flag is added.
     """
-    system_prompt = assemble_prompt(
-        critic.prompt_template, card_version, content, extra_instructions
-    )
-    user_prompt = f"""Evaluate the following content for character fidelity.
-
-Content to evaluate:
-{content}
-
-Respond with JSON:
-{{"score": <float 0-1>, "confidence": <float 0.0-1.0>, "reasoning": "<explanation>", "flags": [<list of issues>]}}"""
+    system_prompt, user_prompt = _critic_prompts(critic, card_version, content, extra_instructions)
 
     start = time.monotonic()
     try:
@@ -327,11 +405,267 @@ Respond with JSON:
         }
 
 
+def _route_keyed_scores(judge_scores: dict) -> dict:
+    """Map run_critic_multi_judge's provider-keyed scores onto routing keys."""
+    provider_models = {provider: model for model, provider in model_routing_service.BUILTIN_ROUTES.items()}
+    return {provider_models.get(k, k): v for k, v in judge_scores.items()}
+
+
+def _parse_judge_json(text: str) -> dict:
+    """Parse a judge's JSON verdict, tolerating prose around the object."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
+
+def _second_opinion_provider(first_model: str) -> str:
+    """The built-in provider that did NOT produce the first verdict."""
+    return "openai" if first_model.startswith("claude") else "anthropic"
+
+
+def _second_opinion_pricing(first_model: str, escalation_judge: Optional[CustomJudge]) -> Tuple[float, float]:
+    if escalation_judge is not None:
+        return _judge_pricing(escalation_judge)
+    if _second_opinion_provider(first_model) == "openai":
+        return _MODEL_PRICING["gpt-4o-mini"]
+    return _MODEL_PRICING["claude-3-haiku-20240307"]
+
+
+def _custom_judge_usage(system_prompt: str, user_prompt: str, text: str, model: str) -> dict:
+    # Custom endpoints don't report usage; approximate at ~4 characters per token
+    return {
+        "prompt_tokens": (len(system_prompt) + len(user_prompt)) // 4,
+        "completion_tokens": len(text) // 4,
+        "model": model,
+    }
+
+
+async def _call_second_judge(
+    system_prompt: str,
+    user_prompt: str,
+    first: dict,
+    escalation_judge: Optional[CustomJudge],
+) -> Tuple[dict, dict, str]:
+    """Ask the second judge. Returns (verdict, token_usage, route_key)."""
+    if escalation_judge is not None:
+        text = await judge_registry_service.call_custom_judge(escalation_judge, system_prompt, user_prompt)
+        token_usage = _custom_judge_usage(
+            system_prompt, user_prompt, text, escalation_judge.model_name or escalation_judge.slug,
+        )
+        return _parse_judge_json(text), token_usage, model_routing_service.judge_route_key(escalation_judge)
+
+    provider = _second_opinion_provider(first.get("model_used", ""))
+    verdict, token_usage = await call_provider_json(provider, system_prompt, user_prompt)
+    return verdict, token_usage, token_usage.get("model", provider)
+
+
+async def run_critic_adaptive(
+    critic: Critic,
+    card_version: CardVersion,
+    content: str,
+    extra_instructions: str = "",
+    confidence_threshold: Optional[float] = None,
+    boundary_margin: Optional[float] = None,
+    escalation_judge: Optional[CustomJudge] = None,
+) -> dict:
+    """Run a critic through one judge, escalating to a second judge only when unsure.
+
+    The first verdict is kept when its confidence is at least ``confidence_threshold``
+    and its score is not within ``boundary_margin`` of a decision boundary. Otherwise
+    a second judge (``escalation_judge`` if given, else the other built-in provider)
+    is asked and both verdicts are aggregated as in run_critic_multi_judge.
+
+    Every result carries ``escalated``, ``judge_calls`` and ``saved_cost`` (the
+    estimated price of the second-judge call that was skipped) for usage accounting.
+    """
+    from app.services.evaluation_service import near_decision_boundary
+
+    if confidence_threshold is None:
+        confidence_threshold = settings.ADAPTIVE_JUDGE_CONFIDENCE_THRESHOLD
+    if boundary_margin is None:
+        boundary_margin = settings.ADAPTIVE_JUDGE_BOUNDARY_MARGIN
+
+    first = await run_critic(critic, card_version, content, extra_instructions)
+    first_model = first.get("model_used", "unknown")
+
+    first_failed = "critic_error" in first["flags"]
+    if (
+        not first_failed
+        and first["confidence"] >= confidence_threshold
+        and not near_decision_boundary(first["score"], boundary_margin)
+    ):
+        saved = _price_tokens(
+            _second_opinion_pricing(first_model, escalation_judge),
+            first.get("prompt_tokens", 0),
+            first.get("completion_tokens", 0),
+        )
+        return {**first, "judge_mode": "adaptive", "escalated": False, "judge_calls": 1, "saved_cost": saved}
+
+    system_prompt, user_prompt = _critic_prompts(critic, card_version, content, extra_instructions)
+    start = time.monotonic()
+    try:
+        second, second_usage, second_label = await _call_second_judge(
+            system_prompt, user_prompt, first, escalation_judge
+        )
+    except Exception as e:
+        # No second opinion available — keep the first verdict as-is
+        return {
+            **first,
+            "flags": first["flags"] + ["escalation_failed"],
+            "reasoning": f"{first['reasoning']} [Escalation failed: {str(e)}]",
+            "latency_ms": first["latency_ms"] + int((time.monotonic() - start) * 1000),
+            "judge_mode": "adaptive",
+            "escalated": True,
+            "judge_calls": 2,
+            "saved_cost": 0.0,
+        }
+    second_latency = int((time.monotonic() - start) * 1000)
+
+    if escalation_judge is not None:
+        second_cost = _price_tokens(
+            _judge_pricing(escalation_judge),
+            second_usage.get("prompt_tokens", 0),
+            second_usage.get("completion_tokens", 0),
+        )
+    else:
+        second_cost = _estimate_cost(second_usage)
+    model_routing_service.record_call(second_label, second_latency, False, second_cost)
+
+    second_score = float(second.get("score", 0))
+    second_confidence = float(second.get("confidence", 1.0))
+    second_flags = second.get("flags", [])
+
+    if first_failed:
+        # The first judge errored out, so the second verdict stands alone
+        score, confidence = second_score, second_confidence
+        combined_flags = list(second_flags)
+        score_diff = None
+    else:
+        score = (first["score"] + second_score) / 2.0
+        confidence = (first["confidence"] + second_confidence) / 2.0
+        combined_flags = list(set(first["flags"] + second_flags))
+        score_diff = abs(first["score"] - second_score)
+        if score_diff > 0.3:
+            combined_flags.append("judge_disagreement")
+
+    reasoning = (
+        f"[Adaptive Multi-Judge] {first_model} score: {first['score']:.2f} "
+        f"(confidence {first['confidence']:.2f}), {second_label} score: {second_score:.2f}"
+        + (f", Difference: {score_diff:.2f}" if score_diff is not None else "")
+        + f". {first_model} reasoning: {first['reasoning']} | "
+        f"{second_label} reasoning: {second.get('reasoning', 'N/A')}"
+    )
+
+    return {
+        "score": score,
+        "confidence": confidence,
+        "reasoning": reasoning,
+        "flags": combined_flags,
+        "latency_ms": first["latency_ms"] + second_latency,
+        "prompt_tokens": first.get("prompt_tokens", 0) + second_usage.get("prompt_tokens", 0),
+        "completion_tokens": first.get("completion_tokens", 0) + second_usage.get("completion_tokens", 0),
+        "model_used": f"{first_model}+{second_label}",
+        "estimated_cost": round(first.get("estimated_cost", 0.0) + second_cost, 8),
+        "multi_judge": True,
+        "judge_scores": (
+            {second_label: second_score} if first_failed
+            else {first_model: first["score"], second_label: second_score}
+        ),
+        "judge_mode": "adaptive",
+        "escalated": True,
+        "judge_calls": 2,
+        "saved_cost": 0.0,
+    }
+
+
+async def _call_route(
+    route_key: str,
+    judge: Optional[CustomJudge],
+    system_prompt: str,
+    user_prompt: str,
+) -> Tuple[dict, dict, float]:
+    """Call one routing target. Returns (verdict, token_usage, estimated_cost)."""
+    if judge is not None:
+        text = await judge_registry_service.call_custom_judge(judge, system_prompt, user_prompt)
+        token_usage = _custom_judge_usage(system_prompt, user_prompt, text, route_key)
+        cost = _price_tokens(_judge_pricing(judge), token_usage["prompt_tokens"], token_usage["completion_tokens"])
+        return _parse_judge_json(text), token_usage, cost
+
+    provider = model_routing_service.BUILTIN_ROUTES[route_key]
+    verdict, token_usage = await call_provider_json(provider, system_prompt, user_prompt, model=route_key)
+    return verdict, token_usage, _estimate_cost(token_usage)
+
+
+async def run_critic_routed(
+    critic: Critic,
+    card_version: CardVersion,
+    content: str,
+    extra_instructions: str = "",
+    route: Optional[dict] = None,
+) -> dict:
+    """Run a critic on the route picked by model_routing_service.choose_route.
+
+    If the routed call fails, the error is recorded against the route and the critic
+    falls back to run_critic's default provider chain. When the route plan carries an
+    ``audit_route``, the reference judge also scores the call so the routed model's
+    agreement is measured (its tokens and cost are included in the result).
+    """
+    route_key = route["route"]
+    system_prompt, user_prompt = _critic_prompts(critic, card_version, content, extra_instructions)
+
+    start = time.monotonic()
+    try:
+        verdict, token_usage, cost = await _call_route(route_key, route["judge"], system_prompt, user_prompt)
+    except Exception:
+        model_routing_service.record_call(route_key, int((time.monotonic() - start) * 1000), True, 0.0)
+        result = await run_critic(critic, card_version, content, extra_instructions)
+        return {**result, "flags": result["flags"] + ["route_fallback"], "routed_to": route_key}
+    latency = int((time.monotonic() - start) * 1000)
+    model_routing_service.record_call(route_key, latency, False, cost)
+
+    result = {
+        "score": float(verdict.get("score", 0)),
+        "confidence": float(verdict.get("confidence", 1.0)),
+        "reasoning": verdict.get("reasoning", ""),
+        "flags": verdict.get("flags", []),
+        "latency_ms": latency,
+        "prompt_tokens": token_usage.get("prompt_tokens", 0),
+        "completion_tokens": token_usage.get("completion_tokens", 0),
+        "model_used": route_key,
+        "estimated_cost": cost,
+        "routed_to": route_key,
+    }
+
+    audit_route = route.get("audit_route")
+    if audit_route and audit_route != route_key:
+        try:
+            audit_verdict, audit_usage, audit_cost = await _call_route(
+                audit_route, route.get("audit_judge"), system_prompt, user_prompt
+            )
+        except Exception:
+            return result
+        audit_score = float(audit_verdict.get("score", 0))
+        model_routing_service.record_agreement(route_key, audit_route, result["score"], audit_score)
+        result["prompt_tokens"] += audit_usage.get("prompt_tokens", 0)
+        result["completion_tokens"] += audit_usage.get("completion_tokens", 0)
+        result["estimated_cost"] = round(cost + audit_cost, 8)
+        result["routing_audit"] = {"reference": audit_route, "reference_score": audit_score}
+    return result
+
+
 async def run_critics_parallel(
     critics_with_config: List[Tuple[Critic, Optional[CriticConfiguration]]],
     card_version: CardVersion,
     content: str,
     multi_judge: bool = False,
+    profile: Optional[EvaluationProfile] = None,
+    escalation_judge: Optional[CustomJudge] = None,
+    routing_judges: Optional[List[CustomJudge]] = None,
+    org_id: Optional[int] = None,
 ) -> List[dict]:
     """Run multiple critics in parallel and return results.
 
@@ -341,15 +675,51 @@ async def run_critics_parallel(
         content: The content string to evaluate.
         multi_judge: When True, each critic is run through both OpenAI and Anthropic
                      via run_critic_multi_judge instead of the single-provider run_critic.
+        profile: Optional EvaluationProfile whose judge_mode ("single", "multi",
+                 "adaptive") and adaptive thresholds select the judging strategy.
+        escalation_judge: CustomJudge used as the second opinion in adaptive mode.
+        routing_judges: Custom judges eligible as routing targets when the profile
+                        sets a routing_policy (single-judge mode only).
+        org_id: The org whose routing stats the calls are recorded to.
     """
-    dispatch_fn = run_critic_multi_judge if multi_judge else run_critic
-
-    tasks = []
-    for critic, config in critics_with_config:
-        extra = config.extra_instructions if config and config.extra_instructions else ""
-        tasks.append(dispatch_fn(critic, card_version, content, extra))
+    judge_mode = (profile.judge_mode if profile else None) or "single"
+    if multi_judge:
+        judge_mode = "multi"
+    routed = (
+        judge_mode == "single"
+        and profile is not None
+        and profile.routing_policy in model_routing_service.ROUTING_POLICIES
+    )
 
-    results = await asyncio.gather(*tasks)
+    def dispatch(critic: Critic, extra: str):
+        if judge_mode == "multi":
+            return run_critic_multi_judge(critic, card_version, content, extra)
+        if judge_mode == "adaptive":
+            return run_critic_adaptive(
+                critic, card_version, content, extra,
+                confidence_threshold=profile.judge_confidence_threshold if profile else None,
+                boundary_margin=profile.judge_boundary_margin if profile else None,
+                escalation_judge=escalation_judge,
+            )
+        if routed:
+            route = model_routing_service.choose_route(profile, routing_judges or [])
+            return run_critic_routed(critic, card_version, content, extra, route)
+        return _run_critic_shared(critic, card_version, content, extra)
+
+    with model_routing_service.org_scope(org_id):
+        tasks = []
+        for critic, config in critics_with_config:
+            extra = config.extra_instructions if config and config.extra_instructions else ""
+            tasks.append(dispatch(critic, extra))
+
+        results = await asyncio.gather(*tasks)
+
+        # Whenever two judges scored the same call, feed agreement into routing stats
+        reference = model_routing_service.reference_route(profile, routing_judges)
+        for result in results:
+            judge_scores = result.get("judge_scores")
+            if judge_scores and not {"critic_error", "provider_error"} & set(result.get("flags", [])):
+                model_routing_service.record_judge_scores(_route_keyed_scores(judge_scores), reference)
 
     # Attach critic metadata to results
     enriched = []
@@ -0,0 +1,398 @@
+"""Local decision predictor — a per-character (or per-franchise) classifier over past evals.
+
+Content is turned into hashed word unigram/bigram features and a multinomial logistic
+regression is fit with NumPy on completed, critic-judged EvalRuns. A fifth of the data
+is held out to calibrate ``confidence_threshold``: the lowest predicted probability at
+which ``pass``/``block`` predictions reached ``PREDICTOR_TARGET_PRECISION`` on the
+holdout. Profiles use the predictor through ``predictor_mode``:
+
+- ``shadow`` — record the prediction on the EvalRun, always run critics.
+- ``skip`` — complete confident ``pass``/``block`` predictions without critics, except
+  for a ``predictor_audit_rate`` share that is still fully evaluated so accuracy keeps
+  being measured (see ``get_accuracy``).
+
+Fitting and calibration run in a worker thread. Each training run writes a new
+DecisionPredictor version; weights are stored as an
+``np.savez`` artifact and only loaded into memory the first time a version predicts.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, List
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.core.config import settings
+from app.models.core import DecisionPredictor, EvalRun
+from app.services.near_duplicate_service import NON_CRITIC_TIERS
+
+PREDICTOR_MODES = ("shadow", "skip")
+
+# Decisions the predictor may act on without critics
+SKIPPABLE_DECISIONS = ("pass", "block")
+
+_TOKEN_RE = re.compile(r"\w+")
+_EPOCHS = 8
+_BATCH_SIZE = 256
+_LEARNING_RATE = 0.5
+_L2 = 1e-4
+_HOLDOUT_SHARE = 0.2
+_MIN_CALIBRATION_SUPPORT = 20  # holdout predictions needed above a threshold to trust it
+
+_CACHE_SIZE = 64
+# {predictor_id: (weights, bias)}
+_loaded: OrderedDict = OrderedDict()
+
+
+# ─── Features ──────────────────────────────────────────────────
+
+def content_text(input_content) -> str:
+    """The text of an EvalRun's ``input_content`` (``{"content": ...}``)."""
+    content = (input_content or {}).get("content", "") if isinstance(input_content, dict) else input_content
+    return content if isinstance(content, str) else str(content or "")
+
+
+def feature_ids(text: str, n_features: int) -> np.ndarray:
+    """Hashed bucket ids of the word unigrams and bigrams of ``text`` (deduplicated)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    # crc32 rather than hash(): bucket ids must be stable across processes
+    ids = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+    return np.unique(ids % n_features)
+
+
+def _design_matrix(rows: List[np.ndarray], n_features: int) -> np.ndarray:
+    """Dense, L2-normalized binary feature matrix for a batch of feature-id rows."""
+    X = np.zeros((len(rows), n_features), dtype=np.float32)
+    for i, ids in enumerate(rows):
+        if len(ids):
+            X[i, ids] = 1.0 / np.sqrt(len(ids))
+    return X
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+# ─── Training ──────────────────────────────────────────────────
+
+def fit(rows: List[np.ndarray], labels: np.ndarray, n_classes: int, n_features: int, seed: int = 0):
+    """Mini-batch gradient descent for L2-regularized multinomial logistic regression."""
+    rng = np.random.default_rng(seed)
+    W = np.zeros((n_features, n_classes), dtype=np.float32)
+    b = np.zeros(n_classes, dtype=np.float32)
+    for _ in range(_EPOCHS):
+        order = rng.permutation(len(rows))
+        for start in range(0, len(order), _BATCH_SIZE):
+            idx = order[start:start + _BATCH_SIZE]
+            X = _design_matrix([rows[i] for i in idx], n_features)
+            grad = _softmax(X @ W + b)
+            grad[np.arange(len(idx)), labels[idx]] -= 1.0
+            grad /= len(idx)
+            W -= _LEARNING_RATE * (X.T @ grad + _L2 * W)
+            b -= _LEARNING_RATE * grad.sum(axis=0)
+    return W, b
+
+
+def predict_proba(W: np.ndarray, b: np.ndarray, rows: List[np.ndarray]) -> np.ndarray:
+    n_features = W.shape[0]
+    out = []
+    for start in range(0, len(rows), _BATCH_SIZE):
+        out.append(_softmax(_design_matrix(rows[start:start + _BATCH_SIZE], n_features) @ W + b))
+    return np.vstack(out) if out else np.zeros((0, W.shape[1]), dtype=np.float32)
+
+
+def calibrate(proba: np.ndarray, labels: np.ndarray, classes: List[str]) -> dict:
+    """Lowest confidence at which skippable predictions meet the target holdout precision."""
+    predicted = proba.argmax(axis=1)
+    confidence = proba.max(axis=1)
+    skippable = np.isin(np.array(classes)[predicted], SKIPPABLE_DECISIONS)
+    metrics = {
+        "holdout_samples": int(len(labels)),
+        "holdout_accuracy": round(float((predicted == labels).mean()), 4) if len(labels) else None,
+        "confidence_threshold": None,
+        "precision_at_threshold": None,
+        "coverage_at_threshold": 0.0,
+    }
+    for threshold in np.arange(0.5, 1.0, 0.01):
+        selected = skippable & (confidence >= threshold)
+        if selected.sum() < _MIN_CALIBRATION_SUPPORT:
+            break
+        precision = float((predicted[selected] == labels[selected]).mean())
+        if precision >= settings.PREDICTOR_TARGET_PRECISION:
+            metrics.update(
+                confidence_threshold=round(float(threshold), 2),
+                precision_at_threshold=round(precision, 4),
+                coverage_at_threshold=round(float(selected.mean()), 4),
+            )
+            break
+    return metrics
+
+
+def _serialize(W: np.ndarray, b: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.savez_compressed(buf, weights=W, bias=b)
+    return buf.getvalue()
+
+
+def _deserialize(artifact: bytes):
+    data = np.load(io.BytesIO(artifact))
+    return data["weights"], data["bias"]
+
+
+async def _training_data(db: AsyncSession, org_id: int, character_id: Optional[int], franchise_id: Optional[int]):
+    query = select(EvalRun.input_content, EvalRun.decision, EvalRun.overall_score).where(
+        EvalRun.org_id == org_id,
+        EvalRun.status == "completed",
+        EvalRun.decision.isnot(None),
+        EvalRun.decision != "sampled-pass",
+        EvalRun.overall_score.isnot(None),
+        EvalRun.tier.notin_(NON_CRITIC_TIERS),
+    )
+    if character_id:
+        query = query.where(EvalRun.character_id == character_id)
+    else:
+        query = query.where(EvalRun.franchise_id == franchise_id)
+    query = query.order_by(EvalRun.id.desc()).limit(settings.PREDICTOR_MAX_SAMPLES)
+    return (await db.execute(query)).all()
+
+
+def _scope(character_id: Optional[int], franchise_id: Optional[int]):
+    if character_id:
+        return DecisionPredictor.character_id == character_id
+    return (DecisionPredictor.franchise_id == franchise_id) & DecisionPredictor.character_id.is_(None)
+
+
+async def create_predictor(
+    db: AsyncSession, org_id: int, character_id: Optional[int] = None, franchise_id: Optional[int] = None,
+) -> DecisionPredictor:
+    """Register a new predictor version in ``training`` status (trained by ``train_predictor``)."""
+    if not character_id and not franchise_id:
+        raise ValueError("character_id or franchise_id is required")
+    latest = (await db.execute(
+        select(func.max(DecisionPredictor.version)).where(
+            DecisionPredictor.org_id == org_id, _scope(character_id, franchise_id),
+        )
+    )).scalar() or 0
+    predictor = DecisionPredictor(
+        character_id=character_id,
+        franchise_id=None if character_id else franchise_id,
+        version=latest + 1,
+        status="training",
+        n_features=settings.PREDICTOR_N_FEATURES,
+        org_id=org_id,
+    )
+    db.add(predictor)
+    await db.flush()
+    await db.refresh(predictor)
+    return predictor
+
+
+def _fit_and_calibrate(samples: List[tuple], classes: List[str], n_features: int, seed: int):
+    """Hash features, fit on 4/5 of ``(content, decision, score)`` samples and calibrate on the rest.
+
+    Returns ``(W, b, metrics, class_scores)``. Pure NumPy, safe to run in a worker thread.
+    """
+    class_index = {c: i for i, c in enumerate(classes)}
+    features = [feature_ids(content_text(content), n_features) for content, _, _ in samples]
+    labels = np.array([class_index[decision] for _, decision, _ in samples], dtype=np.int64)
+    scores = np.array([score for _, _, score in samples], dtype=np.float64)
+
+    order = np.random.default_rng(seed).permutation(len(samples))
+    n_holdout = max(int(len(samples) * _HOLDOUT_SHARE), 1)
+    holdout, train = order[:n_holdout], order[n_holdout:]
+
+    W, b = fit([features[i] for i in train], labels[train], len(classes), n_features)
+    metrics = calibrate(predict_proba(W, b, [features[i] for i in holdout]), labels[holdout], classes)
+    class_scores = {c: round(float(scores[labels == i].mean()), 4) for c, i in class_index.items()}
+    return W, b, metrics, class_scores
+
+
+async def train_predictor(db: AsyncSession, predictor_id: int) -> DecisionPredictor:
+    """Fit, calibrate and publish a predictor version; earlier ready versions are retired."""
+    predictor = await db.get(DecisionPredictor, predictor_id)
+    if not predictor:
+        raise ValueError("Predictor not found")
+
+    rows = await _training_data(db, predictor.org_id, predictor.character_id, predictor.franchise_id)
+    if len(rows) < settings.PREDICTOR_MIN_SAMPLES:
+        predictor.status = "failed"
+        predictor.error = f"Need at least {settings.PREDICTOR_MIN_SAMPLES} evaluated runs, found {len(rows)}"
+        await db.flush()
+        return predictor
+
+    classes = sorted({r.decision for r in rows})
+    if len(classes) < 2:
+        predictor.status = "failed"
+        predictor.error = "Training data contains a single decision"
+        await db.flush()
+        return predictor
+
+    # CPU-bound: keep it off the event loop so requests aren't blocked while it trains
+    W, b, metrics, class_scores = await asyncio.to_thread(
+        _fit_and_calibrate,
+        [(r.input_content, r.decision, r.overall_score) for r in rows],
+        classes, predictor.n_features, predictor.version,
+    )
+
+    predictor.classes = classes
+    predictor.class_scores = class_scores
+    predictor.confidence_threshold = metrics["confidence_threshold"]
+    predictor.training_samples = len(rows)
+    predictor.metrics = metrics
+    predictor.artifact = _serialize(W, b)
+    predictor.status = "ready"
+    predictor.trained_at = datetime.utcnow()
+
+    previous = await db.execute(
+        select(DecisionPredictor).options(defer(DecisionPredictor.artifact)).where(
+            DecisionPredictor.org_id == predictor.org_id,
+            _scope(predictor.character_id, predictor.franchise_id),
+            DecisionPredictor.status == "ready",
+            DecisionPredictor.id != predictor.id,
+        )
+    )
+    for old in previous.scalars().all():
+        old.status = "retired"
+        _loaded.pop(old.id, None)
+    await db.flush()
+    return predictor
+
+
+async def train_in_background(predictor_id: int) -> None:
+    """Background task entry point: trains in its own session and commits."""
+    from app.core.database import async_session
+
+    async with async_session() as db:
+        try:
+            await train_predictor(db, predictor_id)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            predictor = await db.get(DecisionPredictor, predictor_id)
+            if predictor:
+                predictor.status = "failed"
+                predictor.error = str(e)[:2000]
+                await db.commit()
+
+
+# ─── Prediction ────────────────────────────────────────────────
+
+async def get_active_predictor(
+    db: AsyncSession, org_id: int, character_id: int, franchise_id: Optional[int] = None,
+) -> Optional[DecisionPredictor]:
+    """The ready predictor for a character, falling back to its franchise-wide predictor."""
+    base = select(DecisionPredictor).options(defer(DecisionPredictor.artifact)).where(
+        DecisionPredictor.org_id == org_id, DecisionPredictor.status == "ready",
+    )
+    predictor = (await db.execute(
+        base.where(DecisionPredictor.character_id == character_id)
+        .order_by(DecisionPredictor.version.desc()).limit(1)
+    )).scalar_one_or_none()
+    if predictor or not franchise_id:
+        return predictor
+    return (await db.execute(
+        base.where(DecisionPredictor.franchise_id == franchise_id, DecisionPredictor.character_id.is_(None))
+        .order_by(DecisionPredictor.version.desc()).limit(1)
+    )).scalar_one_or_none()
+
+
+async def _load_weights(db: AsyncSession, predictor: DecisionPredictor):
+    weights = _loaded.get(predictor.id)
+    if weights is not None:
+        _loaded.move_to_end(predictor.id)
+        return weights
+    artifact = (await db.execute(
+        select(DecisionPredictor.artifact).where(DecisionPredictor.id == predictor.id)
+    )).scalar()
+    if not artifact:
+        return None
+    weights = _deserialize(artifact)
+    _loaded[predictor.id] = weights
+    if len(_loaded) > _CACHE_SIZE:
+        _loaded.popitem(last=False)
+    return weights
+
+
+async def predict(db: AsyncSession, predictor: DecisionPredictor, content: str) -> Optional[dict]:
+    """Predicted decision for content: ``{decision, confidence, skippable, score, ...}``."""
+    weights = await _load_weights(db, predictor)
+    if weights is None:
+        return None
+    W, b = weights
+    proba = predict_proba(W, b, [feature_ids(content, predictor.n_features)])[0]
+    best = int(proba.argmax())
+    decision = predictor.classes[best]
+    confidence = float(proba[best])
+    threshold = predictor.confidence_threshold
+    return {
+        "decision": decision,
+        "confidence": round(confidence, 4),
+        "skippable": decision in SKIPPABLE_DECISIONS and threshold is not None and confidence >= threshold,
+        "score": (predictor.class_scores or {}).get(decision),
+        "predictor_id": predictor.id,
+        "predictor_version": predictor.version,
+    }
+
+
+# ─── Monitoring ────────────────────────────────────────────────
+
+async def list_predictors(db: AsyncSession, org_id: int, character_id: Optional[int] = None) -> List[DecisionPredictor]:
+    query = select(DecisionPredictor).options(defer(DecisionPredictor.artifact)).where(
+        DecisionPredictor.org_id == org_id
+    )
+    if character_id:
+        query = query.where(DecisionPredictor.character_id == character_id)
+    result = await db.execute(query.order_by(DecisionPredictor.created_at.desc()))
+    return list(result.scalars().all())
+
+
+async def get_accuracy(db: AsyncSession, org_id: int, days: int = 30) -> dict:
+    """Live accuracy of predictions on runs that were still judged by critics (shadow and audit runs)."""
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = (await db.execute(
+        select(EvalRun.predicted_decision, EvalRun.decision, func.count(EvalRun.id)).where(
+            EvalRun.org_id == org_id,
+            EvalRun.created_at >= since,
+            EvalRun.predicted_decision.isnot(None),
+            EvalRun.decision.isnot(None),
+            EvalRun.decision != "sampled-pass",
+            EvalRun.tier.notin_(NON_CRITIC_TIERS),
+        ).group_by(EvalRun.predicted_decision, EvalRun.decision)
+    )).all()
+    skipped = (await db.execute(
+        select(func.count(EvalRun.id)).where(
+            EvalRun.org_id == org_id, EvalRun.created_at >= since, EvalRun.tier == "predicted",
+        )
+    )).scalar() or 0
+
+    by_decision: dict = {}
+    compared = correct = 0
+    for predicted, actual, count in rows:
+        entry = by_decision.setdefault(predicted, {"compared": 0, "correct": 0})
+        entry["compared"] += count
+        compared += count
+        if predicted == actual:
+            entry["correct"] += count
+            correct += count
+    for entry in by_decision.values():
+        entry["accuracy"] = round(entry["correct"] / entry["compared"], 4)
+    return {
+        "days": days,
+        "skipped_evals": skipped,
+        "compared": compared,
+        "accuracy": round(correct / compared, 4) if compared else None,
+        "by_predicted_decision": by_decision,
+    }
@@ -0,0 +1,514 @@
+"""Drift detection — streaming per-(character, critic) score baselines.
+
+Every evaluation finalized by ``evaluation_service`` feeds its critic scores into
+the character's baselines. Each baseline keeps two running summaries:
+
+- a Welford running mean and variance of all in-control scores (the baseline), and
+- an exponentially weighted mean and variance of recent scores (``DRIFT_EWMA_ALPHA``).
+
+Once the baseline has ``DRIFT_MIN_SAMPLES`` scores, each new score is standardized
+against it and fed to the baseline's change-point detector (``change_point_service``:
+EWMA chart, CUSUM or Page-Hinkley). Its constant-size state lives on the baseline row.
+A critic drifts while its detector alarms. The evaluation that sets off the alarm
+creates a ``DriftEvent`` and fires the ``drift_detected`` webhook; nobody has to
+poll. Scores seen while drifting stay out of the Welford baseline so it doesn't
+absorb the drift. A new card version restarts
+the baseline, and ``recompute_baselines`` rebuilds one from recent runs, e.g. to
+accept a deliberate change. Checking a character is a read of its baseline rows.
+
+``sweep_org`` checks every baseline of an org at once from stored results: one
+windowed query averages each (character, critic)'s scores over the character's
+``DRIFT_SWEEP_RECENT_RUNS`` latest runs. NumPy then scores the whole
+(character × critic) matrix against the baselines with the same verdict as ``assess``,
+so the sweep and the online path never disagree about a flag. New events are bulk-inserted.
+It runs as a background job (``DriftSweep``).
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, and_, cast, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import (
+    CardVersion, CharacterCard, CriticResult, DriftBaseline, DriftEvent, DriftSweep, EvalResult, EvalRun,
+)
+from app.services import change_point_service
+
+# Critic results that are not real scores
+_ERROR_FLAGS = {"critic_error", "provider_error"}
+
+
+def _scored():
+    """Excludes critic results that record a failure (stored with a 0.0 score)."""
+    flags = func.coalesce(cast(CriticResult.flags, String), "")
+    return and_(*(~flags.contains(f'"{flag}"') for flag in sorted(_ERROR_FLAGS)))
+
+
+def welford_update(n: int, mean: float, m2: float, x: float) -> Tuple[int, float, float]:
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    m2 += delta * (x - mean)
+    return n, mean, m2
+
+
+def ewma_update(mean: float, variance: float, x: float, alpha: float) -> Tuple[float, float]:
+    delta = x - mean
+    return mean + alpha * delta, (1 - alpha) * (variance + alpha * delta * delta)
+
+
+def severity_for(z_score: float) -> str:
+    if z_score >= 4.0:
+        return "critical"
+    if z_score >= 3.0:
+        return "high"
+    if z_score >= 2.0:
+        return "medium"
+    return "low"
+
+
+def _m2(baseline: DriftBaseline) -> float:
+    if baseline.m2 is not None:
+        return baseline.m2
+    # Baselines computed before streaming only stored the standard deviation
+    return (baseline.std_deviation or 0.0) ** 2 * max((baseline.sample_count or 0) - 1, 0)
+
+
+def _std(baseline: DriftBaseline) -> float:
+    return max(baseline.std_deviation or 0.0, settings.DRIFT_MIN_STD)
+
+
+def _detector(baseline: DriftBaseline) -> str:
+    if baseline.detector in change_point_service.DETECTORS:
+        return baseline.detector
+    return settings.DRIFT_DETECTOR if settings.DRIFT_DETECTOR in change_point_service.DETECTORS else "ewma"
+
+
+def assess(baseline: DriftBaseline) -> Optional[dict]:
+    """The baseline's detector verdict and how far the recent mean has moved; None while warming up."""
+    if (baseline.sample_count or 0) < settings.DRIFT_MIN_SAMPLES or baseline.ewma_score is None:
+        return None
+    deviation = abs(baseline.ewma_score - baseline.baseline_score)
+    z_score = deviation / _std(baseline)
+    state = baseline.detector_state
+    if state:
+        drifting, statistic = bool(state.get("alarm")), state.get("statistic")
+    else:
+        # Baselines from before detectors: the recent mean against a ±threshold·σ band
+        drifting, statistic = z_score > (baseline.threshold or settings.DRIFT_THRESHOLD), None
+    return {
+        "detected_score": baseline.ewma_score,
+        "deviation": deviation,
+        "z_score": z_score,
+        "detector": _detector(baseline),
+        "statistic": statistic,
+        "drifting": drifting,
+        "severity": severity_for(z_score),
+    }
+
+
+def _reset(baseline: DriftBaseline, card_version_id: int) -> None:
+    baseline.card_version_id = card_version_id
+    baseline.baseline_score = 0.0
+    baseline.std_deviation = 0.0
+    baseline.sample_count = 0
+    baseline.m2 = 0.0
+    baseline.ewma_score = None
+    baseline.ewma_variance = None
+    baseline.drifting = False
+    baseline.detector = _detector(baseline)
+    baseline.detector_state = change_point_service.initial_state(baseline.detector)
+
+
+def observe(baseline: DriftBaseline, score: float) -> Optional[dict]:
+    """Add one score to a baseline; returns the assessment if it just started drifting."""
+    if baseline.ewma_score is None:
+        baseline.ewma_score, baseline.ewma_variance = score, 0.0
+    else:
+        baseline.ewma_score, baseline.ewma_variance = ewma_update(
+            baseline.ewma_score, baseline.ewma_variance or 0.0, score, settings.DRIFT_EWMA_ALPHA,
+        )
+
+    if (baseline.sample_count or 0) >= settings.DRIFT_MIN_SAMPLES:
+        detector = _detector(baseline)
+        u = (score - baseline.baseline_score) / _std(baseline)
+        baseline.detector_state = change_point_service.update(
+            detector,
+            baseline.detector_state or change_point_service.initial_state(detector),  # pre-detector rows
+            u,
+            baseline.threshold or settings.DRIFT_THRESHOLD,
+        )
+
+    state = assess(baseline)
+    drifting = bool(state and state["drifting"])
+    if not drifting:
+        n, mean, m2 = welford_update(baseline.sample_count or 0, baseline.baseline_score or 0.0, _m2(baseline), score)
+        baseline.sample_count, baseline.baseline_score, baseline.m2 = n, mean, m2
+        baseline.std_deviation = math.sqrt(m2 / (n - 1)) if n >= 2 else 0.0
+
+    started = drifting and not baseline.drifting
+    baseline.drifting = drifting
+    return state if started else None
+
+
+def _event(baseline: DriftBaseline, state: dict, eval_run_id: Optional[int]) -> DriftEvent:
+    return DriftEvent(
+        baseline_id=baseline.id,
+        detected_score=state["detected_score"],
+        deviation=state["deviation"],
+        eval_run_id=eval_run_id,
+        severity=state["severity"],
+        org_id=baseline.org_id,
+    )
+
+
+async def _notify(db: AsyncSession, baseline: DriftBaseline, event: DriftEvent) -> None:
+    try:
+        from app.services import webhook_service
+        await webhook_service.dispatch_event(db, "drift_detected", {
+            "drift_event_id": event.id,
+            "character_id": baseline.character_id,
+            "critic_id": baseline.critic_id,
+            "baseline_score": baseline.baseline_score,
+            "detected_score": event.detected_score,
+            "severity": event.severity,
+            "eval_run_id": event.eval_run_id,
+        }, baseline.org_id)
+    except Exception:
+        pass  # Don't let webhook failures break evaluations
+
+
+async def record_eval(db: AsyncSession, eval_run: EvalRun, critic_results: List[dict]) -> List[DriftEvent]:
+    """Feed a finalized evaluation's critic scores into its character's baselines."""
+    scores = {
+        r["critic_id"]: r["score"] for r in critic_results
+        if r.get("score") is not None and not _ERROR_FLAGS & set(r.get("flags") or [])
+    }
+    if not scores or not eval_run.card_version_id:
+        return []
+
+    result = await db.execute(
+        select(DriftBaseline).where(
+            DriftBaseline.org_id == eval_run.org_id,
+            DriftBaseline.character_id == eval_run.character_id,
+            DriftBaseline.critic_id.in_(list(scores)),
+        )
+    )
+    baselines = {b.critic_id: b for b in result.scalars().all()}
+
+    started = []
+    for critic_id, score in scores.items():
+        baseline = baselines.get(critic_id)
+        if baseline is None:
+            baseline = DriftBaseline(
+                character_id=eval_run.character_id,
+                critic_id=critic_id,
+                threshold=settings.DRIFT_THRESHOLD,
+                org_id=eval_run.org_id,
+            )
+            _reset(baseline, eval_run.card_version_id)
+            db.add(baseline)
+        elif baseline.card_version_id != eval_run.card_version_id:
+            _reset(baseline, eval_run.card_version_id)
+        baseline.last_eval_run_id = eval_run.id
+        baseline.updated_at = datetime.utcnow()
+        state = observe(baseline, score)
+        if state:
+            started.append((baseline, state))
+    await db.flush()
+
+    events = []
+    for baseline, state in started:
+        event = _event(baseline, state, eval_run.id)
+        db.add(event)
+        events.append((baseline, event))
+    if events:
+        await db.flush()
+        for baseline, event in events:
+            await _notify(db, baseline, event)
+    return [event for _, event in events]
+
+
+async def check_character(db: AsyncSession, org_id: int, character_id: int) -> dict:
+    """Assess a character's baselines as they stand; creates events for drift not yet recorded."""
+    result = await db.execute(
+        select(DriftBaseline).where(
+            DriftBaseline.character_id == character_id,
+            DriftBaseline.org_id == org_id,
+        )
+    )
+    baselines = list(result.scalars().all())
+    if not baselines:
+        raise ValueError("No baselines found. Compute baselines first.")
+
+    drifting = []
+    events_created = 0
+    for baseline in baselines:
+        state = assess(baseline)
+        if not state or not state["drifting"]:
+            continue
+        drifting.append({"critic_id": baseline.critic_id, **state})
+        if not baseline.drifting:
+            baseline.drifting = True
+            event = _event(baseline, state, baseline.last_eval_run_id)
+            db.add(event)
+            await db.flush()
+            await _notify(db, baseline, event)
+            events_created += 1
+    await db.flush()
+    return {
+        "message": f"Drift check complete. {events_created} drift events detected.",
+        "character_id": character_id,
+        "events_created": events_created,
+        "baselines_checked": len(baselines),
+        "drifting": drifting,
+    }
+
+
+async def recompute_baselines(db: AsyncSession, character: CharacterCard, detector: Optional[str] = None) -> dict:
+    """Rebuild a character's baselines from its most recent completed runs (one query).
+
+    Detectors restart from a clean state; ``detector`` switches them to another one.
+    """
+    if detector is not None and detector not in change_point_service.DETECTORS:
+        raise ValueError(f"detector must be one of: {', '.join(change_point_service.DETECTORS)}")
+
+    card_version_id = character.active_version_id
+    if not card_version_id:
+        # Fallback: get latest version
+        version = (await db.execute(
+            select(CardVersion)
+            .where(CardVersion.character_id == character.id)
+            .order_by(CardVersion.version_number.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+        if not version:
+            raise ValueError("No card version found for character")
+        card_version_id = version.id
+
+    runs = (
+        select(EvalRun.id)
+        .where(
+            EvalRun.character_id == character.id,
+            EvalRun.org_id == character.org_id,
+            EvalRun.status == "completed",
+        )
+        .order_by(EvalRun.created_at.desc())
+        .limit(settings.DRIFT_BASELINE_RUNS)
+    )
+    rows = (await db.execute(
+        select(EvalResult.eval_run_id, CriticResult.critic_id, CriticResult.score)
+        .join(CriticResult, CriticResult.eval_result_id == EvalResult.id)
+        .where(EvalResult.eval_run_id.in_(runs), _scored())
+        .order_by(EvalResult.eval_run_id)
+    )).all()
+    if not rows:
+        raise ValueError("No completed evaluations found for this character")
+
+    scores: Dict[int, List[float]] = {}
+    for _, critic_id, score in rows:
+        scores.setdefault(critic_id, []).append(score)
+
+    existing = (await db.execute(
+        select(DriftBaseline).where(
+            DriftBaseline.character_id == character.id,
+            DriftBaseline.org_id == character.org_id,
+        )
+    )).scalars().all()
+    by_critic = {b.critic_id: b for b in existing}
+
+    for critic_id, values in scores.items():
+        baseline = by_critic.get(critic_id)
+        if baseline is None:
+            baseline = DriftBaseline(character_id=character.id, critic_id=critic_id, org_id=character.org_id)
+            db.add(baseline)
+        if detector:
+            baseline.detector = detector
+        _reset(baseline, card_version_id)
+        n, mean, m2 = 0, 0.0, 0.0
+        for x in values:
+            n, mean, m2 = welford_update(n, mean, m2, x)
+        variance = m2 / (n - 1) if n >= 2 else 0.0
+        baseline.sample_count, baseline.baseline_score, baseline.m2 = n, mean, m2
+        baseline.std_deviation = math.sqrt(variance)
+        baseline.ewma_score, baseline.ewma_variance = mean, variance
+        baseline.threshold = settings.DRIFT_THRESHOLD
+        baseline.updated_at = datetime.utcnow()
+    await db.flush()
+
+    return {
+        "message": f"Computed baselines for {len(scores)} critics",
+        "character_id": character.id,
+        "baselines_count": len(scores),
+        "eval_runs_sampled": len({run_id for run_id, _, _ in rows}),
+    }
+
+
+# ─── Org-wide sweep ─────────────────────────────────────────────
+
+async def recent_critic_means(db: AsyncSession, org_id: int) -> list:
+    """``(character_id, critic_id, mean score, latest run id)`` over each character's latest runs."""
+    ranked = (
+        select(
+            EvalRun.id.label("run_id"),
+            EvalRun.character_id,
+            func.row_number().over(
+                partition_by=EvalRun.character_id,
+                order_by=(EvalRun.created_at.desc(), EvalRun.id.desc()),
+            ).label("rank"),
+        )
+        .where(EvalRun.org_id == org_id, EvalRun.status == "completed")
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            ranked.c.character_id,
+            CriticResult.critic_id,
+            func.avg(CriticResult.score),
+            func.max(ranked.c.run_id),
+        )
+        .select_from(ranked)
+        .join(EvalResult, EvalResult.eval_run_id == ranked.c.run_id)
+        .join(CriticResult, CriticResult.eval_result_id == EvalResult.id)
+        .where(ranked.c.rank <= settings.DRIFT_SWEEP_RECENT_RUNS, _scored())
+        .group_by(ranked.c.character_id, CriticResult.critic_id)
+    )
+    return result.all()
+
+
+def sweep_matrix(baselines: List[DriftBaseline], recent: list) -> Dict[str, np.ndarray]:
+    """Drift of every baseline against its recent mean, as arrays aligned with ``baselines``.
+
+    The verdict is the one :func:`assess` gives: a baseline's change-point detector owns its
+    flag, and only pre-detector baselines are judged by the recent mean against the band.
+    """
+    position = {(b.character_id, b.critic_id): i for i, b in enumerate(baselines)}
+    recent_mean = np.full(len(baselines), np.nan)
+    latest_run = np.zeros(len(baselines), dtype=np.int64)
+    for character_id, critic_id, mean, run_id in recent:
+        i = position.get((character_id, critic_id))
+        if i is not None and mean is not None:
+            recent_mean[i], latest_run[i] = mean, run_id
+
+    base = np.array([b.baseline_score or 0.0 for b in baselines])
+    std = np.maximum(np.array([b.std_deviation or 0.0 for b in baselines]), settings.DRIFT_MIN_STD)
+    threshold = np.array([b.threshold or settings.DRIFT_THRESHOLD for b in baselines])
+    samples = np.array([b.sample_count or 0 for b in baselines])
+    has_detector = np.array([bool(b.detector_state) for b in baselines])
+    alarm = np.array([bool((b.detector_state or {}).get("alarm")) for b in baselines])
+
+    checked = ~np.isnan(recent_mean) & (samples >= settings.DRIFT_MIN_SAMPLES)
+    deviation = np.abs(np.nan_to_num(recent_mean) - base)
+    z_score = deviation / std
+    severity = np.select([z_score >= 4.0, z_score >= 3.0, z_score >= 2.0], ["critical", "high", "medium"], default="low")
+    return {
+        "checked": checked,
+        "drifting": checked & np.where(has_detector, alarm, z_score > threshold),
+        "recent_mean": recent_mean,
+        "deviation": deviation,
+        "severity": severity,
+        "latest_run": latest_run,
+    }
+
+
+async def sweep_org(db: AsyncSession, org_id: int) -> dict:
+    """Check every baseline of an org against its recent scores; returns the counts."""
+    baselines = list((await db.execute(
+        select(DriftBaseline).where(DriftBaseline.org_id == org_id).order_by(DriftBaseline.id)
+    )).scalars().all())
+    counts = {"characters_checked": 0, "baselines_checked": 0, "drifting": 0, "events_created": 0}
+    if not baselines:
+        return counts
+
+    m = sweep_matrix(baselines, await recent_critic_means(db, org_id))
+    was_drifting = np.array([bool(b.drifting) for b in baselines])
+    started = np.flatnonzero(m["drifting"] & ~was_drifting)
+    stopped = np.flatnonzero(m["checked"] & ~m["drifting"] & was_drifting)
+
+    for ids, value in ((started, True), (stopped, False)):
+        if ids.size:
+            await db.execute(
+                update(DriftBaseline)
+                .where(DriftBaseline.id.in_([baselines[i].id for i in ids]))
+                .values(drifting=value)
+                .execution_options(synchronize_session=False)
+            )
+
+    if started.size:
+        rows = [
+            {
+                "baseline_id": baselines[i].id,
+                "detected_score": float(m["recent_mean"][i]),
+                "deviation": float(m["deviation"][i]),
+                "eval_run_id": int(m["latest_run"][i]) or None,
+                "severity": str(m["severity"][i]),
+                "acknowledged": False,
+                "org_id": org_id,
+            }
+            for i in started
+        ]
+        # Ordered RETURNING, so each event is notified with its own baseline
+        stmt = insert(DriftEvent).returning(DriftEvent, sort_by_parameter_order=True)
+        events = (await db.execute(stmt, rows)).scalars().all()
+        for i, event in zip(started, events):
+            await _notify(db, baselines[i], event)
+
+    checked = np.flatnonzero(m["checked"])
+    counts.update(
+        characters_checked=len({baselines[i].character_id for i in checked}),
+        baselines_checked=int(checked.size),
+        drifting=int(m["drifting"].sum()),
+        events_created=int(started.size),
+    )
+    return counts
+
+
+async def run_sweep(db: AsyncSession, sweep_id: int) -> DriftSweep:
+    sweep = await db.get(DriftSweep, sweep_id)
+    if not sweep:
+        raise ValueError("Sweep not found")
+    sweep.status = "running"
+    await db.flush()
+
+    for key, value in (await sweep_org(db, sweep.org_id)).items():
+        setattr(sweep, key, value)
+    sweep.status = "completed"
+    sweep.completed_at = datetime.utcnow()
+    await db.flush()
+    return sweep
+
+
+async def sweep_in_background(sweep_id: int) -> None:
+    """Background task entry point: sweeps in its own session and commits."""
+    from app.core.database import async_session
+
+    async with async_session() as db:
+        try:
+            await run_sweep(db, sweep_id)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            sweep = await db.get(DriftSweep, sweep_id)
+            if sweep:
+                sweep.status = "failed"
+                sweep.error = str(e)[:2000]
+                await db.commit()
+
+
+def sweep_to_dict(sweep: DriftSweep) -> dict:
+    return {
+        "id": sweep.id,
+        "status": sweep.status,
+        "characters_checked": sweep.characters_checked or 0,
+        "baselines_checked": sweep.baselines_checked or 0,
+        "drifting": sweep.drifting or 0,
+        "events_created": sweep.events_created or 0,
+        "error": sweep.error,
+        "created_at": sweep.created_at.isoformat() if sweep.created_at else None,
+        "completed_at": sweep.completed_at.isoformat() if sweep.completed_at else None,
+    }
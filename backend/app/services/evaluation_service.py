@@ -1,10 +1,11 @@
 """Evaluation engine — orchestrates multi-critic, multi-modal evaluation."""
 from __future__ import annotations
 
+import asyncio
 import math
 import random
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,44 +21,149 @@ from app.models.core import (
     CardVersion,
 )
 from app.schemas.evaluations import EvalRequest
-from app.services import critic_service, consent_service, character_service
+from app.services import critic_service, consent_service, character_service, franchise_service
 
 
 async def evaluate(db: AsyncSession, request: EvalRequest, org_id: int) -> EvalRun:
     """Run a full evaluation pipeline."""
+    context = await load_context(db, request, org_id)
+    eval_run, plan = await prepare_eval(db, request, org_id, context)
+    if plan is None:
+        return eval_run
+    critic_results, analysis_summary = await run_plan(eval_run, plan)
+    return await _finalize_eval(db, eval_run, critic_results, analysis_summary)
+
+
+async def load_context(db: AsyncSession, request: EvalRequest, org_id: int) -> dict:
+    """Load what every evaluation of the same character, modality, territory and profile shares."""
     # 1. Get character and active version
     character = await character_service.get_character(db, request.character_id, org_id)
     if not character:
         raise ValueError("Character not found")
 
-    card_version = await character_service.get_active_version(db, request.character_id, org_id)
-    if not card_version:
-        raise ValueError("No active card version for this character")
+    if request.card_version_id:
+        card_version = await character_service.get_version(db, request.card_version_id)
+        if not card_version or card_version.character_id != character.id:
+            raise ValueError("Card version not found for this character")
+    else:
+        card_version = await character_service.get_active_version(db, request.character_id, org_id)
+        if not card_version:
+            raise ValueError("No active card version for this character")
 
     # 2. Consent verification (hard gate)
     consent_ok, consent_reasons = await consent_service.check_consent(
         db, request.character_id, request.modality, org_id, request.territory
     )
 
+    profile = None
+    if request.profile_id:
+        profile = await critic_service.get_profile(db, request.profile_id)
+
+    context = {
+        "character": character,
+        "card_version": card_version,
+        "franchise_id": request.franchise_id or character.franchise_id,
+        "consent_ok": consent_ok,
+        "consent_reasons": consent_reasons,
+        "profile": profile,
+        "screener": None,
+        "predictor": None,
+    }
+
+    # Local pre-screen rules are compiled once per card version and tag set
+    if profile and profile.prescreen_mode:
+        from app.services import prescreen_service, taxonomy_service
+        tags = await taxonomy_service.get_tags_for_modality(db, org_id, request.modality)
+        context["screener"] = prescreen_service.get_screener(card_version, tags)
+
+    if profile and profile.predictor_mode:
+        from app.services import decision_predictor_service
+        context["predictor"] = await decision_predictor_service.get_active_predictor(
+            db, org_id, request.character_id, context["franchise_id"]
+        )
+    return context
+
+
+async def load_critics(db: AsyncSession, request: EvalRequest, org_id: int, context: dict) -> None:
+    """Resolve critics, the escalation judge and routing candidates (once per context)."""
+    if "critics_with_config" in context:
+        return
+    profile = context["profile"]
+
+    # 5. Get applicable critics
+    configs = await critic_service.get_configs_for_character(
+        db, org_id, request.character_id, context["franchise_id"]
+    )
+    enabled_configs = [c for c in configs if c.enabled]
+
+    # Load critic objects
+    critics_with_config = []
+    for config in enabled_configs:
+        critic = await critic_service.get_critic(db, config.critic_id)
+        if critic and (critic.modality == request.modality or critic.modality == "multi"):
+            critics_with_config.append((critic, config))
+
+    # If no critics configured, use all matching-modality critics
+    if not critics_with_config:
+        all_critics = await critic_service.list_critics(db, org_id)
+        critics_with_config = [
+            (c, None) for c in all_critics
+            if c.modality == request.modality or c.modality == "multi"
+        ]
+
+    # Adaptive multi-judge may escalate to a registered custom judge
+    escalation_judge = None
+    if profile and profile.judge_mode == "adaptive" and profile.escalation_judge_id:
+        from app.services import judge_registry_service
+        escalation_judge = await judge_registry_service.get_judge(db, profile.escalation_judge_id, org_id)
+        if escalation_judge and not escalation_judge.is_active:
+            escalation_judge = None
+
+    # Per-critic model routing picks among built-in models and the org's custom judges
+    routing_judges = None
+    if profile and profile.routing_policy:
+        from app.services import model_routing_service
+        await model_routing_service.warm_start(db, org_id)
+        routing_judges = await model_routing_service.get_candidates(db, org_id, request.modality)
+
+    context.update(
+        critics_with_config=critics_with_config,
+        escalation_judge=escalation_judge,
+        routing_judges=routing_judges,
+    )
+
+
+async def prepare_eval(
+    db: AsyncSession, request: EvalRequest, org_id: int, context: dict,
+) -> Tuple[EvalRun, Optional[dict]]:
+    """Create the EvalRun and settle everything that needs no critic call.
+
+    Returns ``(eval_run, None)`` when the run was completed locally (consent block,
+    pre-screen, predictor, near-duplicate reuse, sampling), otherwise ``(eval_run, plan)``
+    where ``plan`` holds the critics still to run via ``run_plan``.
+    """
+    card_version = context["card_version"]
+    profile = context["profile"]
+
     # 3. Create eval run
     content_str = request.content if isinstance(request.content, str) else str(request.content)
     eval_run = EvalRun(
         character_id=request.character_id,
         card_version_id=card_version.id,
         profile_id=request.profile_id,
-        franchise_id=request.franchise_id or character.franchise_id,
+        franchise_id=context["franchise_id"],
         agent_id=request.agent_id,
         input_content={"modality": request.modality, "content": request.content},
         modality=request.modality,
         status="running",
-        consent_verified=consent_ok,
+        consent_verified=context["consent_ok"],
         org_id=org_id,
     )
     db.add(eval_run)
     await db.flush()
 
     # If consent fails, block immediately
-    if not consent_ok:
+    if not context["consent_ok"]:
         eval_run.status = "completed"
         eval_run.decision = "block"
         eval_run.overall_score = 0.0
@@ -66,17 +172,56 @@ async def evaluate(db: AsyncSession, request: EvalRequest, org_id: int) -> EvalR
             eval_run_id=eval_run.id,
             weighted_score=0.0,
             critic_scores={},
-            flags=consent_reasons,
+            flags=context["consent_reasons"],
             recommendations=["Content blocked: consent verification failed"],
         )
         db.add(result)
         await db.flush()
-        return eval_run
-
-    # 4. Determine evaluation mode (sampling, tiered)
-    profile = None
-    if request.profile_id:
-        profile = await critic_service.get_profile(db, request.profile_id)
+        await franchise_service.record_eval(db, eval_run)
+        return eval_run, None
+
+    # 4. Determine evaluation mode (pre-screen, predictor, near-duplicates, sampling)
+
+    # Local pre-screen from safety/legal packs and taxonomy rules (no LLM call)
+    screen_result = None
+    prescreen_mode = profile.prescreen_mode if profile else None
+    if context["screener"] is not None:
+        from app.services import prescreen_service
+        screen_result = prescreen_service.screen(context["screener"], content_str)
+        if screen_result["action"]:
+            eval_run.prescreen_action = screen_result["action"]
+            eval_run.prescreen_matches = screen_result["matches"]
+            if prescreen_mode == "enforce" and screen_result["action"] in ("block", "escalate"):
+                return await _finalize_prescreen(db, eval_run, screen_result), None
+
+    # Local decision predictor may complete confident pass/block cases without critics
+    if context["predictor"] is not None:
+        from app.services import decision_predictor_service
+        prediction = await decision_predictor_service.predict(db, context["predictor"], content_str)
+        if prediction:
+            eval_run.predicted_decision = prediction["decision"]
+            eval_run.predicted_confidence = prediction["confidence"]
+            audit_rate = profile.predictor_audit_rate
+            if audit_rate is None:
+                audit_rate = settings.PREDICTOR_AUDIT_RATE
+            # A share of skippable cases still goes to critics so accuracy stays measured
+            if profile.predictor_mode == "skip" and prediction["skippable"] and random.random() >= audit_rate:
+                return await _finalize_predicted(db, eval_run, prediction), None
+
+    # Near-duplicates of already-judged content reuse or seed that decision
+    duplicate_match = None
+    near_duplicate_mode = profile.near_duplicate_mode if profile else None
+    if near_duplicate_mode:
+        from app.services import near_duplicate_service
+        threshold = profile.near_duplicate_threshold or settings.NEAR_DUPLICATE_THRESHOLD
+        duplicate_match = await near_duplicate_service.find_match(
+            db, org_id, request.character_id, content_str, threshold, card_version.id
+        )
+        if duplicate_match:
+            eval_run.duplicate_of = duplicate_match["source"]
+            eval_run.duplicate_similarity = duplicate_match["similarity"]
+            if near_duplicate_mode == "reuse":
+                return await _finalize_duplicate(db, eval_run, duplicate_match), None
 
     sampling_rate = profile.sampling_rate if profile else settings.DEFAULT_SAMPLING_RATE
     if random.random() > sampling_rate:
@@ -85,28 +230,54 @@ async def evaluate(db: AsyncSession, request: EvalRequest, org_id: int) -> EvalR
         eval_run.sampled = True
         eval_run.completed_at = datetime.utcnow()
         await db.flush()
-        return eval_run
+        await franchise_service.record_eval(db, eval_run)
+        return eval_run, None
 
-    # 5. Get applicable critics
-    configs = await critic_service.get_configs_for_character(
-        db, org_id, request.character_id, request.franchise_id or character.franchise_id
-    )
-    enabled_configs = [c for c in configs if c.enabled]
+    await load_critics(db, request, org_id, context)
+    critics_with_config = context["critics_with_config"]
 
-    # Load critic objects
-    critics_with_config = []
-    for config in enabled_configs:
-        critic = await critic_service.get_critic(db, config.critic_id)
-        if critic and (critic.modality == request.modality or critic.modality == "multi"):
-            critics_with_config.append((critic, config))
+    # Pre-screen tags narrow the fan-out to the critics relevant to what matched
+    if screen_result and prescreen_mode in ("tag", "enforce"):
+        critics_with_config = prescreen_service.relevant_critics(critics_with_config, screen_result)
 
-    # If no critics configured, use all matching-modality critics
-    if not critics_with_config:
-        all_critics = await critic_service.list_critics(db, org_id)
-        critics_with_config = [
-            (c, None) for c in all_critics
-            if c.modality == request.modality or c.modality == "multi"
-        ]
+    # Seeded near-duplicates only re-run critics the matched run didn't cleanly pass
+    seeded_results = []
+    if duplicate_match and near_duplicate_mode == "seed":
+        critics_with_config, seeded_results = await near_duplicate_service.seed_critics(
+            db, duplicate_match, critics_with_config, card_version.id
+        )
+
+    plan = {
+        "critics_with_config": critics_with_config,
+        "seeded_results": seeded_results,
+        "card_version": card_version,
+        "content": content_str,
+        "character_name": context["character"].name,
+        "profile": profile,
+        "escalation_judge": context["escalation_judge"],
+        "routing_judges": context["routing_judges"],
+    }
+    return eval_run, plan
+
+
+async def run_plan(eval_run: EvalRun, plan: dict) -> Tuple[List[dict], Optional[dict]]:
+    """Run a plan's critics and synthesize the analysis.
+
+    Makes LLM calls only and never touches the database, so plans of different
+    eval runs can be run concurrently.
+    """
+    profile = plan["profile"]
+    critics_with_config = plan["critics_with_config"]
+    card_version = plan["card_version"]
+    content_str = plan["content"]
+    judge_kwargs = {
+        "profile": profile,
+        "escalation_judge": plan["escalation_judge"],
+        "routing_judges": plan["routing_judges"],
+        "org_id": eval_run.org_id,
+    }
+
+    critic_results = None
 
     # 6. Tiered evaluation
     use_tiered = profile.tiered_evaluation if profile else False
@@ -114,26 +285,183 @@ async def evaluate(db: AsyncSession, request: EvalRequest, org_id: int) -> EvalR
         eval_run.tier = "rapid"
         rapid_ids = set(profile.rapid_screen_critics)
         rapid_critics = [(c, cfg) for c, cfg in critics_with_config if c.id in rapid_ids]
-        if rapid_critics:
-            rapid_results = await critic_service.run_critics_parallel(rapid_critics, card_version, content_str)
-            rapid_avg = _weighted_average(rapid_results)
+        # Verdicts seeded from a near-duplicate count towards the rapid screen too
+        seeded_rapid = [r for r in plan["seeded_results"] if r["critic_id"] in rapid_ids]
+        if rapid_critics or seeded_rapid:
+            rapid_results = await critic_service.run_critics_parallel(
+                rapid_critics, card_version, content_str, **judge_kwargs
+            ) if rapid_critics else []
+            rapid_avg = _weighted_average(rapid_results + seeded_rapid)
             if rapid_avg >= settings.RAPID_SCREEN_THRESHOLD:
                 # Passes rapid screen — run deep eval
                 eval_run.tier = "full"
             else:
                 # Fails rapid screen — skip deep eval
-                return await _finalize_eval(db, eval_run, rapid_results)
+                critic_results = rapid_results + plan["seeded_results"]
 
     # 7. Run all critics in parallel
-    if critics_with_config:
-        critic_results = await critic_service.run_critics_parallel(
-            critics_with_config, card_version, content_str
+    if critic_results is None:
+        if critics_with_config:
+            critic_results = await critic_service.run_critics_parallel(
+                critics_with_config, card_version, content_str, **judge_kwargs
+            )
+        else:
+            critic_results = []
+        critic_results += plan["seeded_results"]
+
+    # Synthesize brand analysis from critic feedback
+    analysis_summary = None
+    if critic_results:
+        overall_score = _weighted_average(critic_results)
+        analysis_summary = await _synthesize_analysis(
+            critic_results, content_str, plan["character_name"],
+            overall_score, _determine_decision(overall_score),
         )
-    else:
-        critic_results = []
+    return critic_results, analysis_summary
+
+
+# ─── Batch Evaluation ─────────────────────────────────────────
+
+def _batch_outcome(index: int, eval_run: Optional[EvalRun], error: Optional[str] = None) -> dict:
+    return {
+        "index": index,
+        "eval_run_id": eval_run.id if eval_run else None,
+        "status": "error" if error else eval_run.status,
+        "tier": eval_run.tier if eval_run else None,
+        "overall_score": eval_run.overall_score if eval_run else None,
+        "decision": eval_run.decision if eval_run else None,
+        "error": error,
+    }
 
-    # 8. Finalize
-    return await _finalize_eval(db, eval_run, critic_results)
+
+def context_key(request: EvalRequest) -> tuple:
+    return (
+        request.character_id, request.card_version_id, request.franchise_id,
+        request.modality, request.territory, request.profile_id,
+    )
+
+
+async def evaluate_batch(
+    db: AsyncSession,
+    requests: List[EvalRequest],
+    org_id: int,
+    concurrency: Optional[int] = None,
+    on_result=None,
+    should_stop=None,
+    commit_every: Optional[int] = None,
+) -> List[dict]:
+    """Evaluate many items with shared context loading and bounded critic fan-out.
+
+    Items are grouped by character, franchise, modality, territory and profile so each
+    group's context is loaded once. Database work (``prepare_eval``/``_finalize_eval``)
+    is serialized on ``db`` while the LLM stage of up to ``concurrency`` items runs at
+    once. Finished items are committed every ``commit_every`` (default
+    ``BATCH_EVAL_COMMIT_EVERY``) items.
+    ``on_result`` is awaited with each per-item outcome as soon as it completes.
+    ``should_stop`` is checked before each item is started; once it returns True no
+    further items are started and their outcomes stay ``None``.
+    Returns outcomes in request order.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.BATCH_EVAL_CONCURRENCY)
+    db_lock = asyncio.Lock()
+    outcomes: List[Optional[dict]] = [None] * len(requests)
+    uncommitted = 0
+
+    async def emit(index: int, eval_run: Optional[EvalRun], error: Optional[str] = None) -> None:
+        outcome = _batch_outcome(index, eval_run, error)
+        outcomes[index] = outcome
+        if on_result:
+            await on_result(outcome)
+
+    async def persisted() -> None:
+        # Called with db_lock held
+        nonlocal uncommitted
+        uncommitted += 1
+        if uncommitted >= (commit_every or settings.BATCH_EVAL_COMMIT_EVERY):
+            await db.commit()
+            uncommitted = 0
+
+    async def complete(index: int, eval_run: EvalRun, plan: dict) -> None:
+        try:
+            error = None
+            try:
+                critic_results, analysis_summary = await run_plan(eval_run, plan)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            async with db_lock:
+                if error is None:
+                    try:
+                        # A savepoint, so a failed finalize doesn't poison the batch's transaction
+                        async with db.begin_nested():
+                            await _finalize_eval(db, eval_run, critic_results, analysis_summary)
+                    except Exception as e:
+                        error = str(e) or e.__class__.__name__
+                        await db.refresh(eval_run)
+                if error is not None:
+                    eval_run.status = "failed"
+                    eval_run.completed_at = datetime.utcnow()
+                    await db.flush()
+                await persisted()
+            await emit(index, eval_run, error)
+        finally:
+            semaphore.release()
+
+    groups: dict = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(context_key(request), []).append(index)
+
+    tasks = []
+    try:
+        for indexes in groups.values():
+            if should_stop and should_stop():
+                break
+            try:
+                async with db_lock:
+                    context = await load_context(db, requests[indexes[0]], org_id)
+            except ValueError as e:
+                for index in indexes:
+                    await emit(index, None, str(e))
+                continue
+
+            for index in indexes:
+                await semaphore.acquire()
+                if should_stop and should_stop():
+                    semaphore.release()
+                    break
+                try:
+                    async with db_lock:
+                        eval_run, plan = await prepare_eval(db, requests[index], org_id, context)
+                        if plan is None:
+                            await persisted()
+                except BaseException:
+                    semaphore.release()
+                    raise
+                if plan is None:
+                    semaphore.release()
+                    await emit(index, eval_run)
+                    continue
+                tasks.append(asyncio.create_task(complete(index, eval_run, plan)))
+    finally:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async with db_lock:
+        await db.commit()
+    return outcomes
+
+
+def summarize_batch(outcomes: List[dict]) -> dict:
+    """Counts of a batch's outcomes by status and decision."""
+    decisions: dict = {}
+    for outcome in outcomes:
+        if outcome and outcome["decision"]:
+            decisions[outcome["decision"]] = decisions.get(outcome["decision"], 0) + 1
+    return {
+        "total": len(outcomes),
+        "completed": sum(1 for o in outcomes if o and o["status"] == "completed"),
+        "failed": sum(1 for o in outcomes if o and o["status"] != "completed"),
+        "skipped": sum(1 for o in outcomes if o is None),
+        "decisions": decisions,
+    }
 
 
 def _weighted_average(results: List[dict]) -> float:
@@ -143,17 +471,25 @@ def _weighted_average(results: List[dict]) -> float:
     return sum(r["score"] * r["weight"] for r in results) / total_weight
 
 
+# Lower bound of each decision band, highest first; anything below is "block"
+DECISION_THRESHOLDS = [
+    (0.9, "pass"),
+    (0.7, "regenerate"),
+    (0.5, "quarantine"),
+    (0.3, "escalate"),
+]
+
+
 def _determine_decision(score: float) -> str:
-    if score >= 0.9:
-        return "pass"
-    elif score >= 0.7:
-        return "regenerate"
-    elif score >= 0.5:
-        return "quarantine"
-    elif score >= 0.3:
-        return "escalate"
-    else:
-        return "block"
+    for threshold, decision in DECISION_THRESHOLDS:
+        if score >= threshold:
+            return decision
+    return "block"
+
+
+def near_decision_boundary(score: float, margin: float) -> bool:
+    """True if score is within margin of any decision band boundary."""
+    return any(abs(score - threshold) <= margin for threshold, _ in DECISION_THRESHOLDS)
 
 
 async def _synthesize_analysis(
@@ -204,7 +540,9 @@ async def _synthesize_analysis(
         return None
 
 
-async def _finalize_eval(db: AsyncSession, eval_run: EvalRun, critic_results: List[dict]) -> EvalRun:
+async def _finalize_eval(
+    db: AsyncSession, eval_run: EvalRun, critic_results: List[dict], analysis_summary: Optional[dict] = None,
+) -> EvalRun:
     overall_score = _weighted_average(critic_results) if critic_results else 0.0
     decision = _determine_decision(overall_score)
 
@@ -243,19 +581,6 @@ async def _finalize_eval(db: AsyncSession, eval_run: EvalRun, critic_results: Li
         if std_dev > 0.3:
             all_flags.append("critic_disagreement")
 
-    # Synthesize brand analysis from critic feedback
-    analysis_summary = None
-    if critic_results:
-        # Look up character name
-        char_result = await db.execute(
-            select(CharacterCard.name).where(CharacterCard.id == eval_run.character_id)
-        )
-        character_name = char_result.scalar_one_or_none() or f"Character #{eval_run.character_id}"
-        content = eval_run.input_content.get("content", "") if isinstance(eval_run.input_content, dict) else str(eval_run.input_content)
-        analysis_summary = await _synthesize_analysis(
-            critic_results, content, character_name, overall_score, decision
-        )
-
     result = EvalResult(
         eval_run_id=eval_run.id,
         weighted_score=overall_score,
@@ -288,6 +613,22 @@ async def _finalize_eval(db: AsyncSession, eval_run: EvalRun, critic_results: Li
 
     await db.flush()
 
+    from app.services import near_duplicate_service, drift_service, usage_service
+    near_duplicate_service.record_eval(eval_run)
+    await drift_service.record_eval(db, eval_run, critic_results)
+    await usage_service.record_critic_costs(db, eval_run, critic_results)
+
+    await _after_decision(db, eval_run, critic_results)
+    return eval_run
+
+
+async def _after_decision(db: AsyncSession, eval_run: EvalRun, critic_results: List[dict]) -> None:
+    """Side effects of a completed decision: review queue, franchise rollups, usage metering, webhooks."""
+    decision = eval_run.decision
+    overall_score = eval_run.overall_score
+
+    await franchise_service.record_eval(db, eval_run)
+
     # Auto-queue review items for quarantine/escalate decisions
     if decision in ("quarantine", "escalate"):
         from app.services import review_service
@@ -298,7 +639,12 @@ async def _finalize_eval(db: AsyncSession, eval_run: EvalRun, critic_results: Li
         from app.services import usage_service
         total_tokens = sum(r.get("prompt_tokens", 0) + r.get("completion_tokens", 0) for r in critic_results)
         total_cost = sum(r.get("estimated_cost", 0.0) for r in critic_results)
-        await usage_service.record_eval(db, eval_run.org_id, total_tokens, total_cost)
+        await usage_service.record_eval(
+            db, eval_run.org_id, total_tokens, total_cost,
+            adaptive=any(r.get("judge_mode") == "adaptive" for r in critic_results),
+            escalated=any(r.get("escalated") for r in critic_results),
+            cost_saved=sum(r.get("saved_cost", 0.0) for r in critic_results),
+        )
     except Exception:
         pass
 
@@ -319,6 +665,84 @@ async def _finalize_eval(db: AsyncSession, eval_run: EvalRun, critic_results: Li
     except Exception:
         pass  # Don't let webhook failures break evaluations
 
+
+async def _finalize_predicted(db: AsyncSession, eval_run: EvalRun, prediction: dict) -> EvalRun:
+    """Complete an eval run on the local decision predictor's verdict, without any critic call."""
+    decision = prediction["decision"]
+    score = prediction["score"]
+    if score is None:
+        score = 1.0 if decision == "pass" else 0.0
+    eval_run.tier = "predicted"
+    eval_run.decision = decision
+    eval_run.overall_score = score
+    eval_run.status = "completed"
+    eval_run.completed_at = datetime.utcnow()
+
+    result = EvalResult(
+        eval_run_id=eval_run.id,
+        weighted_score=score,
+        critic_scores={},
+        flags=[f"predicted_{decision}"],
+        recommendations=[
+            f"Decision predicted locally (predictor v{prediction['predictor_version']}, "
+            f"confidence {prediction['confidence']:.2f}); critics were skipped"
+        ],
+    )
+    db.add(result)
+    await db.flush()
+
+    await _after_decision(db, eval_run, [])
+    return eval_run
+
+
+async def _finalize_duplicate(db: AsyncSession, eval_run: EvalRun, match: dict) -> EvalRun:
+    """Complete an eval run with the decision of a near-duplicate already judged, without critics."""
+    eval_run.tier = "near_duplicate"
+    eval_run.decision = match["decision"]
+    eval_run.overall_score = match["score"]
+    eval_run.status = "completed"
+    eval_run.completed_at = datetime.utcnow()
+
+    result = EvalResult(
+        eval_run_id=eval_run.id,
+        weighted_score=match["score"] or 0.0,
+        critic_scores={},
+        flags=[f"near_duplicate_of:{match['source']}"],
+        recommendations=[
+            f"Decision reused from near-duplicate {match['source']} "
+            f"(similarity {match['similarity']:.2f}); critics were skipped"
+        ],
+    )
+    db.add(result)
+    await db.flush()
+
+    await _after_decision(db, eval_run, [])
+    return eval_run
+
+
+async def _finalize_prescreen(db: AsyncSession, eval_run: EvalRun, screen_result: dict) -> EvalRun:
+    """Complete an eval run on the local pre-screen verdict alone, without any critic call."""
+    from app.services import prescreen_service
+
+    decision = screen_result["action"]
+    eval_run.tier = "prescreen"
+    eval_run.decision = decision
+    eval_run.overall_score = 0.0 if decision == "block" else None
+    eval_run.status = "completed"
+    eval_run.completed_at = datetime.utcnow()
+
+    topics = ", ".join(sorted({m["topic"] for m in screen_result["matches"]}))
+    result = EvalResult(
+        eval_run_id=eval_run.id,
+        weighted_score=0.0,
+        critic_scores={},
+        flags=prescreen_service.screen_flags(screen_result),
+        recommendations=[f"Content {'blocked' if decision == 'block' else 'escalated'} by pre-screen: matched {topics}"],
+    )
+    db.add(result)
+    await db.flush()
+
+    await _after_decision(db, eval_run, [])
     return eval_run
 
 
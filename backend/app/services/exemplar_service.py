@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.core import ExemplarContent, EvalRun
 from app.schemas.exemplars import ExemplarCreate, ExemplarUpdate
+from app.services import near_duplicate_service
 
 
 async def create_exemplar(db: AsyncSession, data: ExemplarCreate, org_id: int) -> ExemplarContent:
@@ -22,6 +23,7 @@ async def create_exemplar(db: AsyncSession, data: ExemplarCreate, org_id: int) -
     )
     db.add(exemplar)
     await db.flush()
+    near_duplicate_service.record_exemplar(exemplar)
     return exemplar
 
 
@@ -59,6 +61,7 @@ async def update_exemplar(db: AsyncSession, exemplar_id: int, org_id: int, data:
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(ex, field, value)
     await db.flush()
+    near_duplicate_service.record_exemplar(ex)
     return ex
 
 
@@ -68,6 +71,7 @@ async def delete_exemplar(db: AsyncSession, exemplar_id: int, org_id: int) -> bo
         return False
     await db.delete(ex)
     await db.flush()
+    near_duplicate_service.remove_exemplar(ex)
     return True
 
 
@@ -88,4 +92,5 @@ async def auto_promote_exemplar(db: AsyncSession, eval_run: EvalRun, org_id: int
     )
     db.add(exemplar)
     await db.flush()
+    near_duplicate_service.record_exemplar(exemplar)
     return exemplar
@@ -1,15 +1,26 @@
-"""Franchise management and cross-character evaluation aggregation."""
+"""Franchise management and cross-character evaluation aggregation.
+
+Every completed run of a franchise character is added to that character's hour and
+day ``FranchiseRollup`` rows (count, scored count, score sum and sum of squares, pass
+count) with one upsert; a later decision change (review override, APM enforcement)
+moves its pass count with another. Health for any window is computed from those rows, never
+from the runs themselves. ``backfill_rollups`` rebuilds them from history.
+"""
 from __future__ import annotations
 
+import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List
 
-from sqlalchemy import select, func
+from sqlalchemy import and_, case, delete, insert, or_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.core import Franchise, FranchiseEvaluationAggregate, EvalRun, CharacterCard
+from app.core.database import epoch_seconds, upsert
+from app.models.core import Franchise, FranchiseEvaluationAggregate, FranchiseRollup, EvalRun, CharacterCard
 from app.schemas.franchises import FranchiseCreate, FranchiseUpdate
 
+logger = logging.getLogger(__name__)
+
 
 async def create_franchise(db: AsyncSession, data: FranchiseCreate, org_id: int) -> Franchise:
     franchise = Franchise(
@@ -48,54 +59,217 @@ async def update_franchise(db: AsyncSession, franchise_id: int, org_id: int, dat
     return franchise
 
 
-async def compute_franchise_health(db: AsyncSession, franchise_id: int, org_id: int, days: int = 30) -> dict:
-    """Compute franchise health metrics from recent evaluations."""
-    franchise = await get_franchise(db, franchise_id, org_id)
-    if not franchise:
-        return {}
+# ─── Rollups ─────────────────────────────────────────────────────
+
+_GRANULARITY_SECONDS = {"hour": 3600, "day": 86400}
+
+
+def _period_start(ts: datetime, granularity: str) -> datetime:
+    start = ts.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if granularity == "day" else start
+
+
+def _rollup_sums():
+    return (
+        func.sum(FranchiseRollup.eval_count),
+        func.sum(FranchiseRollup.scored_count),
+        func.sum(FranchiseRollup.score_sum),
+        func.sum(FranchiseRollup.score_sum_sq),
+        func.sum(FranchiseRollup.pass_count),
+    )
+
+
+async def _add_to_rollups(db: AsyncSession, eval_run: EvalRun, counts: dict) -> None:
+    """Add ``counts`` to the run's hour and day rollup rows (one upsert)."""
+    created_at = eval_run.created_at or datetime.utcnow()
+    values = [
+        {
+            "franchise_id": eval_run.franchise_id,
+            "character_id": eval_run.character_id,
+            "granularity": granularity,
+            "period_start": _period_start(created_at, granularity),
+            **counts,
+            "org_id": eval_run.org_id,
+            "updated_at": datetime.utcnow(),
+        }
+        for granularity in _GRANULARITY_SECONDS
+    ]
+    stmt = upsert(db, FranchiseRollup).values(values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["franchise_id", "character_id", "granularity", "period_start"],
+        set_={
+            "eval_count": FranchiseRollup.eval_count + stmt.excluded.eval_count,
+            "scored_count": FranchiseRollup.scored_count + stmt.excluded.scored_count,
+            "score_sum": FranchiseRollup.score_sum + stmt.excluded.score_sum,
+            "score_sum_sq": FranchiseRollup.score_sum_sq + stmt.excluded.score_sum_sq,
+            "pass_count": FranchiseRollup.pass_count + stmt.excluded.pass_count,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+async def record_eval(db: AsyncSession, eval_run: EvalRun) -> None:
+    """Add a completed run to its franchise character's hour and day rollups."""
+    if not eval_run.franchise_id or eval_run.status != "completed":
+        return
+    score = eval_run.overall_score
+    await _add_to_rollups(db, eval_run, {
+        "eval_count": 1,
+        "scored_count": int(score is not None),
+        "score_sum": score or 0.0,
+        "score_sum_sq": (score or 0.0) ** 2,
+        "pass_count": int(eval_run.decision == "pass"),
+    })
 
-    since = datetime.utcnow() - timedelta(days=days)
 
-    # Get all eval runs for this franchise
+async def record_decision_change(db: AsyncSession, eval_run: EvalRun, old_decision: Optional[str]) -> None:
+    """Move an already-rolled-up run between pass and not-pass after its decision changed."""
+    if not eval_run.franchise_id or eval_run.status != "completed":
+        return
+    delta = int(eval_run.decision == "pass") - int(old_decision == "pass")
+    if delta:
+        await _add_to_rollups(db, eval_run, {
+            "eval_count": 0, "scored_count": 0, "score_sum": 0.0, "score_sum_sq": 0.0, "pass_count": delta,
+        })
+
+
+async def backfill_rollups(db: AsyncSession, org_id: int, franchise_id: int) -> int:
+    """Rebuild a franchise's rollups from its completed runs; returns the rollup rows written."""
+    await db.execute(delete(FranchiseRollup).where(
+        FranchiseRollup.org_id == org_id, FranchiseRollup.franchise_id == franchise_id,
+    ))
+    written = 0
+    for granularity, seconds in _GRANULARITY_SECONDS.items():
+        bucket = (epoch_seconds(db, EvalRun.created_at) // seconds).label("bucket")
+        result = await db.execute(
+            select(
+                EvalRun.character_id,
+                bucket,
+                func.count(EvalRun.id),
+                func.count(EvalRun.overall_score),
+                func.coalesce(func.sum(EvalRun.overall_score), 0.0),
+                func.coalesce(func.sum(EvalRun.overall_score * EvalRun.overall_score), 0.0),
+                func.sum(case((EvalRun.decision == "pass", 1), else_=0)),
+            )
+            .where(
+                EvalRun.org_id == org_id,
+                EvalRun.franchise_id == franchise_id,
+                EvalRun.status == "completed",
+            )
+            .group_by(EvalRun.character_id, bucket)
+        )
+        rows = [
+            {
+                "franchise_id": franchise_id,
+                "character_id": character_id,
+                "granularity": granularity,
+                "period_start": datetime.utcfromtimestamp(int(b) * seconds),
+                "eval_count": count,
+                "scored_count": scored,
+                "score_sum": score_sum,
+                "score_sum_sq": score_sum_sq,
+                "pass_count": passes,
+                "org_id": org_id,
+            }
+            for character_id, b, count, scored, score_sum, score_sum_sq, passes in result.all()
+        ]
+        if rows:
+            await db.execute(insert(FranchiseRollup), rows)
+        written += len(rows)
+    return written
+
+
+async def backfill_in_background(org_id: int, franchise_id: int) -> None:
+    """Background task entry point: rebuilds the rollups in its own session and commits."""
+    from app.core.database import async_session
+
+    async with async_session() as db:
+        try:
+            await backfill_rollups(db, org_id, franchise_id)
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            logger.warning("Rollup backfill failed for franchise %s: %s", franchise_id, exc)
+
+
+async def _character_totals(db: AsyncSession, org_id: int, franchise_id: int, since: datetime) -> dict:
+    """``{character_id: (evals, scored, score sum, score sum of squares, passes)}`` since ``since``.
+
+    Hour rollups cover the partial first day and day rollups the rest, so any window
+    is one grouped read of at most ``24 + days`` rows per character.
+    """
+    first_hour = _period_start(since, "hour")
+    first_day = _period_start(since, "day")
+    if first_day < first_hour:
+        first_day += timedelta(days=1)
     result = await db.execute(
-        select(EvalRun).where(
-            EvalRun.franchise_id == franchise_id,
-            EvalRun.org_id == org_id,
-            EvalRun.status == "completed",
-            EvalRun.created_at >= since,
+        select(FranchiseRollup.character_id, *_rollup_sums())
+        .where(
+            FranchiseRollup.org_id == org_id,
+            FranchiseRollup.franchise_id == franchise_id,
+            or_(
+                and_(
+                    FranchiseRollup.granularity == "hour",
+                    FranchiseRollup.period_start >= first_hour,
+                    FranchiseRollup.period_start < first_day,
+                ),
+                and_(FranchiseRollup.granularity == "day", FranchiseRollup.period_start >= first_day),
+            ),
         )
+        .group_by(FranchiseRollup.character_id)
     )
-    runs = list(result.scalars().all())
+    return {row[0]: tuple(row[1:]) for row in result.all()}
 
-    if not runs:
+
+def _health(totals: dict) -> dict:
+    """Health metrics from per-character rollup totals."""
+    total = sum(t[0] or 0 for t in totals.values())
+    scored = sum(t[1] or 0 for t in totals.values())
+    if not total:
         return {
-            "franchise_id": franchise_id,
-            "franchise_name": franchise.name,
             "total_evals": 0,
             "avg_score": None,
             "pass_rate": None,
             "cross_character_consistency": None,
             "world_building_consistency": None,
             "health_score": None,
-            "character_breakdown": {},
+            "character_averages": {},
         }
 
-    total = len(runs)
-    scores = [r.overall_score for r in runs if r.overall_score is not None]
-    avg_score = sum(scores) / len(scores) if scores else 0.0
-    pass_count = sum(1 for r in runs if r.decision == "pass")
-    pass_rate = pass_count / total if total else 0.0
+    avg_score = sum(t[2] or 0.0 for t in totals.values()) / scored if scored else 0.0
+    pass_rate = sum(t[4] or 0 for t in totals.values()) / total
+    char_avgs = {cid: t[2] / t[1] for cid, t in totals.items() if t[1]}
 
-    # Per-character breakdown
-    char_scores = {}
-    for r in runs:
-        cid = r.character_id
-        if cid not in char_scores:
-            char_scores[cid] = []
-        if r.overall_score is not None:
-            char_scores[cid].append(r.overall_score)
+    # Cross-character consistency = 1 - std_dev of character averages
+    if len(char_avgs) > 1:
+        values = list(char_avgs.values())
+        mean = sum(values) / len(values)
+        variance = sum((v - mean) ** 2 for v in values) / len(values)
+        cross_char = max(0, 1 - variance ** 0.5)
+    else:
+        cross_char = 1.0 if char_avgs else None
 
-    char_avgs_raw = {cid: sum(s) / len(s) for cid, s in char_scores.items() if s}
+    health = avg_score * 0.4 + pass_rate * 0.3 + (cross_char or 0) * 0.3 if scored else None
+    return {
+        "total_evals": total,
+        "avg_score": round(avg_score, 4),
+        "pass_rate": round(pass_rate, 4),
+        "cross_character_consistency": round(cross_char, 4) if cross_char is not None else None,
+        "world_building_consistency": round(cross_char, 4) if cross_char is not None else None,  # same metric for now
+        "health_score": round(health, 4) if health is not None else None,
+        "character_averages": char_avgs,
+    }
+
+
+async def compute_franchise_health(db: AsyncSession, franchise_id: int, org_id: int, days: int = 30) -> dict:
+    """Compute franchise health metrics from the rollups of the last ``days`` (to the hour)."""
+    franchise = await get_franchise(db, franchise_id, org_id)
+    if not franchise:
+        return {}
+
+    since = datetime.utcnow() - timedelta(days=days)
+    health = _health(await _character_totals(db, org_id, franchise_id, since))
+    char_avgs_raw = health.pop("character_averages")
 
     # Resolve character names for breakdown
     char_name_map = {}
@@ -107,33 +281,41 @@ async def compute_franchise_health(db: AsyncSession, franchise_id: int, org_id:
         )
         char_name_map = {row.id: row.name for row in name_result.all()}
 
-    char_avgs = {char_name_map.get(cid, f"Character {cid}"): round(v, 1) for cid, v in char_avgs_raw.items()}
-
-    # Cross-character consistency = 1 - std_dev of character averages
-    if len(char_avgs_raw) > 1:
-        values = list(char_avgs_raw.values())
-        mean = sum(values) / len(values)
-        variance = sum((v - mean) ** 2 for v in values) / len(values)
-        std_dev = variance ** 0.5
-        cross_char = max(0, 1 - std_dev)
-    else:
-        cross_char = 1.0 if char_avgs_raw else None
-
-    health = avg_score * 0.4 + pass_rate * 0.3 + (cross_char or 0) * 0.3 if scores else None
-
     return {
         "franchise_id": franchise_id,
         "franchise_name": franchise.name,
-        "total_evals": total,
-        "avg_score": round(avg_score, 4),
-        "pass_rate": round(pass_rate, 4),
-        "cross_character_consistency": round(cross_char, 4) if cross_char is not None else None,
-        "world_building_consistency": round(cross_char, 4) if cross_char is not None else None,  # same metric for now
-        "health_score": round(health, 4) if health is not None else None,
-        "character_breakdown": char_avgs,
+        **health,
+        "character_breakdown": {
+            char_name_map.get(cid, f"Character {cid}"): round(v, 1) for cid, v in char_avgs_raw.items()
+        },
     }
 
 
+async def daily_health(db: AsyncSession, franchise_id: int, org_id: int, days: int = 30) -> List[dict]:
+    """Health per day over the last ``days``, newest first, from the day rollups."""
+    since = _period_start(datetime.utcnow() - timedelta(days=days), "day")
+    result = await db.execute(
+        select(FranchiseRollup.period_start, FranchiseRollup.character_id, *_rollup_sums())
+        .where(
+            FranchiseRollup.org_id == org_id,
+            FranchiseRollup.franchise_id == franchise_id,
+            FranchiseRollup.granularity == "day",
+            FranchiseRollup.period_start >= since,
+        )
+        .group_by(FranchiseRollup.period_start, FranchiseRollup.character_id)
+    )
+    by_day: dict = {}
+    for period_start, character_id, *sums in result.all():
+        by_day.setdefault(period_start, {})[character_id] = tuple(sums)
+
+    rows = []
+    for period_start in sorted(by_day, reverse=True):
+        health = _health(by_day[period_start])
+        health.pop("character_averages")
+        rows.append({"period_start": period_start, "period_end": period_start + timedelta(days=1), **health})
+    return rows
+
+
 async def save_aggregate(db: AsyncSession, franchise_id: int, org_id: int, health: dict) -> FranchiseEvaluationAggregate:
     now = datetime.utcnow()
     agg = FranchiseEvaluationAggregate(
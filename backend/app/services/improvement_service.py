@@ -1,14 +1,18 @@
 """Continuous improvement flywheel — failure patterns, trajectories, suggestions."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, List, Tuple
 
-from sqlalchemy import select, func
+import numpy as np
+from sqlalchemy import and_, delete, or_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.database import epoch_seconds, upsert
 from app.models.core import (
     FailurePattern,
+    FailurePatternScan,
     ImprovementTrajectory,
     EvalRun,
     CriticResult,
@@ -16,72 +20,160 @@ from app.models.core import (
 )
 
 
-async def detect_failure_patterns(db: AsyncSession, org_id: int, character_id: Optional[int] = None) -> List[FailurePattern]:
-    """Analyze recent eval results to detect recurring failure patterns."""
-    q = select(EvalRun).where(
-        EvalRun.org_id == org_id,
-        EvalRun.status == "completed",
+def _pattern(pattern_type: str, subject, count: int, runs: int) -> dict:
+    if pattern_type == "recurring_decision":
+        return {
+            "critic_id": None,
+            "description": f"Recurring '{subject}' decision ({count} times in the last {runs} evaluations)",
+            "severity": "high" if subject in ("block", "escalate") else "medium",
+            "suggested_fix": f"Review content guidelines — frequent '{subject}' decisions suggest systematic issues",
+        }
+    return {
+        "critic_id": int(subject),
+        "description": (
+            f"Critic {subject} consistently scoring below {settings.FAILURE_PATTERN_LOW_SCORE} "
+            f"({count} times in the last {runs} evaluations)"
+        ),
+        "severity": "medium",
+        "suggested_fix": f"Enrich character card or adjust critic rubric for critic {subject}",
+    }
+
+
+def _in_scope(model, org_id: int, character_id: Optional[int]):
+    return and_(
+        model.org_id == org_id,
+        model.character_id == character_id if character_id else model.character_id.is_(None),
+    )
+
+
+async def _count_failures(db: AsyncSession, runs) -> Tuple[Dict[str, int], int, Optional[datetime], Optional[int]]:
+    """Pattern counts over the runs selected by ``runs`` (a subquery of run IDs), in two grouped queries.
+
+    Returns ``(counts, runs counted, completed_at, id)`` with the newest run by ``(completed_at, id)``.
+    """
+    counts: Dict[str, int] = {}
+    total = 0
+    decisions = await db.execute(
+        select(EvalRun.decision, func.count())
+        .where(EvalRun.id.in_(runs))
+        .group_by(EvalRun.decision)
     )
+    for decision, count in decisions.all():
+        total += count
+        if decision and decision != "pass":
+            counts[f"recurring_decision:{decision}"] = count
+
+    low_scores = await db.execute(
+        select(CriticResult.critic_id, func.count())
+        .join(EvalResult, EvalResult.id == CriticResult.eval_result_id)
+        .where(
+            EvalResult.eval_run_id.in_(runs),
+            CriticResult.score < settings.FAILURE_PATTERN_LOW_SCORE,
+        )
+        .group_by(CriticResult.critic_id)
+    )
+    for critic_id, count in low_scores.all():
+        counts[f"recurring_low_score:{critic_id}"] = count
+
+    newest = (await db.execute(
+        select(EvalRun.completed_at, EvalRun.id)
+        .where(EvalRun.id.in_(runs), EvalRun.completed_at.isnot(None))
+        .order_by(EvalRun.completed_at.desc(), EvalRun.id.desc())
+        .limit(1)
+    )).first()
+    return counts, total, newest[0] if newest else None, newest[1] if newest else None
+
+
+async def detect_failure_patterns(
+    db: AsyncSession, org_id: int, character_id: Optional[int] = None, incremental: bool = False,
+) -> List[FailurePattern]:
+    """Count recurring failures and upsert one pattern per decision / critic.
+
+    A full detection counts the ``FAILURE_PATTERN_WINDOW_RUNS`` most recent completed
+    runs. ``incremental`` adds the runs completed since the scope's last detection to
+    its running counts instead; once those cover twice the window (or there are none
+    yet) it recounts the window in full, so old failures age out. Patterns that no
+    longer recur are deleted.
+    """
+    scope = [EvalRun.org_id == org_id, EvalRun.status == "completed"]
     if character_id:
-        q = q.where(EvalRun.character_id == character_id)
-    q = q.order_by(EvalRun.created_at.desc()).limit(100)
+        scope.append(EvalRun.character_id == character_id)
+    scan = (await db.execute(
+        select(FailurePatternScan).where(_in_scope(FailurePatternScan, org_id, character_id))
+    )).scalar_one_or_none()
 
-    result = await db.execute(q)
-    runs = list(result.scalars().all())
-
-    # Count failures by decision type
-    decision_counts = {}
-    low_score_critics = {}
-    for run in runs:
-        if run.decision and run.decision != "pass":
-            decision_counts[run.decision] = decision_counts.get(run.decision, 0) + 1
-
-        # Check for low-scoring critics
-        eval_result = await db.execute(
-            select(EvalResult).where(EvalResult.eval_run_id == run.id)
+    window = settings.FAILURE_PATTERN_WINDOW_RUNS
+    if incremental and scan and scan.last_completed_at and (scan.runs_scanned or 0) < 2 * window:
+        runs = select(EvalRun.id).where(
+            *scope,
+            or_(
+                EvalRun.completed_at > scan.last_completed_at,
+                and_(EvalRun.completed_at == scan.last_completed_at, EvalRun.id > (scan.last_eval_run_id or 0)),
+            ),
+        )
+        new_counts, total, last_completed_at, last_id = await _count_failures(db, runs)
+        counts = dict(scan.counts or {})
+        for key, count in new_counts.items():
+            counts[key] = counts.get(key, 0) + count
+        total += scan.runs_scanned or 0
+    else:
+        runs = (
+            select(EvalRun.id).where(*scope)
+            .order_by(EvalRun.created_at.desc())
+            .limit(window)
         )
-        er = eval_result.scalar_one_or_none()
-        if er and er.critic_scores:
-            for critic_id_str, score in er.critic_scores.items():
-                if score < 0.5:
-                    key = int(critic_id_str)
-                    if key not in low_score_critics:
-                        low_score_critics[key] = 0
-                    low_score_critics[key] += 1
-
-    patterns = []
-    # Create/update failure patterns
-    for decision, count in decision_counts.items():
-        if count >= 3:  # threshold for pattern
-            pattern = FailurePattern(
-                character_id=character_id,
-                pattern_type="recurring_decision",
-                description=f"Recurring '{decision}' decision ({count} times in recent evaluations)",
-                frequency=count,
-                severity="high" if decision in ("block", "escalate") else "medium",
-                suggested_fix=f"Review content guidelines — frequent '{decision}' decisions suggest systematic issues",
-                org_id=org_id,
-            )
-            db.add(pattern)
-            patterns.append(pattern)
-
-    for critic_id, count in low_score_critics.items():
-        if count >= 3:
-            pattern = FailurePattern(
-                character_id=character_id,
-                critic_id=critic_id,
-                pattern_type="recurring_low_score",
-                description=f"Critic {critic_id} consistently scoring below 0.5 ({count} times)",
-                frequency=count,
-                severity="medium",
-                suggested_fix=f"Enrich character card or adjust critic rubric for critic {critic_id}",
-                org_id=org_id,
-            )
-            db.add(pattern)
-            patterns.append(pattern)
+        counts, total, last_completed_at, last_id = await _count_failures(db, runs)
+
+    if scan is None:
+        scan = FailurePatternScan(character_id=character_id, org_id=org_id)
+        db.add(scan)
+    scan.counts = counts
+    scan.runs_scanned = total
+    if last_completed_at:
+        scan.last_completed_at, scan.last_eval_run_id = last_completed_at, last_id
+
+    recurring = {key: count for key, count in counts.items() if count >= settings.FAILURE_PATTERN_MIN_COUNT}
+    await db.execute(delete(FailurePattern).where(
+        _in_scope(FailurePattern, org_id, character_id),
+        FailurePattern.pattern_key.isnot(None),
+        FailurePattern.pattern_key.notin_(list(recurring)),
+    ))
+    if not recurring:
+        await db.flush()
+        return []
 
+    now = datetime.utcnow()
+    rows = []
+    for key, count in recurring.items():
+        pattern_type, subject = key.split(":", 1)
+        rows.append({
+            "character_id": character_id,
+            "pattern_type": pattern_type,
+            "pattern_key": key,
+            "frequency": count,
+            "org_id": org_id,
+            "updated_at": now,
+            **_pattern(pattern_type, subject, count, total),
+        })
+    stmt = upsert(db, FailurePattern).values(rows)
+    # Character patterns conflict on the full key; org-wide ones (no character) on the partial index
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["org_id", "character_id", "pattern_key"] if character_id else ["org_id", "pattern_key"],
+        index_where=None if character_id else FailurePattern.character_id.is_(None),
+        set_={
+            field: stmt.excluded[field]
+            for field in ("critic_id", "description", "severity", "suggested_fix", "frequency", "updated_at")
+        },
+    ))
     await db.flush()
-    return patterns
+
+    result = await db.execute(
+        select(FailurePattern)
+        .where(_in_scope(FailurePattern, org_id, character_id), FailurePattern.pattern_key.in_(list(recurring)))
+        .order_by(FailurePattern.frequency.desc(), FailurePattern.id)
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
 
 
 async def get_failure_patterns(db: AsyncSession, org_id: int, character_id: Optional[int] = None) -> List[FailurePattern]:
@@ -93,36 +185,93 @@ async def get_failure_patterns(db: AsyncSession, org_id: int, character_id: Opti
     return list(result.scalars().all())
 
 
+_HOUR, _DAY, _WEEK = 3600, 86400, 7 * 86400
+_MONDAY_OFFSET = 3 * _DAY  # the epoch is a Thursday; weeks start on Monday
+
+
+def bucket_seconds(span: timedelta) -> int:
+    """Hour, day or week buckets, whichever gives a chartable number of points for the range."""
+    if span <= timedelta(days=2):
+        return _HOUR
+    if span <= timedelta(days=90):
+        return _DAY
+    return _WEEK
+
+
+def lttb(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of at most ``budget`` points that keep the shape."""
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    picked = [0]
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)
+    for i in range(budget - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # The next bucket's mean is the third corner of the triangle
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        ax, ay = x[picked[-1]], y[picked[-1]]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        picked.append(lo + int(area.argmax()))
+    picked.append(n - 1)
+    return np.array(picked)
+
+
+def trend_from_buckets(x: np.ndarray, means: np.ndarray, counts: np.ndarray) -> str:
+    """Sign of the count-weighted least-squares fit of bucket means over the range."""
+    if counts.sum() < 5 or len(x) < 2:
+        return "stable"
+    w = counts / counts.sum()
+    x_mean = (w * x).sum()
+    spread = (w * (x - x_mean) ** 2).sum()
+    if spread == 0:
+        return "stable"
+    slope = (w * (x - x_mean) * (means - (w * means).sum())).sum() / spread
+    change = slope * (x[-1] - x[0])
+    if change > settings.TRAJECTORY_TREND_MARGIN:
+        return "improving"
+    if change < -settings.TRAJECTORY_TREND_MARGIN:
+        return "degrading"
+    return "stable"
+
+
 async def compute_trajectory(db: AsyncSession, org_id: int, character_id: int, metric: str = "avg_score") -> ImprovementTrajectory:
-    """Compute improvement trajectory over time."""
-    result = await db.execute(
-        select(EvalRun).where(
-            EvalRun.org_id == org_id,
-            EvalRun.character_id == character_id,
-            EvalRun.status == "completed",
-            EvalRun.overall_score.isnot(None),
-        ).order_by(EvalRun.created_at)
+    """Compute improvement trajectory over time.
+
+    Scores are averaged per hour, day or week bucket in SQL (the bucket size follows
+    the range), the trend is fitted to the bucket means, and the stored points are
+    downsampled to ``TRAJECTORY_POINT_BUDGET`` with LTTB.
+    """
+    scope = (
+        EvalRun.org_id == org_id,
+        EvalRun.character_id == character_id,
+        EvalRun.status == "completed",
+        EvalRun.overall_score.isnot(None),
     )
-    runs = list(result.scalars().all())
+    first, last = (await db.execute(select(func.min(EvalRun.created_at), func.max(EvalRun.created_at)).where(*scope))).one()
 
     data_points = []
-    for run in runs:
-        data_points.append({
-            "date": run.created_at.isoformat() if run.created_at else None,
-            "value": run.overall_score,
-        })
-
-    # Determine trend
     trend = "stable"
-    if len(data_points) >= 5:
-        recent = [d["value"] for d in data_points[-5:]]
-        older = [d["value"] for d in data_points[:5]]
-        recent_avg = sum(recent) / len(recent)
-        older_avg = sum(older) / len(older)
-        if recent_avg > older_avg + 0.05:
-            trend = "improving"
-        elif recent_avg < older_avg - 0.05:
-            trend = "degrading"
+    if first is not None:
+        seconds = bucket_seconds(last - first)
+        offset = _MONDAY_OFFSET if seconds == _WEEK else 0
+        bucket = ((epoch_seconds(db, EvalRun.created_at) + offset) // seconds).label("bucket")
+        rows = (await db.execute(
+            select(bucket, func.count(), func.avg(EvalRun.overall_score))
+            .where(*scope)
+            .group_by(bucket)
+            .order_by(bucket)
+        )).all()
+        starts = np.array([int(r[0]) * seconds - offset for r in rows], dtype=float)
+        counts = np.array([r[1] for r in rows], dtype=float)
+        means = np.array([float(r[2]) for r in rows])
+        trend = trend_from_buckets(starts, means, counts)
+        for i in lttb(starts, means, settings.TRAJECTORY_POINT_BUDGET):
+            data_points.append({
+                "date": datetime.utcfromtimestamp(starts[i]).isoformat(),
+                "value": round(means[i], 4),
+                "count": int(counts[i]),
+            })
 
     trajectory = ImprovementTrajectory(
         character_id=character_id,
@@ -0,0 +1,183 @@
+"""Incremental CI — reuse results of unchanged cases from the last green run.
+
+Each case gets a fingerprint over everything that determines its evaluation: the
+content, modality, character and active card version, the critics that would run
+(IDs, prompt templates, weights, extra instructions) and the judging/model settings
+of the profile, the pre-screen's taxonomy tags and the active decision predictor
+version. Profiles with a ``near_duplicate_mode`` depend on evaluation history, so
+their cases are never reused. Runs of ``/api/ci/batch`` and ``/api/test-suites/{id}/run`` store the
+fingerprint next to each case result; the next run reuses the result of every case
+whose fingerprint matches one in the most recent green run of the same scope (the
+same test suite, or ad-hoc batches) and only evaluates the rest.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Optional, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import CIBatchRun
+from app.schemas.evaluations import EvalRequest
+from app.services import evaluation_service
+
+# Decisions that never came from a real evaluation and so are never reused
+_NON_REUSABLE_DECISIONS = ("sampled-pass", "error", "skipped")
+
+
+def _config_signature(context: dict) -> Optional[dict]:
+    """Everything in an evaluation context that can change a case's result.
+
+    None when the result depends on evaluation history (near-duplicate reuse or
+    seeding), so the case is never reused.
+    """
+    profile = context["profile"]
+    if profile and profile.near_duplicate_mode:
+        return None
+    screener, predictor = context["screener"], context["predictor"]
+    critics = []
+    for critic, config in context["critics_with_config"]:
+        weight = config.weight_override if config and config.weight_override else critic.default_weight
+        critics.append([
+            critic.id,
+            critic.prompt_template,
+            weight,
+            config.extra_instructions if config else None,
+        ])
+    return {
+        "card_version_id": context["card_version"].id,
+        "consent_ok": context["consent_ok"],
+        "critics": sorted(critics, key=lambda c: c[0]),
+        "model": settings.PRIMARY_LLM,
+        "sampling_rate": profile.sampling_rate if profile else settings.DEFAULT_SAMPLING_RATE,
+        "profile": [
+            profile.id,
+            profile.judge_mode,
+            profile.judge_confidence_threshold,
+            profile.judge_boundary_margin,
+            profile.escalation_judge_id,
+            profile.routing_policy,
+            profile.routing_pinned_model,
+            profile.routing_reference_model,
+            profile.routing_min_agreement,
+            profile.tiered_evaluation,
+            profile.rapid_screen_critics,
+            profile.deep_eval_critics,
+            profile.prescreen_mode,
+            profile.predictor_mode,
+            profile.predictor_audit_rate,
+        ] if profile else None,
+        # State the pre-screen and predictor modes act on
+        "prescreen_tags": screener["tag_signature"] if screener else None,
+        "predictor": [predictor.id, predictor.version] if predictor else None,
+    }
+
+
+def case_fingerprint(request: EvalRequest, signature: dict) -> str:
+    content = request.content if isinstance(request.content, str) else json.dumps(request.content, sort_keys=True)
+    payload = json.dumps({
+        "content": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "modality": request.modality,
+        "character_id": request.character_id,
+        "config": signature,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def fingerprint_requests(db: AsyncSession, requests: List[EvalRequest], org_id: int) -> List[Optional[str]]:
+    """Fingerprint per request; None where the context can't be loaded or depends on history (always re-run)."""
+    signatures: dict = {}
+    fingerprints = []
+    for request in requests:
+        key = evaluation_service.context_key(request)
+        if key not in signatures:
+            try:
+                context = await evaluation_service.load_context(db, request, org_id)
+                await evaluation_service.load_critics(db, request, org_id, context)
+                signatures[key] = _config_signature(context)
+            except ValueError:
+                signatures[key] = None
+        signature = signatures[key]
+        fingerprints.append(case_fingerprint(request, signature) if signature is not None else None)
+    return fingerprints
+
+
+async def last_green_results(db: AsyncSession, org_id: int, test_suite_id: Optional[int]) -> dict:
+    """``{fingerprint: stored case result}`` from the most recent green run in scope."""
+    scope = CIBatchRun.test_suite_id == test_suite_id if test_suite_id else CIBatchRun.test_suite_id.is_(None)
+    result = await db.execute(
+        select(CIBatchRun).where(
+            CIBatchRun.org_id == org_id,
+            CIBatchRun.overall_passed == True,  # noqa: E712
+            scope,
+        ).order_by(CIBatchRun.completed_at.desc()).limit(1)
+    )
+    run = result.scalar_one_or_none()
+    if not run:
+        return {}
+    return {
+        r["fingerprint"]: r for r in (run.results or [])
+        if r.get("fingerprint") and r.get("eval_run_id") and r.get("decision") not in _NON_REUSABLE_DECISIONS
+    }
+
+
+async def run_incremental(
+    db: AsyncSession,
+    requests: List[EvalRequest],
+    org_id: int,
+    test_suite_id: Optional[int] = None,
+    incremental: bool = True,
+    concurrency: Optional[int] = None,
+    on_result=None,
+    should_stop=None,
+) -> Tuple[List[Optional[dict]], List[Optional[str]]]:
+    """Reuse unchanged cases' results and evaluate the rest with ``evaluate_batch``.
+
+    Returns ``(outcomes, fingerprints)`` in request order. Outcomes use the
+    ``evaluate_batch`` shape plus ``reused`` and ``fingerprint``; ``on_result`` and
+    ``should_stop`` behave as in ``evaluate_batch`` (reused outcomes are reported first).
+    """
+    fingerprints: List[Optional[str]] = [None] * len(requests)
+    cache: dict = {}
+    if incremental:
+        fingerprints = await fingerprint_requests(db, requests, org_id)
+        cache = await last_green_results(db, org_id, test_suite_id)
+
+    outcomes: List[Optional[dict]] = [None] * len(requests)
+    to_run = []
+    for index, fingerprint in enumerate(fingerprints):
+        cached = cache.get(fingerprint) if fingerprint else None
+        if cached is None:
+            to_run.append(index)
+            continue
+        outcome = {
+            "index": index,
+            "eval_run_id": cached["eval_run_id"],
+            "status": "completed",
+            "tier": None,
+            "overall_score": cached.get("score"),
+            "decision": cached.get("decision"),
+            "error": None,
+            "reused": True,
+            "fingerprint": fingerprint,
+        }
+        outcomes[index] = outcome
+        if on_result:
+            await on_result(outcome)
+
+    async def relay(outcome: dict) -> None:
+        index = to_run[outcome["index"]]
+        outcome = {**outcome, "index": index, "reused": False, "fingerprint": fingerprints[index]}
+        outcomes[index] = outcome
+        if on_result:
+            await on_result(outcome)
+
+    if to_run:
+        await evaluation_service.evaluate_batch(
+            db, [requests[i] for i in to_run], org_id,
+            concurrency=concurrency, on_result=relay, should_stop=should_stop,
+        )
+    return outcomes, fingerprints
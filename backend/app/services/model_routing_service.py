@@ -0,0 +1,273 @@
+"""Model routing — pick a model or custom judge for each critic call from rolling stats.
+
+Every critic call records latency, error and cost against its route key (the built-in
+model name, e.g. ``gpt-4o-mini``, or ``judge:<id>`` for a CustomJudge). Whenever two
+judges score the same critic call (multi-judge, adaptive escalation or a routing
+audit), agreement with the profile's reference judge is recorded too. Profiles with a
+``routing_policy`` then pick a route per call:
+
+- ``pinned`` — always the profile's ``routing_pinned_model``.
+- ``fastest`` — lowest p50 latency among routes within the error budget.
+- ``cheapest_within_quality`` — lowest cost per call among routes within the error
+  budget whose agreement with the reference judge is at least ``routing_min_agreement``.
+
+Stats are per process, kept per org (critic calls record to the org set with
+``org_scope``) and bounded to the last ``ROUTING_WINDOW_SIZE`` calls per route; they
+are warmed from recent CriticResult rows the first time an org routes.
+"""
+from __future__ import annotations
+
+import contextlib
+import random
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Optional, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import CustomJudge, CriticResult, EvalResult, EvalRun, EvaluationProfile
+
+ROUTING_POLICIES = ("cheapest_within_quality", "fastest", "pinned")
+
+# Built-in routes, keyed by the model name recorded in CriticResult.model_used
+BUILTIN_ROUTES = {
+    "gpt-4o-mini": "openai",
+    "claude-3-haiku-20240307": "anthropic",
+}
+
+# Typical critic call size, used to price routes that have no observed cost yet
+_TYPICAL_PROMPT_TOKENS = 1500
+_TYPICAL_COMPLETION_TOKENS = 200
+
+# Agreement: two verdicts within this distance count as agreeing
+_AGREEMENT_TOLERANCE = 0.1
+
+# {(org_id, route_key): deque[(latency_ms, is_error, cost)]}
+_observations: dict = defaultdict(lambda: deque(maxlen=settings.ROUTING_WINDOW_SIZE))
+# {(org_id, route_key, reference_key): deque[bool]}
+_agreements: dict = defaultdict(lambda: deque(maxlen=settings.ROUTING_WINDOW_SIZE))
+# Orgs whose history has already been loaded into this process
+_warmed_orgs: set = set()
+
+# The org whose windows critic calls in this context record to
+_routing_org: ContextVar[Optional[int]] = ContextVar("routing_org", default=None)
+
+
+def judge_route_key(judge: CustomJudge) -> str:
+    return f"judge:{judge.id}"
+
+
+# ─── Recording ─────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def org_scope(org_id: Optional[int]):
+    """Within the block (and tasks started inside it), critic calls record to the org's windows."""
+    token = _routing_org.set(org_id)
+    try:
+        yield
+    finally:
+        _routing_org.reset(token)
+
+
+def record_call(
+    route_key: str, latency_ms: Optional[int], error: bool, cost: Optional[float], org_id: Optional[int] = None,
+) -> None:
+    """Record one critic call against a route of ``org_id`` (default: the current ``org_scope``)."""
+    if not route_key or route_key == "unknown":
+        return
+    org = org_id if org_id is not None else _routing_org.get()
+    _observations[(org, route_key)].append((latency_ms or 0, error, cost or 0.0))
+
+
+def record_agreement(route_key: str, reference_key: str, score: float, reference_score: float) -> None:
+    """Record whether a route's verdict agreed with the reference judge's verdict."""
+    if not route_key or route_key == reference_key:
+        return
+    agreed = abs(score - reference_score) <= _AGREEMENT_TOLERANCE
+    _agreements[(_routing_org.get(), route_key, reference_key)].append(agreed)
+
+
+def record_judge_scores(judge_scores: dict, reference_key: str) -> None:
+    """Record agreement for every judge that scored alongside the reference judge."""
+    if reference_key not in judge_scores:
+        return
+    reference_score = judge_scores[reference_key]
+    for route_key, score in judge_scores.items():
+        record_agreement(route_key, reference_key, score, reference_score)
+
+
+async def warm_start(db: AsyncSession, org_id: int, limit: int = 1000) -> None:
+    """Seed latency/error/cost windows from the org's most recent critic results (once per process)."""
+    if org_id in _warmed_orgs:
+        return
+    _warmed_orgs.add(org_id)
+    result = await db.execute(
+        select(
+            CriticResult.model_used,
+            CriticResult.latency_ms,
+            CriticResult.estimated_cost,
+            CriticResult.flags,
+        )
+        .join(EvalResult, CriticResult.eval_result_id == EvalResult.id)
+        .join(EvalRun, EvalResult.eval_run_id == EvalRun.id)
+        .where(EvalRun.org_id == org_id, CriticResult.model_used.isnot(None))
+        .order_by(CriticResult.id.desc())
+        .limit(limit)
+    )
+    # Oldest first so the newest calls end up at the front of the window
+    for model_used, latency_ms, cost, flags in reversed(result.all()):
+        if "+" in (model_used or ""):
+            continue  # combined multi-judge rows aren't attributable to one route
+        record_call(model_used, latency_ms, "critic_error" in (flags or []), cost, org_id)
+
+
+# ─── Statistics ────────────────────────────────────────────────
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(int(round(pct / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[idx]
+
+
+def _estimated_cost(route_key: str, judges: dict) -> float:
+    from app.services.critic_service import _MODEL_PRICING, _judge_pricing, _price_tokens
+
+    if route_key in judges:
+        pricing = _judge_pricing(judges[route_key])
+    else:
+        pricing = _MODEL_PRICING.get(route_key, (0.15, 0.60))
+    return _price_tokens(pricing, _TYPICAL_PROMPT_TOKENS, _TYPICAL_COMPLETION_TOKENS)
+
+
+def get_route_stats(
+    org_id: Optional[int], route_key: str, reference_key: Optional[str] = None, judges: Optional[dict] = None,
+) -> dict:
+    """Rolling stats for one of the org's routes: p50/p95 latency, error rate, cost per call, agreement."""
+    obs = list(_observations.get((org_id, route_key), ()))
+    ok = [o for o in obs if not o[1]]
+    latencies = sorted(o[0] for o in ok)
+    costs = [o[2] for o in ok if o[2]]
+
+    agreement = None
+    agreement_samples = 0
+    if reference_key:
+        if route_key == reference_key:
+            agreement = 1.0
+        else:
+            window = _agreements.get((org_id, route_key, reference_key), ())
+            agreement_samples = len(window)
+            if agreement_samples:
+                agreement = sum(window) / agreement_samples
+
+    return {
+        "route": route_key,
+        "calls": len(obs),
+        "p50_latency_ms": _percentile(latencies, 50),
+        "p95_latency_ms": _percentile(latencies, 95),
+        "error_rate": round(sum(1 for o in obs if o[1]) / len(obs), 4) if obs else None,
+        "cost_per_call": round(sum(costs) / len(costs), 8) if costs else _estimated_cost(route_key, judges or {}),
+        "cost_observed": bool(costs),
+        "reference": reference_key,
+        "agreement": round(agreement, 4) if agreement is not None else None,
+        "agreement_samples": agreement_samples,
+    }
+
+
+def list_route_stats(
+    org_id: int, reference_key: Optional[str] = None, judges: Optional[List[CustomJudge]] = None,
+) -> List[dict]:
+    judges_by_key = {judge_route_key(j): j for j in (judges or [])}
+    # Only built-ins and the org's current judges (a deleted judge's window may linger)
+    observed = {route for org, route in _observations if org == org_id and not route.startswith("judge:")}
+    keys = set(BUILTIN_ROUTES) | set(judges_by_key) | observed
+    return [get_route_stats(org_id, k, reference_key, judges_by_key) for k in sorted(keys)]
+
+
+# ─── Route Selection ───────────────────────────────────────────
+
+async def get_candidates(db: AsyncSession, org_id: int, modality: str = "text") -> List[CustomJudge]:
+    """Active custom judges of the org that can handle the modality."""
+    from app.services import judge_registry_service
+
+    judges = await judge_registry_service.list_judges(db, org_id)
+    return [
+        j for j in judges
+        if j.health_status != "down" and (not j.capabilities or modality in j.capabilities)
+    ]
+
+
+def reference_route(profile: Optional[EvaluationProfile], judges: Optional[List[CustomJudge]] = None) -> str:
+    """The profile's reference judge, falling back to the platform default if unavailable."""
+    reference = (profile.routing_reference_model if profile else None) or settings.ROUTING_REFERENCE_MODEL
+    if reference in BUILTIN_ROUTES or reference in {judge_route_key(j) for j in (judges or [])}:
+        return reference
+    return settings.ROUTING_REFERENCE_MODEL
+
+
+def choose_route(profile: EvaluationProfile, judges: List[CustomJudge]) -> dict:
+    """Pick a route for one critic call under the profile's policy.
+
+    Returns ``{"route", "judge", "audit_route", "audit_judge"}``. ``judge`` is the
+    CustomJudge for ``judge:<id>`` routes (None for built-ins). ``audit_route`` is set
+    when exploring a route that lacks agreement data: the caller should also score the
+    call with that reference judge so the new route's agreement gets measured.
+    """
+    judges_by_key = {judge_route_key(j): j for j in judges}
+    reference = reference_route(profile, judges)
+    routes = list(BUILTIN_ROUTES) + list(judges_by_key)
+    policy = profile.routing_policy
+
+    def plan(route_key: str, audit: bool = False) -> dict:
+        return {
+            "route": route_key,
+            "judge": judges_by_key.get(route_key),
+            "audit_route": reference if audit else None,
+            "audit_judge": judges_by_key.get(reference) if audit else None,
+        }
+
+    if policy == "pinned":
+        pinned = profile.routing_pinned_model
+        return plan(pinned if pinned in routes else reference)
+
+    stats = {k: get_route_stats(profile.org_id, k, reference, judges_by_key) for k in routes}
+    max_error_rate = settings.ROUTING_MAX_ERROR_RATE
+    healthy = [
+        k for k in routes
+        if stats[k]["error_rate"] is None or stats[k]["calls"] < settings.ROUTING_MIN_SAMPLES
+        or stats[k]["error_rate"] <= max_error_rate
+    ]
+    if not healthy:
+        return plan(reference)
+
+    if policy == "fastest":
+        unmeasured = [k for k in healthy if stats[k]["calls"] < settings.ROUTING_MIN_SAMPLES]
+        if unmeasured and random.random() < settings.ROUTING_EXPLORATION_RATE:
+            return plan(random.choice(unmeasured))
+        measured = [k for k in healthy if stats[k]["p50_latency_ms"] is not None] or healthy
+        return plan(min(measured, key=lambda k: stats[k]["p50_latency_ms"] or float("inf")))
+
+    # cheapest_within_quality
+    min_agreement = profile.routing_min_agreement
+    if min_agreement is None:
+        min_agreement = settings.ROUTING_MIN_AGREEMENT
+    qualified = [
+        k for k in healthy
+        if k == reference or (
+            stats[k]["agreement_samples"] >= settings.ROUTING_MIN_SAMPLES
+            and stats[k]["agreement"] >= min_agreement
+        )
+    ]
+    unproven = [
+        k for k in healthy
+        if k not in qualified and stats[k]["agreement_samples"] < settings.ROUTING_MIN_SAMPLES
+        and stats[k]["cost_per_call"] < stats[reference]["cost_per_call"]
+    ]
+    if unproven and random.random() < settings.ROUTING_EXPLORATION_RATE:
+        # Try a cheaper route that hasn't proven its quality yet, audited against the reference
+        return plan(random.choice(unproven), audit=True)
+    if not qualified:
+        return plan(reference)
+    return plan(min(qualified, key=lambda k: stats[k]["cost_per_call"]))
@@ -0,0 +1,312 @@
+"""Near-duplicate index — MinHash/LSH over a character's exemplars and judged content.
+
+Content is reduced to character 5-gram shingles and a 128-permutation MinHash
+signature; signatures are banded (32 bands × 4 rows) into LSH buckets so a lookup only
+compares against items sharing at least one band. Candidates are then verified with
+the signature's Jaccard estimate against the profile's ``near_duplicate_threshold``.
+
+One index per (org, character) lives in this process. It is built lazily from the
+character's exemplars and most recent critic-judged eval runs, then maintained
+incrementally: ``_finalize_eval`` adds each newly judged run and the exemplar service
+adds/removes exemplars as they change. Profiles use it through ``near_duplicate_mode``:
+
+- ``reuse`` — complete the eval with the matched item's decision, skipping critics.
+- ``seed`` — reuse the matched run's clean passing critic verdicts and only run the
+  remaining critics.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Optional, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import CriticResult, EvalResult, EvalRun, ExemplarContent
+
+NEAR_DUPLICATE_MODES = ("reuse", "seed")
+
+# Runs whose decision did not come from critics: never indexed, trained on or compared
+NON_CRITIC_TIERS = ("prescreen", "predicted", "near_duplicate")
+
+_SHINGLE_SIZE = 5
+_NUM_PERM = 128
+_BANDS = 32
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 31) - 1  # keeps a * x + b within uint64
+
+_rng = np.random.default_rng(20240611)
+_PERM_A = _rng.integers(1, _PRIME, size=_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, size=_NUM_PERM, dtype=np.uint64)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+# ─── MinHash ───────────────────────────────────────────────────
+
+def _text(content) -> str:
+    if isinstance(content, dict):
+        content = content.get("content", content.get("text", ""))
+    return content if isinstance(content, str) else str(content or "")
+
+
+def shingles(text: str) -> np.ndarray:
+    """Hashed character shingles of whitespace/case-normalized text."""
+    norm = _WHITESPACE_RE.sub(" ", text.lower()).strip()
+    if not norm:
+        return np.zeros(0, dtype=np.uint64)
+    grams = {norm[i:i + _SHINGLE_SIZE] for i in range(max(len(norm) - _SHINGLE_SIZE + 1, 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of text, or None for empty content."""
+    hashed = shingles(text)
+    if not len(hashed):
+        return None
+    # (num_perm, n_shingles) universal hashes; the column minimum is the signature
+    values = (np.outer(_PERM_A, hashed % _PRIME) + _PERM_B[:, None]) % _PRIME
+    return values.min(axis=1)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float((a == b).mean())
+
+
+def _band_keys(sig: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [(band, sig[band * _ROWS:(band + 1) * _ROWS].tobytes()) for band in range(_BANDS)]
+
+
+# ─── Index ─────────────────────────────────────────────────────
+
+class CharacterIndex:
+    """LSH index of one character's judged items, keyed ``"eval:<id>"`` / ``"exemplar:<id>"``."""
+
+    def __init__(self, max_evals: int):
+        self.max_evals = max_evals
+        self.items: dict = {}
+        self.eval_keys: OrderedDict = OrderedDict()  # insertion order, for evicting the oldest runs
+        self.buckets: dict = defaultdict(set)
+
+    def add(self, key: str, text: str, meta: dict) -> None:
+        self.remove(key)
+        sig = signature(text)
+        if sig is None:
+            return
+        self.items[key] = {"signature": sig, **meta}
+        for band_key in _band_keys(sig):
+            self.buckets[band_key].add(key)
+        if key.startswith("eval:"):
+            self.eval_keys[key] = None
+            while len(self.eval_keys) > self.max_evals:
+                oldest, _ = self.eval_keys.popitem(last=False)
+                self.remove(oldest)
+
+    def remove(self, key: str) -> None:
+        item = self.items.pop(key, None)
+        if item is None:
+            return
+        self.eval_keys.pop(key, None)
+        for band_key in _band_keys(item["signature"]):
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def query(self, text: str, threshold: float, card_version_id: Optional[int] = None) -> Optional[dict]:
+        """Most similar indexed item with estimated Jaccard >= threshold.
+
+        With ``card_version_id``, items judged against another card version are skipped.
+        """
+        sig = signature(text)
+        if sig is None:
+            return None
+        candidates = set()
+        for band_key in _band_keys(sig):
+            candidates |= self.buckets.get(band_key, set())
+        best = None
+        for key in candidates:
+            item = self.items[key]
+            if card_version_id is not None and item.get("card_version_id") not in (None, card_version_id):
+                continue
+            similarity = estimated_jaccard(sig, item["signature"])
+            if similarity >= threshold and (best is None or similarity > best["similarity"]):
+                best = {k: v for k, v in item.items() if k != "signature"}
+                best.update(source=key, similarity=round(similarity, 4))
+        return best
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class Deduplicator:
+    """Filters texts that duplicate one already seen: same normalized hash, or an
+    estimated Jaccard similarity of at least ``threshold`` (LSH candidates only).
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.hashes: set = set()
+        self.index = CharacterIndex(max_evals=0)  # only "eval:" keys are capped
+
+    def add(self, text: str) -> bool:
+        """Record text; False (and not recorded) when it duplicates an earlier one."""
+        digest = text_hash(text)
+        norm = normalize_text(text)
+        if digest in self.hashes or self.index.query(norm, self.threshold) is not None:
+            return False
+        self.hashes.add(digest)
+        self.index.add(f"text:{len(self.hashes)}", norm, {})
+        return True
+
+
+def normalize_text(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a text."""
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", text.lower())).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+# {(org_id, character_id): CharacterIndex}
+_indexes: dict = {}
+
+
+def _eval_meta(eval_run: EvalRun) -> dict:
+    return {
+        "eval_run_id": eval_run.id,
+        "decision": eval_run.decision,
+        "score": eval_run.overall_score,
+        "card_version_id": eval_run.card_version_id,
+    }
+
+
+def _exemplar_meta(exemplar: ExemplarContent) -> dict:
+    # Exemplars are known-good content for any card version
+    return {"eval_run_id": exemplar.eval_run_id, "decision": "pass", "score": exemplar.eval_score}
+
+
+def _indexable(eval_run: EvalRun) -> bool:
+    return (
+        eval_run.status == "completed"
+        and eval_run.decision not in (None, "sampled-pass")
+        and eval_run.overall_score is not None
+        and eval_run.tier not in NON_CRITIC_TIERS
+    )
+
+
+async def get_index(db: AsyncSession, org_id: int, character_id: int) -> CharacterIndex:
+    """The character's index, built from exemplars and recent judged runs on first use."""
+    index = _indexes.get((org_id, character_id))
+    if index is not None:
+        return index
+
+    index = CharacterIndex(settings.NEAR_DUPLICATE_MAX_EVALS)
+    runs = await db.execute(
+        select(EvalRun).where(
+            EvalRun.org_id == org_id,
+            EvalRun.character_id == character_id,
+            EvalRun.status == "completed",
+            EvalRun.decision.isnot(None),
+            EvalRun.decision != "sampled-pass",
+            EvalRun.overall_score.isnot(None),
+            EvalRun.tier.notin_(NON_CRITIC_TIERS),
+        ).order_by(EvalRun.id.desc()).limit(settings.NEAR_DUPLICATE_MAX_EVALS)
+    )
+    for run in reversed(runs.scalars().all()):
+        index.add(f"eval:{run.id}", _text(run.input_content), _eval_meta(run))
+
+    exemplars = await db.execute(
+        select(ExemplarContent).where(
+            ExemplarContent.org_id == org_id, ExemplarContent.character_id == character_id,
+        )
+    )
+    for ex in exemplars.scalars().all():
+        index.add(f"exemplar:{ex.id}", _text(ex.content), _exemplar_meta(ex))
+
+    _indexes[(org_id, character_id)] = index
+    return index
+
+
+async def find_match(
+    db: AsyncSession, org_id: int, character_id: int, content: str, threshold: float,
+    card_version_id: Optional[int] = None,
+) -> Optional[dict]:
+    """Best near-duplicate of content judged against the same card version (or an exemplar):
+    ``{source, similarity, decision, score, eval_run_id, card_version_id}``.
+    """
+    index = await get_index(db, org_id, character_id)
+    return index.query(content, threshold, card_version_id)
+
+
+# ─── Incremental Maintenance ───────────────────────────────────
+# Only indexes already loaded are updated; unloaded ones pick changes up when built.
+
+def record_eval(eval_run: EvalRun) -> None:
+    index = _indexes.get((eval_run.org_id, eval_run.character_id))
+    if index is not None and _indexable(eval_run):
+        index.add(f"eval:{eval_run.id}", _text(eval_run.input_content), _eval_meta(eval_run))
+
+
+def record_exemplar(exemplar: ExemplarContent) -> None:
+    index = _indexes.get((exemplar.org_id, exemplar.character_id))
+    if index is not None:
+        index.add(f"exemplar:{exemplar.id}", _text(exemplar.content), _exemplar_meta(exemplar))
+
+
+def remove_exemplar(exemplar: ExemplarContent) -> None:
+    index = _indexes.get((exemplar.org_id, exemplar.character_id))
+    if index is not None:
+        index.remove(f"exemplar:{exemplar.id}")
+
+
+# ─── Seeding ───────────────────────────────────────────────────
+
+async def seed_critics(
+    db: AsyncSession, match: dict, critics_with_config: list, card_version_id: int,
+) -> Tuple[list, List[dict]]:
+    """Split critics into those still to run and reused verdicts from the matched run.
+
+    A matched run's critic verdict is reused when the run was judged against the same
+    card version and the verdict scored at least the deep-eval threshold with no flags;
+    everything else is re-run against the new content.
+    """
+    if not match.get("eval_run_id"):
+        return critics_with_config, []
+    result = await db.execute(
+        select(CriticResult)
+        .join(EvalResult, CriticResult.eval_result_id == EvalResult.id)
+        .join(EvalRun, EvalResult.eval_run_id == EvalRun.id)
+        .where(EvalResult.eval_run_id == match["eval_run_id"], EvalRun.card_version_id == card_version_id)
+    )
+    prior = {cr.critic_id: cr for cr in result.scalars().all()}
+
+    to_run, reused = [], []
+    for critic, config in critics_with_config:
+        cr = prior.get(critic.id)
+        if cr is None or cr.score < settings.DEEP_EVAL_THRESHOLD or cr.flags:
+            to_run.append((critic, config))
+            continue
+        reused.append({
+            "critic_id": critic.id,
+            "critic_name": critic.name,
+            "weight": config.weight_override if config and config.weight_override else critic.default_weight,
+            "score": cr.score,
+            "reasoning": cr.reasoning or "",
+            "flags": [],
+            "latency_ms": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "model_used": cr.model_used,
+            "estimated_cost": 0.0,
+            "reused_from": match["source"],
+        })
+    return to_run, reused
@@ -0,0 +1,255 @@
+"""Local pre-screen — compiled term matcher run before any LLM critic.
+
+Rules come from three places:
+
+- ``safety_pack.prohibited_topics`` — each topic's explicit ``terms`` (or, failing
+  that, a small built-in lexicon for common topic slugs), plus ``prohibited_terms``.
+- ``legal_pack.prohibited_terms`` — explicit legal restrictions.
+- ``TaxonomyTag.evaluation_rules["prescreen_terms"]`` — org-defined terms; the tag's
+  numeric ``evaluation_rules`` keys name the critics relevant to it.
+
+All terms of a card version are compiled into one case-insensitive regex alternation
+(cached per card version and tag set), so screening a piece of content is a single
+scan. A match yields ``block``, ``escalate`` or ``tag`` (run only the relevant critics).
+Profiles choose what to do with it via ``prescreen_mode``:
+
+- ``shadow`` — record the verdict on the EvalRun only (for precision measurement).
+- ``tag`` — also narrow the critic fan-out to the critics relevant to the matches.
+- ``enforce`` — also short-circuit ``block``/``escalate`` without calling any critic.
+"""
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, List
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.core import CardVersion, EvalRun, TaxonomyTag
+from app.services.near_duplicate_service import NON_CRITIC_TIERS
+
+PRESCREEN_MODES = ("shadow", "tag", "enforce")
+
+# Higher wins when several rules match
+_ACTION_RANK = {"tag": 1, "escalate": 2, "block": 3}
+
+# Fallback terms for common prohibited-topic slugs that don't list their own terms
+_TOPIC_LEXICON = {
+    "violence": ["kill", "murder", "stab", "shoot", "strangle", "beat up", "bloodshed"],
+    "weapons": ["gun", "rifle", "pistol", "knife", "grenade", "bomb"],
+    "sexual_content": ["sex", "sexual", "nude", "naked", "porn", "erotic"],
+    "drugs_alcohol": ["cocaine", "heroin", "weed", "marijuana", "drunk", "vodka", "whiskey"],
+    "substance_abuse": ["cocaine", "heroin", "meth", "overdose", "getting high"],
+    "profanity": ["fuck", "shit", "bitch", "bastard", "damn"],
+    "graphic_torture": ["torture", "tortured", "mutilate", "dismember"],
+    "self_harm": ["suicide", "self-harm", "cut myself", "kill myself"],
+    "real_world_politics": ["democrat", "republican", "election", "president biden", "president trump"],
+}
+
+# Critic categories relevant to each rule source, for tag-mode narrowing
+_SOURCE_CATEGORIES = {"safety": ["safety"], "legal": ["legal"], "taxonomy": []}
+
+_CACHE_SIZE = 512
+# {(card_version_id, tag_signature): compiled screener}
+_compiled: OrderedDict = OrderedDict()
+
+
+# ─── Rule Extraction ───────────────────────────────────────────
+
+def _topic_rules(topic: dict) -> List[dict]:
+    slug = str(topic.get("topic", "")).strip()
+    if not slug:
+        return []
+    strict = topic.get("severity", "strict") == "strict"
+    explicit = topic.get("terms") or topic.get("keywords")
+    if explicit:
+        # Terms the rights holder wrote down are trusted enough to block outright
+        terms, action = explicit, "block" if strict else "escalate"
+    else:
+        terms = _TOPIC_LEXICON.get(slug, [slug.replace("_", " ")])
+        action = "escalate" if strict else "tag"
+    return [
+        {"term": t, "source": "safety", "topic": slug, "action": action, "critic_ids": []}
+        for t in terms
+    ]
+
+
+def build_rules(card_version: CardVersion, tags: Optional[List[TaxonomyTag]] = None) -> List[dict]:
+    """Extract pre-screen rules from a card version's safety/legal packs and taxonomy tags."""
+    rules = []
+    safety = card_version.safety_pack or {}
+    for topic in safety.get("prohibited_topics", []) or []:
+        if isinstance(topic, dict):
+            rules.extend(_topic_rules(topic))
+        elif isinstance(topic, str):
+            rules.extend(_topic_rules({"topic": topic}))
+    for term in safety.get("prohibited_terms", []) or []:
+        rules.append({"term": term, "source": "safety", "topic": "prohibited_terms", "action": "block", "critic_ids": []})
+
+    legal = card_version.legal_pack or {}
+    for term in legal.get("prohibited_terms", []) or []:
+        rules.append({"term": term, "source": "legal", "topic": "legal_restriction", "action": "block", "critic_ids": []})
+
+    for tag in tags or []:
+        tag_rules = tag.evaluation_rules or {}
+        terms = tag_rules.get("prescreen_terms") or []
+        if not terms:
+            continue
+        action = {"critical": "block", "high": "escalate"}.get(tag.severity, "tag")
+        critic_ids = [int(k) for k in tag_rules if str(k).isdigit()]
+        for term in terms:
+            rules.append({"term": term, "source": "taxonomy", "topic": tag.slug, "action": action, "critic_ids": critic_ids})
+    return [r for r in rules if isinstance(r["term"], str) and r["term"].strip()]
+
+
+def compile_rules(rules: List[dict]) -> dict:
+    """Compile rules into one regex alternation plus a term -> rules lookup."""
+    by_term: dict = {}
+    for rule in rules:
+        by_term.setdefault(rule["term"].strip().lower(), []).append(rule)
+    if not by_term:
+        return {"pattern": None, "rules": {}, "rule_count": 0}
+    # Longest first so multi-word phrases win over their prefixes
+    alternation = "|".join(re.escape(t) for t in sorted(by_term, key=len, reverse=True))
+    pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+    return {"pattern": pattern, "rules": by_term, "rule_count": len(rules)}
+
+
+def _tag_signature(tags: Optional[List[TaxonomyTag]]) -> tuple:
+    # Everything build_rules reads from a tag: terms, severity and the critic-id keys
+    signature = []
+    for t in tags or []:
+        tag_rules = t.evaluation_rules or {}
+        if tag_rules.get("prescreen_terms"):
+            critic_ids = tuple(sorted(int(k) for k in tag_rules if str(k).isdigit()))
+            signature.append((t.id, t.severity, tuple(tag_rules["prescreen_terms"]), critic_ids))
+    return tuple(signature)
+
+
+def get_screener(card_version: CardVersion, tags: Optional[List[TaxonomyTag]] = None) -> dict:
+    """Compiled screener for a card version, cached (card versions are immutable)."""
+    key = (card_version.id, _tag_signature(tags))
+    screener = _compiled.get(key)
+    if screener is not None:
+        _compiled.move_to_end(key)
+        return screener
+    # The tag signature also keys incremental CI fingerprints
+    screener = {**compile_rules(build_rules(card_version, tags)), "tag_signature": key[1]}
+    _compiled[key] = screener
+    if len(_compiled) > _CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return screener
+
+
+# ─── Screening ─────────────────────────────────────────────────
+
+def screen(screener: dict, content: str) -> dict:
+    """Scan content once. Returns the strongest action and every matched rule."""
+    start = time.perf_counter_ns()
+    action = None
+    matches = []
+    critic_ids: set = set()
+    categories: set = set()
+    pattern = screener["pattern"]
+    if pattern is not None and content:
+        seen = set()
+        for m in pattern.finditer(content):
+            term = m.group(0).lower()
+            if term in seen:
+                continue
+            seen.add(term)
+            for rule in screener["rules"].get(term, []):
+                matches.append({
+                    "term": rule["term"],
+                    "source": rule["source"],
+                    "topic": rule["topic"],
+                    "action": rule["action"],
+                })
+                critic_ids.update(rule["critic_ids"])
+                categories.update(_SOURCE_CATEGORIES.get(rule["source"], []))
+                if action is None or _ACTION_RANK[rule["action"]] > _ACTION_RANK[action]:
+                    action = rule["action"]
+    return {
+        "action": action,
+        "matches": matches,
+        "critic_ids": sorted(critic_ids),
+        "categories": sorted(categories),
+        "elapsed_us": (time.perf_counter_ns() - start) // 1000,
+    }
+
+
+def screen_flags(result: dict) -> List[str]:
+    """Explicit flags describing a pre-screen verdict, e.g. ``prescreen_block``, ``prescreen:violence``."""
+    if not result["action"]:
+        return []
+    topics = sorted({m["topic"] for m in result["matches"]})
+    return [f"prescreen_{result['action']}"] + [f"prescreen:{t}" for t in topics]
+
+
+def relevant_critics(critics_with_config: list, result: dict) -> list:
+    """Narrow (critic, config) pairs to those relevant to the matched rules (never to nothing)."""
+    if not result["action"]:
+        return critics_with_config
+    ids, categories = set(result["critic_ids"]), set(result["categories"])
+    narrowed = [
+        (c, cfg) for c, cfg in critics_with_config
+        if c.id in ids or (c.category or "") in categories
+    ]
+    return narrowed or critics_with_config
+
+
+# ─── Precision ─────────────────────────────────────────────────
+
+async def get_precision(db: AsyncSession, org_id: int, days: int = 30) -> dict:
+    """Compare pre-screen verdicts with the LLM decision on runs that went through critics.
+
+    Enforced short-circuits (tier="prescreen") have no LLM decision and are only counted;
+    runs decided by the predictor or a near-duplicate match are left out of the comparison.
+    A ``block`` verdict is a hit when the LLM also blocked; an ``escalate`` verdict when
+    the LLM escalated or blocked; a ``tag`` verdict when the LLM did not pass outright.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = (await db.execute(
+        select(
+            EvalRun.prescreen_action,
+            EvalRun.tier,
+            EvalRun.decision,
+            func.count(EvalRun.id),
+        ).where(
+            EvalRun.org_id == org_id,
+            EvalRun.created_at >= since,
+            EvalRun.prescreen_action.isnot(None),
+        ).group_by(EvalRun.prescreen_action, EvalRun.tier, EvalRun.decision)
+    )).all()
+
+    hits_for = {
+        "block": {"block"},
+        "escalate": {"escalate", "block"},
+        "tag": {"regenerate", "quarantine", "escalate", "block"},
+    }
+    stats = {
+        action: {"predicted": 0, "compared": 0, "confirmed": 0, "enforced": 0, "llm_decisions": {}}
+        for action in hits_for
+    }
+    for action, tier, decision, count in rows:
+        entry = stats.get(action)
+        if entry is None:
+            continue
+        entry["predicted"] += count
+        if tier in NON_CRITIC_TIERS:
+            # No LLM decision to compare against
+            if tier == "prescreen":
+                entry["enforced"] += count
+            continue
+        if decision in (None, "sampled-pass"):
+            continue
+        entry["compared"] += count
+        entry["llm_decisions"][decision] = entry["llm_decisions"].get(decision, 0) + count
+        if decision in hits_for[action]:
+            entry["confirmed"] += count
+    for entry in stats.values():
+        entry["precision"] = round(entry["confirmed"] / entry["compared"], 4) if entry["compared"] else None
+    return {"days": days, "actions": stats}
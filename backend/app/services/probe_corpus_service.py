@@ -0,0 +1,115 @@
+"""Adversarial probe corpus — stored red-team prompts reused across runs.
+
+Probes are keyed by character, card version and attack category. New prompts are
+deduplicated against the corpus by the SHA-256 of their normalized text and by
+MinHash near-duplicate detection (``near_duplicate_service``), then stored with
+their running outcome: how often they were used, how often they landed and their
+last score. Red-team runs draw from the corpus first, favouring probes that have
+landed before and probes used least, and only generate prompts to top it up.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.core import AdversarialProbe
+from app.services import near_duplicate_service
+
+
+async def load_corpus(
+    db: AsyncSession, org_id: int, character_id: int, card_version_id: int, category: Optional[str] = None,
+) -> List[AdversarialProbe]:
+    q = select(AdversarialProbe).where(
+        AdversarialProbe.org_id == org_id,
+        AdversarialProbe.character_id == character_id,
+        AdversarialProbe.card_version_id == card_version_id,
+    )
+    if category:
+        q = q.where(AdversarialProbe.category == category)
+    result = await db.execute(q.order_by(AdversarialProbe.id))
+    return list(result.scalars().all())
+
+
+async def add_probes(
+    db: AsyncSession,
+    org_id: int,
+    character_id: int,
+    card_version_id: int,
+    category: str,
+    prompts: List[str],
+    source: str = "generated",
+    corpus: Optional[List[AdversarialProbe]] = None,
+) -> List[AdversarialProbe]:
+    """Store prompts not already in the category's corpus; returns the new probes.
+
+    ``corpus`` is the category's already-loaded corpus; new probes are appended to it.
+    """
+    if corpus is None:
+        corpus = await load_corpus(db, org_id, character_id, card_version_id, category)
+    dedup = near_duplicate_service.Deduplicator(settings.PROBE_CORPUS_NEAR_DUP_THRESHOLD)
+    for p in corpus:
+        dedup.add(p.prompt)
+
+    added = []
+    for prompt in prompts:
+        if not isinstance(prompt, str) or not prompt.strip() or not dedup.add(prompt):
+            continue
+        probe = AdversarialProbe(
+            character_id=character_id,
+            card_version_id=card_version_id,
+            category=category,
+            prompt=prompt,
+            prompt_hash=near_duplicate_service.text_hash(prompt),
+            source=source,
+            times_used=0,
+            times_landed=0,
+            org_id=org_id,
+        )
+        db.add(probe)
+        added.append(probe)
+    if added:
+        await db.flush()
+        corpus.extend(added)
+    return added
+
+
+def sample(corpus: List[AdversarialProbe], n: int, rng: np.random.Generator, exclude: Optional[set] = None) -> List[AdversarialProbe]:
+    """Up to ``n`` distinct probes, weighted toward those that landed and those used least."""
+    pool = [p for p in corpus if not exclude or p.id not in exclude]
+    if n <= 0 or not pool:
+        return []
+    if n >= len(pool):
+        return pool
+    weights = np.array([((p.times_landed or 0) + 1) / ((p.times_used or 0) + 2) for p in pool])
+    picks = rng.choice(len(pool), size=n, replace=False, p=weights / weights.sum())
+    return [pool[i] for i in sorted(picks)]
+
+
+def record_outcome(probe: AdversarialProbe, score: float, is_successful_attack: bool, error: bool = False) -> None:
+    probe.times_used = (probe.times_used or 0) + 1
+    if is_successful_attack and not error:
+        probe.times_landed = (probe.times_landed or 0) + 1
+    probe.last_score = round(score, 4)
+    probe.last_outcome = "error" if error else ("landed" if is_successful_attack else "resisted")
+    probe.last_used_at = datetime.utcnow()
+
+
+def probe_to_dict(probe: AdversarialProbe) -> dict:
+    return {
+        "id": probe.id,
+        "character_id": probe.character_id,
+        "card_version_id": probe.card_version_id,
+        "category": probe.category,
+        "prompt": probe.prompt,
+        "source": probe.source,
+        "times_used": probe.times_used or 0,
+        "times_landed": probe.times_landed or 0,
+        "last_score": probe.last_score,
+        "last_outcome": probe.last_outcome,
+        "last_used_at": probe.last_used_at.isoformat() if probe.last_used_at else None,
+    }
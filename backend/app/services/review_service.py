@@ -8,6 +8,7 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.core import ReviewItem, EvalRun, CharacterCard
+from app.services import franchise_service
 
 
 async def create_review_item(
@@ -136,7 +137,8 @@ async def resolve_review_item(
         )
         eval_run = result.scalar_one_or_none()
         if eval_run:
-            eval_run.decision = override_decision
+            old_decision, eval_run.decision = eval_run.decision, override_decision
+            await franchise_service.record_decision_change(db, eval_run, old_decision)
 
     await db.flush()
     return item
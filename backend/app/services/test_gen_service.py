@@ -1,12 +1,19 @@
-"""Knowledge Graph Test Data Generation — auto-generates test cases from character card data."""
+"""Knowledge Graph Test Data Generation — auto-generates test cases from character card data.
+
+Categories are generated concurrently. Generated cases are deduplicated against each
+other and against the suite's existing cases by their input prompt (normalized hash
+plus MinHash similarity), and new cases are inserted in one bulk statement.
+"""
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.llm import call_llm_json
 from app.models.core import (
     CharacterCard,
@@ -14,7 +21,7 @@ from app.models.core import (
     TestSuite,
     TestCase,
 )
-from app.services import character_service
+from app.services import character_service, near_duplicate_service
 
 
 TEST_CATEGORIES = [
@@ -41,11 +48,14 @@ async def generate_test_cases(
     character_id: int,
     org_id: int,
     count: int = 20,
+    existing_prompts: Optional[List[str]] = None,
 ) -> List[dict]:
     """Generate test cases from character card data using LLM.
 
     Reads the active version's packs, then uses LLM to generate test cases covering
     personality, relationships, world knowledge, safety, and voice consistency.
+    Cases whose prompt duplicates another generated case or one of ``existing_prompts``
+    are dropped, so fewer than ``count`` may be returned.
 
     Returns list of dicts with: name, content, expected_outcome, category, difficulty.
     """
@@ -67,13 +77,7 @@ async def generate_test_cases(
     per_category = count // len(TEST_CATEGORIES)
     remainder = count % len(TEST_CATEGORIES)
 
-    all_test_cases = []
-
-    for i, category in enumerate(TEST_CATEGORIES):
-        cat_count = per_category + (1 if i < remainder else 0)
-        if cat_count <= 0:
-            continue
-
+    async def generate(category: str, cat_count: int) -> List[dict]:
         cat_desc = CATEGORY_DESCRIPTIONS[category]
 
         system_prompt = (
@@ -105,12 +109,13 @@ async def generate_test_cases(
             f"Make them realistic and specific to this character's canon."
         )
 
+        category_cases = []
         try:
             result = await call_llm_json(system_prompt, user_prompt)
             cases = result.get("test_cases", [])
 
             for case in cases[:cat_count]:
-                all_test_cases.append({
+                category_cases.append({
                     "name": case.get("name", f"{category} test"),
                     "content": {
                         "modality": "text",
@@ -128,7 +133,7 @@ async def generate_test_cases(
         except Exception as e:
             # Fallback: generate a simple placeholder test case
             for j in range(cat_count):
-                all_test_cases.append({
+                category_cases.append({
                     "name": f"{category.replace('_', ' ').title()} Test {j+1}",
                     "content": {
                         "modality": "text",
@@ -140,7 +145,22 @@ async def generate_test_cases(
                     },
                     "category": category,
                     "difficulty": DIFFICULTY_LEVELS[j % 3],
+                    "placeholder": True,
                 })
+        return category_cases
+
+    counts = [(category, per_category + (1 if i < remainder else 0)) for i, category in enumerate(TEST_CATEGORIES)]
+    generated = await asyncio.gather(*(generate(category, n) for category, n in counts if n > 0))
+
+    dedup = near_duplicate_service.Deduplicator(settings.TEST_GEN_NEAR_DUP_THRESHOLD)
+    for prompt in existing_prompts or []:
+        dedup.add(prompt)
+    all_test_cases = []
+    for category_cases in generated:
+        for case in category_cases:
+            # Placeholders are kept as-is so a failed category stays visible
+            if case.pop("placeholder", False) or dedup.add(case["content"].get("prompt", "")):
+                all_test_cases.append(case)
 
     return all_test_cases[:count]
 
@@ -167,30 +187,39 @@ async def auto_populate_test_suite(
     if not suite:
         raise ValueError("Test suite not found")
 
-    # Generate test cases
-    generated = await generate_test_cases(db, character_id, org_id, count)
+    # Generate test cases that don't duplicate the suite's existing ones
+    existing = await db.execute(select(TestCase.input_content).where(TestCase.suite_id == suite_id))
+    existing_prompts = [_case_prompt(content) for content in existing.scalars().all()]
+    generated = await generate_test_cases(db, character_id, org_id, count, existing_prompts=existing_prompts)
 
-    # Add each to the suite
+    # Add them to the suite in one insert
     added_cases = []
+    rows = []
     for tc_data in generated:
         tags = [tc_data["category"]]
         if tc_data.get("difficulty"):
             tags.append(tc_data["difficulty"])
         tags.append("auto-generated")
 
-        test_case = TestCase(
-            suite_id=suite_id,
-            name=tc_data["name"],
-            input_content=tc_data["content"],
-            expected_outcome=tc_data["expected_outcome"],
-            tags=tags,
-        )
-        db.add(test_case)
+        rows.append({
+            "suite_id": suite_id,
+            "name": tc_data["name"],
+            "input_content": tc_data["content"],
+            "expected_outcome": tc_data["expected_outcome"],
+            "tags": tags,
+        })
         added_cases.append({
             **tc_data,
             "tags": tags,
         })
 
-    await db.flush()
+    if rows:
+        await db.execute(insert(TestCase), rows)
 
     return added_cases
+
+
+def _case_prompt(input_content) -> str:
+    if not isinstance(input_content, dict):
+        return str(input_content or "")
+    return input_content.get("prompt") or input_content.get("content") or ""
@@ -1,13 +1,23 @@
-"""Usage metering service — track eval counts and costs per org per month."""
+"""Usage metering service — track eval counts and costs per org per month.
+
+Critic-level cost is also rolled up per (org, day, model, critic) in ``CostRollup``
+as each evaluation completes. The cost summary and the per-model and per-critic
+breakdowns read those rows instead of joining critic results to their runs.
+``rebuild_cost_rollups`` (and ``rebuild_cost_rollups.py``) rebuilds them from
+the stored critic results.
+"""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import delete, insert, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.core import UsageRecord, EvalRun, CriticResult, EvalResult, CharacterCard
+from app.core.database import epoch_seconds, upsert
+from app.models.core import UsageRecord, CostRollup, EvalRun, CriticResult, EvalResult, CharacterCard
+
+_DAY = 86400
 
 
 def _current_period() -> str:
@@ -37,15 +47,175 @@ async def record_eval(
     org_id: int,
     tokens: int = 0,
     cost: float = 0.0,
+    adaptive: bool = False,
+    escalated: bool = False,
+    cost_saved: float = 0.0,
 ):
-    """Increment monthly eval counter and token/cost totals."""
+    """Increment monthly eval counter and token/cost totals.
+
+    ``adaptive``/``escalated``/``cost_saved`` track adaptive multi-judge runs: whether
+    the eval used adaptive judging, whether any critic escalated to a second judge,
+    and the estimated cost of the second-judge calls that were skipped.
+    """
     record = await _get_or_create_record(db, org_id)
     record.eval_count = (record.eval_count or 0) + 1
     record.llm_tokens_used = (record.llm_tokens_used or 0) + tokens
     record.estimated_cost = (record.estimated_cost or 0.0) + cost
+    if adaptive:
+        record.adaptive_eval_count = (record.adaptive_eval_count or 0) + 1
+        record.escalated_eval_count = (record.escalated_eval_count or 0) + (1 if escalated else 0)
+        record.judge_cost_saved = (record.judge_cost_saved or 0.0) + cost_saved
     await db.flush()
 
 
+def _day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def record_critic_costs(db: AsyncSession, eval_run: EvalRun, critic_results: List[dict]) -> None:
+    """Add a completed run's critic calls to its day's cost rollups (one upsert)."""
+    rows: dict = {}
+    day = _day(eval_run.created_at or datetime.utcnow())
+    for r in critic_results:
+        key = (r.get("model_used") or "unknown", r["critic_id"])
+        row = rows.setdefault(key, {
+            "org_id": eval_run.org_id, "day": day, "model": key[0], "critic_id": key[1],
+            "invocations": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+            "updated_at": datetime.utcnow(),
+        })
+        row["invocations"] += 1
+        row["prompt_tokens"] += r.get("prompt_tokens") or 0
+        row["completion_tokens"] += r.get("completion_tokens") or 0
+        row["cost"] += r.get("estimated_cost") or 0.0
+    if not rows:
+        return
+    stmt = upsert(db, CostRollup).values(list(rows.values()))
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["org_id", "day", "model", "critic_id"],
+        set_={
+            "invocations": CostRollup.invocations + stmt.excluded.invocations,
+            "prompt_tokens": CostRollup.prompt_tokens + stmt.excluded.prompt_tokens,
+            "completion_tokens": CostRollup.completion_tokens + stmt.excluded.completion_tokens,
+            "cost": CostRollup.cost + stmt.excluded.cost,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+async def rebuild_cost_rollups(db: AsyncSession, org_id: Optional[int] = None) -> int:
+    """Rebuild cost rollups from stored critic results (one org, or all); returns rows written."""
+    q = delete(CostRollup)
+    if org_id is not None:
+        q = q.where(CostRollup.org_id == org_id)
+    await db.execute(q)
+
+    bucket = (epoch_seconds(db, EvalRun.created_at) // _DAY).label("bucket")
+    model = func.coalesce(CriticResult.model_used, "unknown").label("model")
+    q = (
+        select(
+            EvalRun.org_id,
+            bucket,
+            model,
+            CriticResult.critic_id,
+            func.count(CriticResult.id),
+            func.coalesce(func.sum(CriticResult.prompt_tokens), 0),
+            func.coalesce(func.sum(CriticResult.completion_tokens), 0),
+            func.coalesce(func.sum(CriticResult.estimated_cost), 0.0),
+        )
+        .join(EvalResult, CriticResult.eval_result_id == EvalResult.id)
+        .join(EvalRun, EvalResult.eval_run_id == EvalRun.id)
+        .group_by(EvalRun.org_id, bucket, model, CriticResult.critic_id)
+    )
+    if org_id is not None:
+        q = q.where(EvalRun.org_id == org_id)
+    rows = [
+        {
+            "org_id": row_org_id,
+            "day": datetime.utcfromtimestamp(int(b) * _DAY),
+            "model": row_model,
+            "critic_id": critic_id,
+            "invocations": invocations,
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "cost": float(cost),
+        }
+        for row_org_id, b, row_model, critic_id, invocations, prompt_tokens, completion_tokens, cost
+        in (await db.execute(q)).all()
+    ]
+    if rows:
+        await db.execute(insert(CostRollup), rows)
+    return len(rows)
+
+
+async def cost_breakdown_since(db: AsyncSession, org_id: int, since: datetime) -> dict:
+    """Totals plus per-model and per-critic breakdowns from the day rollups since ``since``."""
+    result = await db.execute(
+        select(
+            CostRollup.model,
+            CostRollup.critic_id,
+            func.sum(CostRollup.invocations),
+            func.sum(CostRollup.prompt_tokens),
+            func.sum(CostRollup.completion_tokens),
+            func.sum(CostRollup.cost),
+        )
+        .where(CostRollup.org_id == org_id, CostRollup.day >= _day(since))
+        .group_by(CostRollup.model, CostRollup.critic_id)
+    )
+    totals = {"prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    by_model: dict = {}
+    by_critic: dict = {}
+    for model, critic_id, invocations, prompt_tokens, completion_tokens, cost in result.all():
+        prompt_tokens, completion_tokens, cost = int(prompt_tokens or 0), int(completion_tokens or 0), float(cost or 0.0)
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["cost"] += cost
+        m = by_model.setdefault(model, {"model": model, "invocations": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+        m["invocations"] += invocations
+        m["prompt_tokens"] += prompt_tokens
+        m["completion_tokens"] += completion_tokens
+        m["cost"] += cost
+        c = by_critic.setdefault(critic_id, {"critic_id": critic_id, "invocations": 0, "cost": 0.0})
+        c["invocations"] += invocations
+        c["cost"] += cost
+    return {**totals, "by_model": list(by_model.values()), "by_critic": list(by_critic.values())}
+
+
+async def get_cost_summary(db: AsyncSession, org_id: int, days: int = 30) -> dict:
+    """Eval count, tokens and cost over the last ``days`` (whole days, from the rollups).
+
+    Evals are counted from the same UTC day boundary as the rollups so ``cost_per_eval``
+    divides like with like.
+    """
+    since = _day(datetime.utcnow() - timedelta(days=days))
+    total_evals = (await db.execute(
+        select(func.count(EvalRun.id)).where(EvalRun.org_id == org_id, EvalRun.created_at >= since)
+    )).scalar() or 0
+    costs = await cost_breakdown_since(db, org_id, since)
+    total_cost = costs["cost"]
+    return {
+        "days": days,
+        "total_evals": total_evals,
+        "total_tokens": costs["prompt_tokens"] + costs["completion_tokens"],
+        "total_prompt_tokens": costs["prompt_tokens"],
+        "total_completion_tokens": costs["completion_tokens"],
+        "total_estimated_cost": round(total_cost, 6),
+        "cost_per_eval": round(total_cost / total_evals, 8) if total_evals > 0 else 0.0,
+        "by_model": costs["by_model"],
+        "by_critic": costs["by_critic"],
+    }
+
+
+def _adaptive_judging_stats(record: UsageRecord) -> dict:
+    adaptive = record.adaptive_eval_count or 0
+    escalated = record.escalated_eval_count or 0
+    return {
+        "adaptive_eval_count": adaptive,
+        "escalated_eval_count": escalated,
+        "escalation_rate": round(escalated / adaptive, 4) if adaptive else None,
+        "judge_cost_saved": round(record.judge_cost_saved or 0.0, 4),
+    }
+
+
 async def record_api_call(db: AsyncSession, org_id: int):
     """Increment monthly API call counter."""
     record = await _get_or_create_record(db, org_id)
@@ -113,6 +283,7 @@ async def get_usage_details(db: AsyncSession, org_id: int) -> dict:
 
     # Summary stats for this month
     usage_record = await _get_or_create_record(db, org_id, period)
+    costs = await cost_breakdown_since(db, org_id, start)
 
     return {
         "period": period,
@@ -120,7 +291,10 @@ async def get_usage_details(db: AsyncSession, org_id: int) -> dict:
         "api_call_count": usage_record.api_call_count or 0,
         "llm_tokens_used": usage_record.llm_tokens_used or 0,
         "estimated_cost": round(usage_record.estimated_cost or 0.0, 4),
+        **_adaptive_judging_stats(usage_record),
         "top_characters": top_characters,
+        "by_model": costs["by_model"],
+        "by_critic": costs["by_critic"],
     }
 
 
@@ -139,6 +313,7 @@ async def get_cost_breakdown(db: AsyncSession, org_id: int, months: int = 6) ->
             "api_call_count": r.api_call_count or 0,
             "llm_tokens_used": r.llm_tokens_used or 0,
             "estimated_cost": round(r.estimated_cost or 0.0, 4),
+            **_adaptive_judging_stats(r),
         }
         for r in records
     ]
@@ -0,0 +1,26 @@
+"""Rebuild the daily cost rollups from stored critic results.
+
+Usage: python rebuild_cost_rollups.py [--org-id ID]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.core.database import async_session, init_db
+from app.services import usage_service
+
+
+async def rebuild(org_id: int | None) -> None:
+    await init_db()
+    async with async_session() as db:
+        written = await usage_service.rebuild_cost_rollups(db, org_id)
+        await db.commit()
+    scope = f"org {org_id}" if org_id is not None else "all orgs"
+    print(f"Rebuilt {written} cost rollup rows for {scope}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--org-id", type=int, default=None, help="only rebuild this organization's rollups")
+    asyncio.run(rebuild(parser.parse_args().org_id))
@@ -0,0 +1,158 @@
+"""A/B testing tests — shared critic calls, sequential stopping and offline replay."""
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from tests.test_ci import _character_with_critic
+
+
+async def _fake_critic(critic, card_version, content, extra=""):
+    return {"score": 1.0 if critic.slug == "voice" else 0.5, "reasoning": "", "flags": [],
+            "latency_ms": 1, "prompt_tokens": 10, "completion_tokens": 5,
+            "model_used": "gpt-4o-mini", "estimated_cost": 0.01}
+
+
+@pytest.mark.asyncio
+async def test_weight_experiment_trial_shares_critic_calls(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, voice_id = await _character_with_critic(client, h)
+    canon = await client.post("/api/critics", json={"name": "Canon", "slug": "canon", "prompt_template": "Canon check: {content}"}, headers=h)
+    canon_id = canon.json()["id"]
+
+    experiment = await client.post("/api/ab-testing", json={
+        "name": "Weights", "experiment_type": "critic_weight",
+        "variant_a": {"weight_overrides": {}},
+        "variant_b": {"weight_overrides": {str(canon_id): 3.0}},
+    }, headers=h)
+    experiment_id = experiment.json()["id"]
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic:
+        resp = await client.post(f"/api/ab-testing/{experiment_id}/run-trial", json={
+            "character_id": char_id, "content": "Oink!",
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    # One call per critic, shared by both variants
+    assert critic.call_count == 2
+    assert (data["critic_calls"], data["shared_critic_calls"]) == (2, 2)
+    assert data["variant_a"]["score"] == pytest.approx(0.75)
+    assert data["variant_b"]["score"] == pytest.approx((1.0 + 0.5 * 3.0) / 4.0)
+    assert data["variant_a"]["cost"] == data["variant_b"]["cost"] == pytest.approx(0.02)
+
+
+async def _sequential_experiment(client, h, variant_b_weight, sample_size=100):
+    char_id, voice_id = await _character_with_critic(client, h)
+    await client.post("/api/critics", json={"name": "Canon", "slug": "canon", "prompt_template": "Canon check: {content}"}, headers=h)
+    experiment = await client.post("/api/ab-testing", json={
+        "name": "Sequential", "experiment_type": "critic_weight", "sample_size": sample_size,
+        "sequential": True, "alpha": 0.05,
+        "variant_a": {}, "variant_b": {"weight_overrides": {str(voice_id): variant_b_weight}},
+    }, headers=h)
+    return char_id, experiment.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_sequential_experiment_completes_at_the_boundary(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, experiment_id = await _sequential_experiment(client, h, variant_b_weight=9.0)
+
+    statuses = []
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic):
+        for i in range(11):
+            resp = await client.post(f"/api/ab-testing/{experiment_id}/run-trial", json={
+                "character_id": char_id, "content": f"Oink {i}",
+            }, headers=h)
+            statuses.append(resp.json().get("experiment_status"))
+    # The mSPRT may only stop once both variants have the minimum trials
+    assert statuses[:9] == ["running"] * 9
+    assert statuses[9] == "completed"
+    assert resp.status_code == 400
+
+    data = (await client.get(f"/api/ab-testing/{experiment_id}", headers=h)).json()
+    summary = data["summary"]
+    assert (summary["trials_a"], summary["trials_b"]) == (10, 10)
+    assert (summary["mean_score_a"], summary["mean_score_b"]) == (0.75, 0.95)
+    assert summary["sequential"]["boundary_crossed"] and summary["sequential"]["stopped_early"]
+    assert summary["p_value"] < 0.05 and summary["significant"]
+    assert data["experiment"]["winner"] == "b"
+    assert len(data["trials"]) == 20
+
+
+@pytest.mark.asyncio
+async def test_sequential_experiment_without_effect_stops_at_sample_size(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, experiment_id = await _sequential_experiment(client, h, variant_b_weight=1.0, sample_size=12)
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic):
+        for i in range(12):
+            resp = await client.post(f"/api/ab-testing/{experiment_id}/run-trial", json={
+                "character_id": char_id, "content": f"Oink {i}",
+            }, headers=h)
+    assert resp.json()["experiment_status"] == "completed"
+    sequential = resp.json()["sequential"]
+    assert sequential["p_value"] == 1.0 and not sequential["boundary_crossed"]
+    assert sequential["winner"] == "inconclusive" and not sequential["stopped_early"]
+
+    data = (await client.get(f"/api/ab-testing/{experiment_id}?trial_limit=5", headers=h)).json()
+    assert data["experiment"]["winner"] == "inconclusive"
+    assert data["summary"]["trials_a"] == 12 and len(data["trials"]) == 5
+
+    for alpha in (0, 1, 1.5):
+        resp = await client.post("/api/ab-testing", json={
+            "name": "Bad alpha", "experiment_type": "critic_weight", "sequential": True, "alpha": alpha,
+            "variant_a": {}, "variant_b": {},
+        }, headers=h)
+        assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_replay_reaggregates_stored_critic_results(client, test_org_and_user, engine):
+    h = test_org_and_user["headers"]
+    char_id, voice_id = await _character_with_critic(client, h)
+    await client.post("/api/critics", json={"name": "Canon", "slug": "canon", "prompt_template": "Canon check: {content}"}, headers=h)
+
+    # Three stored runs scoring voice 1.0 and canon 0.5 at equal weight
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        batch = await client.post("/api/ci/batch", json={
+            "cases": [{"character_id": char_id, "content": f"Oink {i}"} for i in range(3)],
+        }, headers=h)
+    assert batch.status_code == 200, batch.text
+
+    experiment = await client.post("/api/ab-testing", json={
+        "name": "Replay", "experiment_type": "critic_weight",
+        "variant_a": {"decision_thresholds": {"regenerate": 0.8}},
+        "variant_b": {"weight_overrides": {str(voice_id): 9.0}},
+    }, headers=h)
+    experiment_id = experiment.json()["id"]
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic, \
+         patch("app.core.database.async_session", session_factory):
+        resp = await client.post(f"/api/ab-testing/{experiment_id}/replay", json={"character_id": char_id}, headers=h)
+    assert resp.status_code == 202, resp.text
+    assert critic.call_count == 0
+
+    replay = (await client.get(f"/api/ab-testing/{experiment_id}/replays/{resp.json()['id']}", headers=h)).json()
+    assert replay["status"] == "completed", replay
+    results = replay["results"]
+    assert replay["runs_replayed"] == results["trials_a"] == results["trials_b"] == 3
+    assert results["mean_score_a"] == pytest.approx(0.75)
+    assert results["mean_score_b"] == pytest.approx(0.95)
+    assert results["decisions_a"] == {"quarantine": 3}
+    assert results["decisions_b"] == {"pass": 3}
+    assert (results["pass_rate_a"], results["pass_rate_b"]) == (0.0, 1.0)
+    assert results["changed_decisions"] == 3
+
+
+@pytest.mark.asyncio
+async def test_replay_rejects_variants_that_need_new_calls(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    experiment = await client.post("/api/ab-testing", json={
+        "name": "Models", "experiment_type": "model",
+        "variant_a": {}, "variant_b": {"profile_id": 1},
+    }, headers=h)
+    resp = await client.post(f"/api/ab-testing/{experiment.json()['id']}/replay", json={}, headers=h)
+    assert resp.status_code == 400
+    assert "profile_id" in resp.json()["detail"]
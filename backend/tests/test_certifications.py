@@ -0,0 +1,95 @@
+"""Agent certification tests — concurrent suite runs and sequential early stopping."""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from tests.test_ci import _character_with_critic, _fake_critic
+
+
+async def _suite(client, h, char_id, contents):
+    suite = await client.post("/api/test-suites", json={"name": "Cert", "character_id": char_id, "passing_threshold": 0.8}, headers=h)
+    suite_id = suite.json()["id"]
+    for i, content in enumerate(contents):
+        await client.post(f"/api/test-suites/{suite_id}/cases", json={"name": f"case {i}", "input_content": {"content": content}}, headers=h)
+    return suite_id
+
+
+async def _certify(client, h, body):
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic, \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/certifications", json=body, headers=h)
+    assert resp.status_code == 200, resp.text
+    return resp.json(), critic.call_count
+
+
+@pytest.mark.asyncio
+async def test_certification_runs_full_suite_concurrently(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    suite_id = await _suite(client, h, char_id, ["good oink"] * 5 + ["bad oink"])
+
+    cert, calls = await _certify(client, h, {
+        "agent_id": "agent-1", "character_id": char_id, "card_version_id": 1,
+        "test_suite_id": suite_id, "concurrency": 4,
+    })
+    summary = cert["results_summary"]
+    assert calls == 6
+    assert summary["evaluated_cases"] == 6 and summary["skipped_cases"] == 0
+    assert summary["stopping_rule"] == {"rule": "full_suite", "stopped_early": False}
+    assert [r["test_case_name"] for r in summary["case_results"]] == [f"case {i}" for i in range(6)]
+    # (5 * 0.95 + 0.2) / 6 = 0.825
+    assert cert["status"] == "passed" and summary["passed_cases"] == 5
+
+
+@pytest.mark.asyncio
+async def test_certification_sprt_stops_once_settled(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    suite_id = await _suite(client, h, char_id, ["good oink"] * 40)
+
+    cert, calls = await _certify(client, h, {
+        "agent_id": "agent-1", "character_id": char_id, "card_version_id": 1,
+        "test_suite_id": suite_id, "concurrency": 1, "sequential": "sprt",
+    })
+    rule = cert["results_summary"]["stopping_rule"]
+    assert cert["status"] == "passed"
+    assert rule["rule"] == "sprt" and rule["stopped_early"] is True
+    assert rule["verdict"] == "passed" and rule["stopped_at"] == 10
+    assert calls == 10 and cert["results_summary"]["skipped_cases"] == 30
+
+    resp = await client.post("/api/certifications", json={
+        "agent_id": "agent-1", "character_id": char_id, "card_version_id": 1,
+        "test_suite_id": suite_id, "sequential": "bayes",
+    }, headers=h)
+    assert resp.status_code == 400
+
+    for bad in ({"alpha": 0}, {"alpha": 0.6}, {"alpha": 1.5}, {"concurrency": 0}, {"concurrency": 10_000}):
+        resp = await client.post("/api/certifications", json={
+            "agent_id": "agent-1", "character_id": char_id, "card_version_id": 1,
+            "test_suite_id": suite_id, "sequential": "sprt", **bad,
+        }, headers=h)
+        assert resp.status_code == 422, bad
+
+
+@pytest.mark.asyncio
+async def test_sequential_rule_sees_cases_in_sampled_order(client, test_org_and_user):
+    import asyncio
+
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    suite_id = await _suite(client, h, char_id, ["bad oink"] + ["good oink"] * 39)
+
+    async def slow_bad_critic(critic, card_version, content, extra=""):
+        if content.startswith("bad"):
+            await asyncio.sleep(0.2)
+        return await _fake_critic(critic, card_version, content)
+
+    with patch("app.services.certification_service.random.shuffle"), \
+         patch("app.services.critic_service.run_critic", side_effect=slow_bad_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/certifications", json={
+            "agent_id": "agent-1", "character_id": char_id, "card_version_id": 1,
+            "test_suite_id": suite_id, "concurrency": 4, "sequential": "sprt",
+        }, headers=h)
+    rule = resp.json()["results_summary"]["stopping_rule"]
+    # The slow low score is sampled first, so it counts before the fast passes behind it
+    assert rule["verdict"] == "passed" and rule["stopped_at"] > 10
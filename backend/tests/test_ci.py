@@ -0,0 +1,131 @@
+"""CI/CD batch tests — concurrent cases, fail-fast, durable status."""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+
+async def _character_with_critic(client, h):
+    char = await client.post("/api/characters", json={"name": "Peppa", "slug": "peppa"}, headers=h)
+    char_id = char.json()["id"]
+    version = await client.post(f"/api/characters/{char_id}/versions", json={"canon_pack": {"name": "Peppa"}}, headers=h)
+    await client.post(f"/api/characters/{char_id}/versions/{version.json()['id']}/publish", headers=h)
+    critic = await client.post("/api/critics", json={"name": "Voice", "slug": "voice", "prompt_template": "{content}"}, headers=h)
+    return char_id, critic.json()["id"]
+
+
+async def _fake_critic(critic, card_version, content, extra=""):
+    return {"score": 0.95 if content.startswith("good") else 0.2, "reasoning": "", "flags": [],
+            "latency_ms": 1, "prompt_tokens": 10, "completion_tokens": 5,
+            "model_used": "gpt-4o-mini", "estimated_cost": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_ci_batch_runs_cases_and_persists_status(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    cases = [{"character_id": char_id, "content": "good oink"} for _ in range(4)]
+    cases.append({"character_id": char_id, "content": "bad oink"})
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/ci/batch", json={"cases": cases, "concurrency": 3, "min_pass_rate": 0.8}, headers=h)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["status"] == "completed"
+    assert (data["passed"], data["failed"], data["skipped"]) == (4, 1, 0)
+    assert data["overall_passed"] is True
+    assert [r["index"] for r in data["results"]] == list(range(5))
+
+    status = await client.get(f"/api/ci/status/{data['batch_id']}", headers=h)
+    assert status.status_code == 200
+    assert status.json()["pass_rate"] == 0.8 and status.json()["overall_passed"] is True
+
+    for bad in (0, -1, 10_000):
+        resp = await client.post("/api/ci/batch", json={"cases": cases, "concurrency": bad}, headers=h)
+        assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ci_batch_fails_fast_when_pass_rate_unreachable(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    cases = [{"character_id": char_id, "content": "bad oink"} for _ in range(10)]
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/ci/batch", json={"cases": cases, "concurrency": 1, "fail_fast": True}, headers=h)
+    data = resp.json()
+    assert data["status"] == "failed_fast"
+    assert data["failed"] == 1 and data["skipped"] == 9
+    assert data["overall_passed"] is False
+
+
+@pytest.mark.asyncio
+async def test_ci_batch_reuses_unchanged_cases_from_last_green_run(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, critic_id = await _character_with_critic(client, h)
+    cases = [{"character_id": char_id, "content": f"good oink {i}"} for i in range(4)]
+
+    async def run(batch_cases):
+        with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic, \
+             patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+            resp = await client.post("/api/ci/batch", json={"cases": batch_cases}, headers=h)
+        return resp.json(), critic.call_count
+
+    first, calls = await run(cases)
+    assert (first["reused"], first["evaluated"], calls) == (0, 4, 4)
+
+    second, calls = await run(cases[:3] + [{"character_id": char_id, "content": "good oink changed"}])
+    assert (second["reused"], second["evaluated"], calls) == (3, 1, 1)
+    assert second["overall_passed"] is True
+    assert second["results"][0]["eval_run_id"] == first["results"][0]["eval_run_id"]
+
+    # Changing a critic's prompt template invalidates every case
+    await client.patch(f"/api/critics/{critic_id}", json={"prompt_template": "Judge: {content}"}, headers=h)
+    third, calls = await run(cases)
+    assert (third["reused"], third["evaluated"], calls) == (0, 4, 4)
+
+
+@pytest.mark.asyncio
+async def test_ci_batch_that_crashes_is_stored_as_error(client, test_org_and_user, db_session):
+    from sqlalchemy import select
+    from app.models.core import CIBatchRun
+
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    crash = AsyncMock(side_effect=RuntimeError("boom"))
+    with patch("app.services.incremental_ci_service.run_incremental", crash), pytest.raises(RuntimeError):
+        await client.post("/api/ci/batch", json={"cases": [{"character_id": char_id, "content": "good"}]}, headers=h)
+
+    batch = (await db_session.execute(select(CIBatchRun))).scalar_one()
+    assert batch.status == "error" and batch.completed_at is not None
+
+
+def test_fingerprint_tracks_predictor_and_prescreen_state():
+    from app.models.core import CardVersion, DecisionPredictor, EvaluationProfile, TaxonomyTag
+    from app.schemas.evaluations import EvalRequest
+    from app.services import incremental_ci_service as incremental, prescreen_service
+
+    version = CardVersion(id=910, character_id=1, version_number=1, canon_pack={"name": "Peppa"})
+    profile = EvaluationProfile(id=1, prescreen_mode="tag", predictor_mode="shadow")
+    tag = TaxonomyTag(id=911, slug="mud", severity="low", evaluation_rules={"prescreen_terms": ["mud"]})
+    context = {
+        "card_version": version, "consent_ok": True, "critics_with_config": [], "profile": profile,
+        "screener": prescreen_service.get_screener(version, [tag]),
+        "predictor": DecisionPredictor(id=5, version=1),
+    }
+    request = EvalRequest(character_id=1, content="Oink")
+
+    def fingerprint():
+        return incremental.case_fingerprint(request, incremental._config_signature(context))
+
+    before = fingerprint()
+    assert fingerprint() == before
+    context["predictor"] = DecisionPredictor(id=6, version=2)
+    retrained = fingerprint()
+    assert retrained != before
+    tag.evaluation_rules = {"prescreen_terms": ["mud", "puddle"]}
+    context["screener"] = prescreen_service.get_screener(version, [tag])
+    assert fingerprint() != retrained
+
+    profile.near_duplicate_mode = "seed"
+    assert incremental._config_signature(context) is None
@@ -0,0 +1,102 @@
+"""Comparison tests — N-way comparisons with shared critic calls and the comparison history."""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from tests.test_ci import _character_with_critic
+
+
+async def _fake_critic(critic, card_version, content, extra=""):
+    canon = card_version.canon_pack or {}
+    score = 1.0 if critic.slug == "voice" else (0.9 if canon.get("facts") else 0.5)
+    return {"score": score, "reasoning": "", "flags": [],
+            "latency_ms": 1, "prompt_tokens": 10, "completion_tokens": 5,
+            "model_used": "gpt-4o-mini", "estimated_cost": 0.01}
+
+
+async def _canon_critic(client, h):
+    # Unlike the voice critic ("{content}"), its prompt differs per card version
+    await client.post("/api/critics", json={"name": "Canon", "slug": "canon", "prompt_template": "{canon_pack}\n{content}"}, headers=h)
+
+
+@pytest.mark.asyncio
+async def test_head_to_head_compares_many_characters_with_shared_calls(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    peppa_id, _ = await _character_with_critic(client, h)
+    await _canon_critic(client, h)
+    character_ids = [peppa_id]
+    for name in ("George", "Suzy"):
+        char = await client.post("/api/characters", json={"name": name, "slug": name.lower()}, headers=h)
+        version = await client.post(f"/api/characters/{char.json()['id']}/versions", json={"canon_pack": {"name": name}}, headers=h)
+        await client.post(f"/api/characters/{char.json()['id']}/versions/{version.json()['id']}/publish", headers=h)
+        character_ids.append(char.json()["id"])
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic, \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/compare/head-to-head", json={
+            "content": "Oink!", "character_ids": character_ids,
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    # The voice call is identical for all three characters and runs once
+    assert critic.call_count == 1 + 3
+    assert [s["character"]["id"] for s in data["sides"]] == character_ids
+    assert [c["side"] for c in data["comparisons"]] == [1, 2]
+    assert data["character_b"]["id"] == character_ids[1]
+    assert data["comparison"] == {k: v for k, v in data["comparisons"][0].items() if k != "side"}
+    voice_costs = sorted(
+        r["estimated_cost"] for s in data["sides"] for r in s["result"]["critic_results"] if r["score"] == 1.0
+    )
+    assert voice_costs == [0.0, 0.0, 0.01]
+
+
+@pytest.mark.asyncio
+async def test_compare_versions_leaves_active_version_untouched(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    await _canon_critic(client, h)
+    await client.post(f"/api/characters/{char_id}/versions", json={"canon_pack": {"name": "Peppa", "facts": ["pig"]}}, headers=h)
+    before = (await client.get(f"/api/characters/{char_id}", headers=h)).json()["active_version_id"]
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic) as critic, \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/compare/versions", json={
+            "character_id": char_id, "version_a": 1, "version_b": 2, "content": "Oink!",
+        }, headers=h)
+        missing = await client.post("/api/compare/versions", json={
+            "character_id": char_id, "versions": [1, 2, 7], "content": "Oink!",
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    assert critic.call_count == 1 + 2
+    assert data["side_a"]["eval_run"]["card_version_id"] == data["version_a"]["id"]
+    assert data["side_b"]["eval_run"]["card_version_id"] == data["version_b"]["id"]
+    assert data["comparison"]["score_diff"] == pytest.approx(0.75 - 0.95)
+    assert missing.status_code == 404
+    assert (await client.get(f"/api/characters/{char_id}", headers=h)).json()["active_version_id"] == before
+
+
+@pytest.mark.asyncio
+async def test_comparison_history_pages_and_prunes_per_org(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    settings_resp = await client.patch("/api/org", json={"settings": {"compare_history_max_entries": 4}}, headers=h)
+    assert settings_resp.status_code == 200, settings_resp.text
+
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        batch = await client.post("/api/ci/batch", json={
+            "cases": [{"character_id": char_id, "content": f"Oink {i}"} for i in range(2)],
+        }, headers=h)
+    run_a, run_b = [r["eval_run_id"] for r in batch.json()["results"]]
+    for _ in range(6):
+        resp = await client.post("/api/compare/runs", json={"run_id_a": run_a, "run_id_b": run_b}, headers=h)
+        assert resp.status_code == 200, resp.text
+
+    first = (await client.get("/api/compare/history?limit=3", headers=h)).json()
+    assert len(first) == 3 and first[0]["mode"] == "runs" and first[0]["run_id_a"] == run_a
+    rest = (await client.get(f"/api/compare/history?limit=3&before={first[-1]['id']}", headers=h)).json()
+    # Only the org's four most recent comparisons are kept
+    assert len(rest) == 1
+    assert [e["id"] for e in first + rest] == sorted((e["id"] for e in first + rest), reverse=True)
@@ -0,0 +1,145 @@
+"""Drift tests — streaming baselines, change-point detectors and org-wide sweeps."""
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from app.models.core import DriftBaseline
+from app.services import change_point_service
+from tests.test_ci import _character_with_critic, _fake_critic
+
+
+async def _evaluate(client, h, char_id, contents):
+    with patch("app.services.critic_service.run_critic", side_effect=_fake_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/ci/batch", json={
+            "cases": [{"character_id": char_id, "content": c} for c in contents], "concurrency": 1,
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+    return [r["eval_run_id"] for r in resp.json()["results"]]
+
+
+@pytest.mark.asyncio
+async def test_evaluations_update_baselines_and_raise_drift(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, critic_id = await _character_with_critic(client, h)
+
+    await _evaluate(client, h, char_id, [f"good {i}" for i in range(12)])
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    assert baseline["critic_id"] == critic_id and baseline["sample_count"] == 12
+    assert baseline["baseline_score"] == pytest.approx(0.95) and not baseline["drifting"]
+
+    # The first low score moves the recent mean out of the band; one event, not one per run
+    run_ids = await _evaluate(client, h, char_id, ["bad 1", "bad 2", "bad 3"])
+    events = (await client.get(f"/api/drift/events?character_id={char_id}", headers=h)).json()
+    assert len(events) == 1 and events[0]["eval_run_id"] == run_ids[0]
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    # Drifting scores stay out of the baseline
+    assert baseline["drifting"] and baseline["sample_count"] == 12
+
+    check = (await client.post(f"/api/drift/check?character_id={char_id}", headers=h)).json()
+    assert check["events_created"] == 0 and [d["critic_id"] for d in check["drifting"]] == [critic_id]
+
+    rebuilt = await client.post(f"/api/drift/compute-baselines?character_id={char_id}", headers=h)
+    assert rebuilt.status_code == 200 and rebuilt.json()["eval_runs_sampled"] == 15
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    assert baseline["sample_count"] == 15 and not baseline["drifting"]
+
+
+@pytest.mark.asyncio
+async def test_org_sweep_checks_all_characters_in_one_pass(client, test_org_and_user, engine):
+    h = test_org_and_user["headers"]
+    char_id, critic_id = await _character_with_critic(client, h)
+    other = await client.post("/api/characters", json={"name": "George", "slug": "george"}, headers=h)
+    other_id = other.json()["id"]
+    version = await client.post(f"/api/characters/{other_id}/versions", json={"canon_pack": {"name": "George"}}, headers=h)
+    await client.post(f"/api/characters/{other_id}/versions/{version.json()['id']}/publish", headers=h)
+
+    await _evaluate(client, h, char_id, [f"good {i}" for i in range(12)])
+    await _evaluate(client, h, other_id, [f"good {i}" for i in range(12)])
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        # A baseline from before detectors; the other one's detector owns its flag
+        await session.execute(
+            update(DriftBaseline).where(DriftBaseline.character_id == char_id).values(detector_state=None)
+        )
+        await session.commit()
+    # Low scores stored without the online update, so only the sweep can notice them
+    with patch("app.services.drift_service.record_eval", AsyncMock()):
+        run_ids = await _evaluate(client, h, char_id, ["bad 1", "bad 2", "bad 3"])
+        await _evaluate(client, h, other_id, ["bad 1", "bad 2", "bad 3"])
+
+    with patch("app.core.database.async_session", session_factory):
+        first = await client.post("/api/drift/sweep", headers=h)
+        second = await client.post("/api/drift/sweep", headers=h)
+    assert first.status_code == 202, first.text
+
+    sweep = (await client.get(f"/api/drift/sweeps/{first.json()['id']}", headers=h)).json()
+    assert sweep["status"] == "completed", sweep
+    assert (sweep["characters_checked"], sweep["baselines_checked"]) == (2, 2)
+    assert (sweep["drifting"], sweep["events_created"]) == (1, 1)
+    events = (await client.get("/api/drift/events", headers=h)).json()
+    assert len(events) == 1 and events[0]["eval_run_id"] == run_ids[-1]
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    assert baseline["critic_id"] == critic_id and baseline["drifting"]
+    other = (await client.get(f"/api/drift/baselines?character_id={other_id}", headers=h)).json()[0]
+    assert not other["drifting"]
+
+    # Already drifting: the next sweep doesn't raise it again
+    sweep = (await client.get(f"/api/drift/sweeps/{second.json()['id']}", headers=h)).json()
+    assert (sweep["drifting"], sweep["events_created"]) == (1, 0)
+
+
+def test_detectors_catch_a_one_sigma_shift_without_false_alarms():
+    for detector in change_point_service.DETECTORS:
+        state = change_point_service.initial_state(detector)
+        alarms = []
+        for i in range(40):
+            state = change_point_service.update(detector, state, 0.0 if i < 20 else -1.0, 2.0)
+            alarms.append(state["alarm"])
+        assert not any(alarms[:20]), detector
+        assert alarms.index(True) <= 32 and alarms[-1], detector
+
+
+@pytest.mark.asyncio
+async def test_rebuild_switches_detector(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    await _evaluate(client, h, char_id, [f"good {i}" for i in range(12)])
+
+    resp = await client.post(f"/api/drift/compute-baselines?character_id={char_id}&detector=shewhart", headers=h)
+    assert resp.status_code == 400
+    resp = await client.post(f"/api/drift/compute-baselines?character_id={char_id}&detector=cusum", headers=h)
+    assert resp.status_code == 200, resp.text
+
+    run_ids = await _evaluate(client, h, char_id, ["bad 1"])
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    assert baseline["detector"] == "cusum" and baseline["drifting"]
+    events = (await client.get(f"/api/drift/events?character_id={char_id}", headers=h)).json()
+    assert [e["eval_run_id"] for e in events] == run_ids
+
+
+@pytest.mark.asyncio
+async def test_failed_critic_calls_are_not_drift(client, test_org_and_user, engine):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    await _evaluate(client, h, char_id, [f"good {i}" for i in range(12)])
+
+    async def failing_critic(critic, card_version, content, extra=""):
+        return {**await _fake_critic(critic, card_version, content), "score": 0.0, "flags": ["critic_error"]}
+
+    with patch("app.services.critic_service.run_critic", side_effect=failing_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        await client.post("/api/ci/batch", json={
+            "cases": [{"character_id": char_id, "content": "good"} for _ in range(3)], "concurrency": 1,
+        }, headers=h)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with patch("app.core.database.async_session", session_factory):
+        resp = await client.post("/api/drift/sweep", headers=h)
+    sweep = (await client.get(f"/api/drift/sweeps/{resp.json()['id']}", headers=h)).json()
+    assert sweep["status"] == "completed" and sweep["drifting"] == 0, sweep
+
+    await client.post(f"/api/drift/compute-baselines?character_id={char_id}", headers=h)
+    baseline = (await client.get(f"/api/drift/baselines?character_id={char_id}", headers=h)).json()[0]
+    assert baseline["sample_count"] == 12 and baseline["baseline_score"] == pytest.approx(0.95)
@@ -25,3 +25,330 @@ async def test_eval_cost_summary(client, test_org_and_user):
     data = resp.json()
     assert "total_evals" in data
     assert "total_estimated_cost" in data
+
+
+@pytest.mark.asyncio
+async def test_cost_summary_reads_rollups_and_rebuilds(client, test_org_and_user, db_session):
+    from sqlalchemy import delete
+    from app.models.core import CostRollup
+    from app.services import usage_service
+    from tests.test_ci import _character_with_critic, _fake_critic
+
+    h = test_org_and_user["headers"]
+    char_id, critic_id = await _character_with_critic(client, h)
+
+    async def priced_critic(*args, **kwargs):
+        return {**await _fake_critic(*args, **kwargs), "estimated_cost": 0.001}
+
+    with patch("app.services.critic_service.run_critic", side_effect=priced_critic), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        resp = await client.post("/api/ci/batch", json={
+            "cases": [{"character_id": char_id, "content": f"good {i}"} for i in range(3)], "concurrency": 1,
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+
+    summary = (await client.get("/api/evaluations/cost-summary", headers=h)).json()
+    assert summary["total_evals"] == 3
+    assert (summary["total_prompt_tokens"], summary["total_completion_tokens"]) == (30, 15)
+    assert summary["total_estimated_cost"] == pytest.approx(0.003)
+    assert summary["by_model"] == [{"model": "gpt-4o-mini", "invocations": 3, "prompt_tokens": 30,
+                                    "completion_tokens": 15, "cost": pytest.approx(0.003)}]
+    assert summary["by_critic"] == [{"critic_id": critic_id, "invocations": 3, "cost": pytest.approx(0.003)}]
+
+    details = (await client.get("/api/org/usage/details", headers=h)).json()
+    assert details["by_model"] == summary["by_model"]
+
+    # Rebuilt from the stored critic results, the rollups serve the same summary
+    await db_session.execute(delete(CostRollup))
+    assert await usage_service.rebuild_cost_rollups(db_session, test_org_and_user["org_id"]) == 1
+    await db_session.commit()
+    assert (await client.get("/api/evaluations/cost-summary", headers=h)).json() == summary
+
+    # Evals are counted from the rollups' day boundary, not from exactly ``days`` ago
+    from datetime import datetime, timedelta
+    from app.models.core import EvalRun
+    start_of_yesterday = (datetime.utcnow() - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    db_session.add(EvalRun(character_id=char_id, input_content={"content": "x"}, status="completed",
+                           org_id=test_org_and_user["org_id"], created_at=start_of_yesterday))
+    await db_session.commit()
+    assert (await client.get("/api/evaluations/cost-summary?days=1", headers=h)).json()["total_evals"] == 4
+
+
+def _critic_and_version():
+    from app.models.core import Critic, CardVersion
+    critic = Critic(id=1, name="Voice", slug="voice", prompt_template="Judge {character_name}: {content}", default_weight=1.0)
+    version = CardVersion(id=1, character_id=1, version_number=1, canon_pack={"name": "Peppa"})
+    return critic, version
+
+
+@pytest.mark.asyncio
+async def test_adaptive_judge_skips_second_call_when_confident():
+    from app.services import critic_service
+    critic, version = _critic_and_version()
+    first = ({"score": 0.8, "confidence": 0.95, "reasoning": "ok", "flags": []},
+             {"prompt_tokens": 1000, "completion_tokens": 100, "model": "gpt-4o-mini"})
+    with patch("app.services.critic_service.call_llm_json", AsyncMock(return_value=first)), \
+         patch("app.services.critic_service.call_provider_json", AsyncMock()) as second:
+        result = await critic_service.run_critic_adaptive(critic, version, "Hello!")
+    second.assert_not_called()
+    assert result["escalated"] is False
+    assert result["judge_calls"] == 1
+    assert result["score"] == 0.8
+    assert result["saved_cost"] > 0
+
+
+@pytest.mark.asyncio
+async def test_adaptive_judge_escalates_near_decision_boundary():
+    from app.services import critic_service
+    critic, version = _critic_and_version()
+    first = ({"score": 0.89, "confidence": 0.95, "reasoning": "close", "flags": []},
+             {"prompt_tokens": 1000, "completion_tokens": 100, "model": "gpt-4o-mini"})
+    second = ({"score": 0.95, "confidence": 0.9, "reasoning": "fine", "flags": ["minor"]},
+              {"prompt_tokens": 1000, "completion_tokens": 100, "model": "claude-3-haiku-20240307"})
+    with patch("app.services.critic_service.call_llm_json", AsyncMock(return_value=first)), \
+         patch("app.services.critic_service.call_provider_json", AsyncMock(return_value=second)) as second_call:
+        result = await critic_service.run_critic_adaptive(critic, version, "Hello!")
+    assert second_call.call_args.args[0] == "anthropic"
+    assert result["escalated"] is True
+    assert result["judge_calls"] == 2
+    assert result["score"] == pytest.approx(0.92)
+    assert result["saved_cost"] == 0.0
+    assert "minor" in result["flags"]
+
+
+def test_routing_prefers_cheapest_route_within_quality():
+    from app.models.core import CustomJudge, EvaluationProfile
+    from app.services import model_routing_service as routing
+
+    judge = CustomJudge(id=901, name="Local", slug="local", model_type="custom_endpoint",
+                        pricing={"input_per_1m": 0.01, "output_per_1m": 0.02}, capabilities=["text"])
+    key = routing.judge_route_key(judge)
+    profile = EvaluationProfile(routing_policy="cheapest_within_quality", routing_reference_model="gpt-4o-mini", org_id=1)
+
+    # Unproven cheap judge: only reachable through audited exploration
+    with patch("app.services.model_routing_service.random.random", return_value=1.0):
+        assert routing.choose_route(profile, [judge])["route"] == "gpt-4o-mini"
+    with patch("app.services.model_routing_service.random.random", return_value=0.0):
+        plan = routing.choose_route(profile, [judge])
+    assert plan["route"] == key and plan["audit_route"] == "gpt-4o-mini"
+
+    with routing.org_scope(1):
+        for _ in range(25):
+            routing.record_call(key, 300, False, 0.00002)
+            routing.record_agreement(key, "gpt-4o-mini", 0.82, 0.8)
+    with patch("app.services.model_routing_service.random.random", return_value=1.0):
+        plan = routing.choose_route(profile, [judge])
+        # Another org's windows are its own
+        other_org = EvaluationProfile(routing_policy="cheapest_within_quality", routing_reference_model="gpt-4o-mini", org_id=2)
+        assert routing.choose_route(other_org, [judge])["route"] == "gpt-4o-mini"
+    assert plan["route"] == key and plan["judge"] is judge and plan["audit_route"] is None
+
+    pinned = EvaluationProfile(routing_policy="pinned", routing_pinned_model="claude-3-haiku-20240307")
+    assert routing.choose_route(pinned, [judge])["route"] == "claude-3-haiku-20240307"
+
+
+def test_prescreen_compiles_pack_rules_into_one_scan():
+    from app.models.core import CardVersion, Critic
+    from app.services import prescreen_service
+
+    version = CardVersion(
+        id=902, character_id=1, version_number=1,
+        safety_pack={"prohibited_topics": [{"topic": "violence", "severity": "strict"}],
+                     "prohibited_terms": ["secret lair"]},
+        legal_pack={"prohibited_terms": ["Acme Corp"]},
+    )
+    screener = prescreen_service.get_screener(version)
+    assert prescreen_service.screen(screener, "Let's jump in muddy puddles!")["action"] is None
+    assert prescreen_service.screen(screener, "Peppa wants to kill the dragon")["action"] == "escalate"
+    # "skill" must not match "kill"
+    assert prescreen_service.screen(screener, "What a skillful jump")["action"] is None
+
+    result = prescreen_service.screen(screener, "Visit the SECRET LAIR sponsored by acme corp")
+    assert result["action"] == "block"
+    assert {m["source"] for m in result["matches"]} == {"safety", "legal"}
+    assert "prescreen_block" in prescreen_service.screen_flags(result)
+
+    safety = Critic(id=1, name="Safety", slug="safety", category="safety", prompt_template="")
+    voice = Critic(id=2, name="Voice", slug="voice", category="voice", prompt_template="")
+    narrowed = prescreen_service.relevant_critics([(safety, None), (voice, None)], result)
+    assert narrowed == [(safety, None)]
+
+    # Re-pointing a tag at other critics rebuilds the cached screener
+    from app.models.core import TaxonomyTag
+    tag = TaxonomyTag(id=903, slug="mud", severity="low", evaluation_rules={"prescreen_terms": ["mud"], "1": {}})
+    assert prescreen_service.screen(prescreen_service.get_screener(version, [tag]), "mud")["critic_ids"] == [1]
+    tag.evaluation_rules = {"prescreen_terms": ["mud"], "2": {}}
+    assert prescreen_service.screen(prescreen_service.get_screener(version, [tag]), "mud")["critic_ids"] == [2]
+
+
+@pytest.mark.asyncio
+async def test_decision_predictor_trains_and_skips_confident_cases(db_session):
+    from app.models.core import EvalRun
+    from app.services import decision_predictor_service as predictors
+
+    good = ["Oink! Let's jump in muddy puddles with George", "Peppa giggles and jumps in puddles"]
+    bad = ["I will hurt you with a knife", "grab the knife and hurt them"]
+    for i in range(300):
+        passing = i % 2 == 0
+        db_session.add(EvalRun(
+            character_id=1, org_id=1, status="completed",
+            input_content={"content": f"{(good if passing else bad)[i % 4 // 2]} {i}"},
+            decision="pass" if passing else "block", overall_score=0.95 if passing else 0.1,
+        ))
+    await db_session.flush()
+
+    predictor = await predictors.create_predictor(db_session, 1, character_id=1)
+    predictor = await predictors.train_predictor(db_session, predictor.id)
+    assert predictor.status == "ready"
+    assert predictor.classes == ["block", "pass"]
+    assert predictor.confidence_threshold is not None
+
+    active = await predictors.get_active_predictor(db_session, 1, 1)
+    assert active.id == predictor.id
+    prediction = await predictors.predict(db_session, active, "George jumps in muddy puddles")
+    assert prediction["decision"] == "pass" and prediction["skippable"]
+    assert prediction["score"] == pytest.approx(0.95)
+
+    retrained = await predictors.train_predictor(db_session, (await predictors.create_predictor(db_session, 1, character_id=1)).id)
+    assert retrained.version == 2
+    assert (await predictors.get_active_predictor(db_session, 1, 1)).id == retrained.id
+
+
+def test_near_duplicate_index_finds_light_variations():
+    from app.services.near_duplicate_service import CharacterIndex
+
+    index = CharacterIndex(max_evals=2)
+    original = "Oink! Hello everyone, I'm Peppa Pig. Let's all jump in muddy puddles together!"
+    index.add("exemplar:1", original, {"eval_run_id": None, "decision": "pass", "score": 0.97})
+    index.add("eval:10", "The weather is terrible and George lost his dinosaur.", {"eval_run_id": 10, "decision": "regenerate", "score": 0.75})
+
+    match = index.query("Oink! Hello everyone, I'm Peppa Pig. Let's all jump in muddy puddles together!!", 0.8)
+    assert match["source"] == "exemplar:1" and match["decision"] == "pass"
+    assert match["similarity"] >= 0.8
+    assert index.query("A completely different sentence about spaceships and lasers.", 0.8) is None
+
+    index.remove("exemplar:1")
+    assert index.query(original, 0.8) is None
+
+    # Only the most recent judged runs are kept; exemplars are never evicted
+    index.add("exemplar:2", original, {"eval_run_id": None, "decision": "pass", "score": 0.97})
+    index.add("eval:11", "first run", {"eval_run_id": 11, "decision": "pass", "score": 0.9})
+    index.add("eval:12", "second run", {"eval_run_id": 12, "decision": "pass", "score": 0.9})
+    assert "eval:10" not in index.items and "exemplar:2" in index.items
+
+    # Runs judged against another card version never match; exemplars match any version
+    index.remove("exemplar:2")
+    index.add("eval:13", original, {"eval_run_id": 13, "decision": "pass", "score": 0.9, "card_version_id": 1})
+    assert index.query(original, 0.8, card_version_id=1)["source"] == "eval:13"
+    assert index.query(original, 0.8, card_version_id=2) is None
+    index.add("exemplar:3", original, {"eval_run_id": None, "decision": "pass", "score": 0.97, "card_version_id": None})
+    assert index.query(original, 0.8, card_version_id=2)["source"] == "exemplar:3"
+
+
+@pytest.mark.asyncio
+async def test_batch_evaluation_loads_context_once_per_character(db_session):
+    from app.models.core import CharacterCard, CardVersion, Critic
+    from app.schemas.evaluations import EvalRequest
+    from app.services import evaluation_service
+
+    character = CharacterCard(name="Peppa", slug="peppa", org_id=1)
+    db_session.add(character)
+    await db_session.flush()
+    version = CardVersion(character_id=character.id, version_number=1, canon_pack={"name": "Peppa"})
+    db_session.add(version)
+    await db_session.flush()
+    character.active_version_id = version.id
+    db_session.add(Critic(name="Voice", slug="voice", prompt_template="{content}", default_weight=1.0, org_id=1, modality="text"))
+    await db_session.flush()
+
+    verdict = {"score": 0.95, "reasoning": "", "flags": [], "latency_ms": 1, "prompt_tokens": 10,
+               "completion_tokens": 5, "model_used": "gpt-4o-mini", "estimated_cost": 0.0}
+    items = [EvalRequest(character_id=character.id, content=f"Oink {i}") for i in range(6)]
+    items.append(EvalRequest(character_id=999, content="Unknown character"))
+    seen = []
+
+    async def on_result(outcome):
+        seen.append(outcome["index"])
+
+    with patch("app.services.critic_service.run_critic", AsyncMock(return_value=verdict)), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)), \
+         patch("app.services.evaluation_service.load_context", wraps=evaluation_service.load_context) as load_context:
+        outcomes = await evaluation_service.evaluate_batch(db_session, items, 1, concurrency=2, on_result=on_result)
+
+    assert load_context.call_count == 2  # once per character
+    assert [o["index"] for o in outcomes] == list(range(7))
+    assert sorted(seen) == list(range(7))
+    assert all(o["decision"] == "pass" and o["eval_run_id"] for o in outcomes[:6])
+    assert outcomes[6]["status"] == "error" and outcomes[6]["error"] == "Character not found"
+    summary = evaluation_service.summarize_batch(outcomes)
+    assert summary["completed"] == 6 and summary["failed"] == 1 and summary["decisions"] == {"pass": 6}
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_items_whose_finalize_fails(db_session):
+    from sqlalchemy import select
+    from app.models.core import CharacterCard, CardVersion, Critic, EvalRun, EvalResult
+    from app.schemas.evaluations import EvalRequest
+    from app.services import evaluation_service
+
+    character = CharacterCard(name="Peppa", slug="peppa", org_id=1)
+    db_session.add(character)
+    await db_session.flush()
+    version = CardVersion(character_id=character.id, version_number=1, canon_pack={"name": "Peppa"})
+    db_session.add(version)
+    await db_session.flush()
+    character.active_version_id = version.id
+    db_session.add(Critic(name="Voice", slug="voice", prompt_template="{content}", default_weight=1.0, org_id=1, modality="text"))
+    await db_session.flush()
+
+    verdict = {"score": 0.95, "reasoning": "", "flags": [], "latency_ms": 1, "prompt_tokens": 10,
+               "completion_tokens": 5, "model_used": "gpt-4o-mini", "estimated_cost": 0.0}
+    items = [EvalRequest(character_id=character.id, content=f"Oink {i}") for i in range(3)]
+    with patch("app.services.critic_service.run_critic", AsyncMock(return_value=verdict)), \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)), \
+         patch("app.services.drift_service.record_eval", AsyncMock(side_effect=[RuntimeError("boom"), [], []])):
+        outcomes = await evaluation_service.evaluate_batch(db_session, items, 1, concurrency=1)
+
+    assert [o["status"] for o in outcomes] == ["error", "completed", "completed"]
+    assert outcomes[0]["error"] == "boom" and outcomes[0]["eval_run_id"]
+    failed = await db_session.get(EvalRun, outcomes[0]["eval_run_id"])
+    assert failed.status == "failed" and failed.decision is None
+    # The failed finalize left nothing behind; the other items were committed
+    results = (await db_session.execute(select(EvalResult.eval_run_id))).scalars().all()
+    assert sorted(results) == sorted(o["eval_run_id"] for o in outcomes[1:])
+
+
+@pytest.mark.asyncio
+async def test_tiered_run_keeps_seeded_verdicts():
+    from types import SimpleNamespace
+    from app.models.core import EvalRun
+    from app.services import evaluation_service
+    critic, version = _critic_and_version()
+    deep = SimpleNamespace(id=critic.id + 1)
+    profile = SimpleNamespace(tiered_evaluation=True, rapid_screen_critics=[critic.id])
+
+    def seeded(score):
+        return {"critic_id": critic.id, "critic_name": critic.name, "weight": 1.0, "score": score,
+                "reasoning": "", "flags": [], "reused_from": "exact"}
+
+    def plan(seeded_score):
+        return {
+            "profile": profile, "critics_with_config": [(deep, None)], "seeded_results": [seeded(seeded_score)],
+            "card_version": version, "content": "Oink", "character_name": "Peppa",
+            "escalation_judge": None, "routing_judges": None,
+        }
+
+    deep_verdict = {"critic_id": deep.id, "weight": 1.0, "score": 0.9}
+    with patch("app.services.critic_service.run_critics_parallel", AsyncMock(return_value=[deep_verdict])) as run, \
+         patch("app.services.evaluation_service._synthesize_analysis", AsyncMock(return_value=None)):
+        # The only rapid critic was seeded with a failing verdict: screen fails, verdict kept
+        eval_run = EvalRun(org_id=1)
+        results, _ = await evaluation_service.run_plan(eval_run, plan(0.1))
+        run.assert_not_called()
+        assert eval_run.tier == "rapid"
+        assert [r["score"] for r in results] == [0.1]
+
+        eval_run = EvalRun(org_id=1)
+        results, _ = await evaluation_service.run_plan(eval_run, plan(0.95))
+        assert eval_run.tier == "full"
+        assert [r["score"] for r in results] == [0.9, 0.95]
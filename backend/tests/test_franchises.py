@@ -0,0 +1,74 @@
+"""Franchise tests — health from incrementally maintained rollups."""
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from unittest.mock import patch
+
+from app.models.core import FranchiseRollup
+from tests.test_drift import _evaluate
+
+
+async def _franchise_character(client, h, franchise_id, name):
+    char = await client.post("/api/characters", json={
+        "name": name, "slug": name.lower(), "franchise_id": franchise_id,
+    }, headers=h)
+    char_id = char.json()["id"]
+    version = await client.post(f"/api/characters/{char_id}/versions", json={"canon_pack": {"name": name}}, headers=h)
+    await client.post(f"/api/characters/{char_id}/versions/{version.json()['id']}/publish", headers=h)
+    return char_id
+
+
+@pytest.mark.asyncio
+async def test_health_is_read_from_rollups_and_backfill_rebuilds_them(client, test_org_and_user, engine, db_session):
+    h = test_org_and_user["headers"]
+    franchise = await client.post("/api/franchises", json={"name": "Peppa Pig", "slug": "peppa-pig"}, headers=h)
+    franchise_id = franchise.json()["id"]
+    await client.post("/api/critics", json={"name": "Voice", "slug": "voice", "prompt_template": "{content}"}, headers=h)
+    peppa = await _franchise_character(client, h, franchise_id, "Peppa")
+    george = await _franchise_character(client, h, franchise_id, "George")
+
+    await _evaluate(client, h, peppa, ["good 1", "good 2", "good 3", "bad 1"])
+    await _evaluate(client, h, george, ["good 1", "bad 1"])
+
+    rollups = (await db_session.execute(select(FranchiseRollup))).scalars().all()
+    assert sorted((r.character_id, r.granularity, r.eval_count) for r in rollups) == sorted([
+        (peppa, "hour", 4), (peppa, "day", 4), (george, "hour", 2), (george, "day", 2),
+    ])
+
+    health = (await client.get(f"/api/franchises/{franchise_id}/health", headers=h)).json()
+    assert health["total_evals"] == 6 and health["pass_rate"] == pytest.approx(4 / 6, abs=1e-4)
+    assert health["avg_score"] == pytest.approx((4 * 0.95 + 2 * 0.2) / 6, abs=1e-4)
+    # Character averages 0.7625 and 0.575: consistency is 1 - their population std
+    assert health["cross_character_consistency"] == pytest.approx(1 - 0.09375, abs=1e-4)
+
+    export = (await client.get(f"/api/export/franchise-health/{franchise_id}?format=json", headers=h)).json()
+    assert len(export) == 1 and export[0]["total_evals"] == 6
+    assert export[0]["health_score"] == health["health_score"]
+
+    # Lost rollups are rebuilt from history
+    await db_session.execute(delete(FranchiseRollup))
+    await db_session.commit()
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with patch("app.core.database.async_session", session_factory):
+        resp = await client.post(f"/api/franchises/{franchise_id}/rollups/backfill", headers=h)
+    assert resp.status_code == 202
+    assert (await client.get(f"/api/franchises/{franchise_id}/health", headers=h)).json() == health
+
+
+@pytest.mark.asyncio
+async def test_decision_changes_move_the_rollup_pass_count(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    franchise = await client.post("/api/franchises", json={"name": "Peppa Pig", "slug": "peppa-pig"}, headers=h)
+    franchise_id = franchise.json()["id"]
+    await client.post("/api/critics", json={"name": "Voice", "slug": "voice", "prompt_template": "{content}"}, headers=h)
+    peppa = await _franchise_character(client, h, franchise_id, "Peppa")
+    good, bad = await _evaluate(client, h, peppa, ["good 1", "bad 1"])
+
+    await client.post("/api/apm/enforce", json={"eval_run_id": good, "action": "block"}, headers=h)
+    health = (await client.get(f"/api/franchises/{franchise_id}/health", headers=h)).json()
+    assert health["total_evals"] == 2 and health["pass_rate"] == 0.0
+
+    await client.post("/api/apm/enforce", json={"eval_run_id": bad, "action": "override"}, headers=h)
+    await client.post("/api/apm/enforce", json={"eval_run_id": bad, "action": "override"}, headers=h)
+    health = (await client.get(f"/api/franchises/{franchise_id}/health", headers=h)).json()
+    assert health["total_evals"] == 2 and health["pass_rate"] == pytest.approx(0.5)
@@ -0,0 +1,91 @@
+"""Improvement tests — aggregated failure-pattern detection and bucketed trajectories."""
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.core import EvalRun
+
+from tests.test_ci import _character_with_critic
+from tests.test_drift import _evaluate
+
+
+@pytest.mark.asyncio
+async def test_detection_upserts_patterns_and_counts_incrementally(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, critic_id = await _character_with_critic(client, h)
+    await _evaluate(client, h, char_id, ["good 1", "bad 1", "bad 2", "good 2", "bad 3", "bad 4"])
+
+    first = await client.post(f"/api/improvement/detect-patterns?character_id={char_id}", headers=h)
+    assert first.status_code == 200, first.text
+    patterns = {p["pattern_type"]: p for p in first.json()}
+    assert set(patterns) == {"recurring_decision", "recurring_low_score"}
+    assert patterns["recurring_low_score"]["critic_id"] == critic_id
+    assert all(p["frequency"] == 4 for p in patterns.values())
+
+    # Re-detecting updates the same rows instead of adding new ones
+    again = (await client.post(f"/api/improvement/detect-patterns?character_id={char_id}", headers=h)).json()
+    assert sorted(p["id"] for p in again) == sorted(p["id"] for p in patterns.values())
+
+    await _evaluate(client, h, char_id, ["bad 5", "bad 6", "good 3"])
+    incremental = (await client.post(
+        f"/api/improvement/detect-patterns?character_id={char_id}&incremental=true", headers=h,
+    )).json()
+    assert all(p["frequency"] == 6 for p in incremental)
+    # Nothing new since the watermark: counts stay put
+    incremental = (await client.post(
+        f"/api/improvement/detect-patterns?character_id={char_id}&incremental=true", headers=h,
+    )).json()
+    assert all(p["frequency"] == 6 for p in incremental)
+
+    stored = (await client.get(f"/api/improvement/patterns?character_id={char_id}", headers=h)).json()
+    assert len(stored) == 2
+
+
+@pytest.mark.asyncio
+async def test_patterns_that_stop_recurring_are_removed(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    await _evaluate(client, h, char_id, ["bad 1", "bad 2", "bad 3"])
+
+    # Org-wide patterns have no character; re-detecting still updates them in place
+    first = (await client.post("/api/improvement/detect-patterns", headers=h)).json()
+    again = (await client.post("/api/improvement/detect-patterns", headers=h)).json()
+    assert len(first) == 2 and sorted(p["id"] for p in again) == sorted(p["id"] for p in first)
+    assert "in the last 3 evaluations" in first[0]["description"]
+
+    await _evaluate(client, h, char_id, ["good 1", "good 2", "good 3"])
+    with patch.object(settings, "FAILURE_PATTERN_WINDOW_RUNS", 3):
+        resp = await client.post("/api/improvement/detect-patterns?incremental=true", headers=h)
+        assert "in the last 6 evaluations" in resp.json()[0]["description"]
+        # The running counts now cover twice the window: recounted over the last 3 runs only
+        resp = await client.post("/api/improvement/detect-patterns?incremental=true", headers=h)
+    assert resp.json() == []
+    assert (await client.get("/api/improvement/patterns", headers=h)).json() == []
+
+
+@pytest.mark.asyncio
+async def test_trajectory_is_bucketed_by_day_and_fits_trend(client, test_org_and_user, db_session):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    run_ids = await _evaluate(client, h, char_id, ["good 1", "good 2", "good 3", "bad 1", "bad 2", "bad 3"])
+
+    # Two runs a day over three days, good first
+    start = datetime(2026, 3, 2, 9, 0)
+    for i, run_id in enumerate(run_ids):
+        await db_session.execute(
+            update(EvalRun).where(EvalRun.id == run_id).values(created_at=start + timedelta(days=i // 2, hours=i % 2))
+        )
+    await db_session.commit()
+
+    resp = await client.post(f"/api/improvement/trajectory/{char_id}", headers=h)
+    assert resp.status_code == 200, resp.text
+    trajectory = resp.json()
+    assert [p["date"] for p in trajectory["data_points"]] == [
+        "2026-03-02T00:00:00", "2026-03-03T00:00:00", "2026-03-04T00:00:00",
+    ]
+    assert [p["count"] for p in trajectory["data_points"]] == [2, 2, 2]
+    assert trajectory["data_points"][0]["value"] > trajectory["data_points"][-1]["value"]
+    assert trajectory["trend"] == "degrading"
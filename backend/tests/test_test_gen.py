@@ -0,0 +1,40 @@
+"""Test case generation tests — concurrent categories, dedup and bulk insert."""
+import pytest
+from unittest.mock import patch
+
+from tests.test_ci import _character_with_critic
+
+
+async def _fake_cases(system_prompt, user_prompt):
+    category = user_prompt.split()[2]
+    return {"test_cases": [
+        {"name": "Best friend", "prompt": "Who is your best friend?", "difficulty": "easy"},
+        {"name": "Best friend again", "prompt": "who is your BEST friend", "difficulty": "easy"},
+        {"name": f"{category} probe", "prompt": f"Tell me something about {category} please"},
+    ]}
+
+
+@pytest.mark.asyncio
+async def test_populate_suite_skips_duplicate_cases(client, test_org_and_user):
+    h = test_org_and_user["headers"]
+    char_id, _ = await _character_with_critic(client, h)
+    suite = await client.post("/api/test-suites", json={"name": "Gen", "character_id": char_id}, headers=h)
+    suite_id = suite.json()["id"]
+    await client.post(f"/api/test-suites/{suite_id}/cases", json={
+        "name": "Existing", "input_content": {"prompt": "Tell me something about world_knowledge, please!"},
+    }, headers=h)
+
+    with patch("app.services.test_gen_service.call_llm_json", side_effect=_fake_cases) as gen:
+        resp = await client.post("/api/test-gen/populate-suite", json={
+            "character_id": char_id, "suite_id": suite_id, "count": 15,
+        }, headers=h)
+    assert resp.status_code == 200, resp.text
+    assert gen.call_count == 5
+
+    # One shared "best friend" case plus one per category, minus the one already in the suite
+    prompts = [c["content"]["prompt"] for c in resp.json()["test_cases"]]
+    assert prompts[0] == "Who is your best friend?"
+    assert len(prompts) == 5 and "Tell me something about world_knowledge please" not in prompts
+
+    cases = await client.get(f"/api/test-suites/{suite_id}/cases", headers=h)
+    assert len(cases.json()) == 6